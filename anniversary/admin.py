@@ -0,0 +1,15 @@
+from django.contrib import admin
+
+from .models import ChunkedUpload, ValidationJob
+
+
+@admin.register(ValidationJob)
+class ValidationJobAdmin(admin.ModelAdmin):
+    list_display = ('file_name', 'status', 'stage', 'progress', 'created_at')
+    list_filter = ('status',)
+
+
+@admin.register(ChunkedUpload)
+class ChunkedUploadAdmin(admin.ModelAdmin):
+    list_display = ('file_name', 'status', 'received', 'size', 'created_at')
+    list_filter = ('status',)
@@ -0,0 +1,56 @@
+"""Authentication for the JSON endpoints scripts call: the validation job and chunked upload APIs.
+
+Browsers on the site send the CSRF token like any form post. Scripts and
+other services have no session to get one from, so they send an API token
+instead, ``Authorization: Bearer <token>``, one of TIMESHEET_API_TOKENS. A
+request carrying a token skips the CSRF check; a wrong token is refused.
+"""
+import functools
+import hmac
+
+from django.conf import settings
+from django.http import JsonResponse
+from django.middleware.csrf import CsrfViewMiddleware
+from django.views.decorators.csrf import csrf_exempt
+
+from .concurrency import run_io
+
+
+def api_token(request):
+    """The bearer token of a request, or None when it has no Authorization header."""
+    header = request.headers.get('Authorization')
+    if header is None:
+        return None
+    scheme, _, token = header.partition(' ')
+    return token.strip() if scheme.lower() == 'bearer' else ''
+
+
+def valid_api_token(token):
+    # Compared in constant time, against every token so none is found faster
+    matches = [hmac.compare_digest(token.encode(), known.encode()) for known in settings.TIMESHEET_API_TOKENS]
+    return bool(token) and any(matches)
+
+
+def _check_csrf(request):
+    return CsrfViewMiddleware(lambda request: None).process_view(request, None, (), {})
+
+
+def api_view(view):
+    """Let an async view be called with an API token instead of a CSRF token.
+
+    Requests without an Authorization header get the usual CSRF check, in a
+    worker thread since it may parse a multipart body.
+    """
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        token = api_token(request)
+        if token is not None:
+            if not valid_api_token(token):
+                return JsonResponse({'success': False, 'error': 'Invalid API token'}, status=401)
+        else:
+            rejected = await run_io(_check_csrf, request)
+            if rejected is not None:
+                return rejected
+        return await view(request, *args, **kwargs)
+
+    return csrf_exempt(wrapper)
@@ -0,0 +1,11 @@
+from django.apps import AppConfig
+from django.core.signals import request_started
+
+
+class AnniversaryConfig(AppConfig):
+    name = 'anniversary'
+
+    def ready(self):
+        # Not here directly: apps shouldn't query the database while starting up
+        from .jobs import recover_jobs_once
+        request_started.connect(recover_jobs_once, dispatch_uid='anniversary.recover_jobs')
@@ -0,0 +1,164 @@
+"""Batch validation of many timesheets uploaded together.
+
+At month end HR uploads every employee's timesheet at once, as several files
+or as ZIP archives of workbooks. The workbooks are saved into one batch
+folder, validated in a pool of TIMESHEET_BATCH_WORKERS processes and
+returned as one archive with a consolidated summary. Summary tracking gets a
+single write for the whole batch rather than one per file.
+
+Limits (in settings), counted after unpacking ZIPs:
+
+- TIMESHEET_BATCH_MAX_FILES: workbooks per batch
+- TIMESHEET_BATCH_MAX_BYTES: workbook data per batch
+"""
+import os
+import shutil
+import time
+import uuid
+import zipfile
+from datetime import datetime
+
+from django.conf import settings
+from django.utils.text import get_valid_filename
+
+from scripts.timesheet_validation import OutputManager
+from .jobs import build_validator, timesheet_dirs
+
+WORKBOOK_EXTENSIONS = ('.xlsx', '.xlsm', '.xls')
+COPY_BLOCK_BYTES = 256 * 1024
+
+
+def create_batch_dir():
+    """A new, empty folder for one batch's workbooks."""
+    batch_dir = os.path.join(timesheet_dirs()['batch'],
+                             f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}")
+    os.makedirs(batch_dir)
+    return batch_dir
+
+
+class _Budget:
+    """Counts files and bytes saved for a batch against the settings limits."""
+
+    def __init__(self):
+        self.files = 0
+        self.bytes_left = settings.TIMESHEET_BATCH_MAX_BYTES
+
+    def add_file(self):
+        self.files += 1
+        if self.files > settings.TIMESHEET_BATCH_MAX_FILES:
+            raise ValueError(f"A batch can hold at most {settings.TIMESHEET_BATCH_MAX_FILES} workbooks")
+
+    def copy(self, source, path):
+        # Counted while copying, the sizes a ZIP declares are not trusted
+        with open(path, 'wb') as destination:
+            for block in iter(lambda: source.read(COPY_BLOCK_BYTES), b''):
+                self.bytes_left -= len(block)
+                if self.bytes_left < 0:
+                    raise ValueError(f"A batch can hold at most {settings.TIMESHEET_BATCH_MAX_BYTES} bytes of workbooks")
+                destination.write(block)
+
+
+def _unique_name(name, used_names):
+    base, ext = os.path.splitext(name)
+    candidate, counter = name, 2
+    while candidate.lower() in used_names:
+        candidate, counter = f"{base}_{counter}{ext}", counter + 1
+    used_names.add(candidate.lower())
+    return candidate
+
+
+def _is_workbook(name):
+    return name.lower().endswith(WORKBOOK_EXTENSIONS) and not name.startswith(('.', '~$'))
+
+
+def save_batch_files(uploaded_files, batch_dir):
+    """Save uploaded workbooks, and the workbooks inside uploaded ZIPs, into batch_dir.
+
+    Returns the saved paths in upload order. Names are sanitized and made
+    unique; ZIP members that are not workbooks (folders, macOS metadata,
+    Excel lock files) are skipped. Raises ValueError for other file types,
+    broken ZIPs, an empty batch or a batch over the limits.
+    """
+    budget = _Budget()
+    used_names = set()
+    paths = []
+
+    def save(name, source):
+        budget.add_file()
+        path = os.path.join(batch_dir, _unique_name(get_valid_filename(name), used_names))
+        budget.copy(source, path)
+        paths.append(path)
+
+    for uploaded in uploaded_files:
+        name = os.path.basename(uploaded.name)
+        if name.lower().endswith('.zip'):
+            try:
+                with zipfile.ZipFile(uploaded) as archive:
+                    for info in archive.infolist():
+                        member_name = os.path.basename(info.filename)
+                        if info.is_dir() or '__MACOSX' in info.filename or not _is_workbook(member_name):
+                            continue
+                        with archive.open(info) as source:
+                            save(member_name, source)
+            except zipfile.BadZipFile:
+                raise ValueError(f"{name} is not a valid ZIP archive") from None
+        elif _is_workbook(name):
+            uploaded.seek(0)
+            save(name, uploaded)
+        else:
+            raise ValueError(f"{name} is not an Excel workbook or a ZIP of workbooks")
+
+    if not paths:
+        raise ValueError("The upload contains no Excel workbooks")
+    return paths
+
+
+def batch_report(validation_results, seconds, workers):
+    """Counts, time and throughput of a validated batch, in the order they are shown."""
+    validated = [result for result in validation_results if result["success"]]
+    sheets = sum(len(result["validated_sheets"]) for result in validated)
+    rows = sum(len(df) for result in validated for df in result["validated_sheets"].values())
+    return {
+        "Files": len(validation_results),
+        "Validated": len(validated),
+        "Failed": len(validation_results) - len(validated),
+        "Sheets": sheets,
+        "Rows": rows,
+        "Workers": workers or 1,
+        "Validation seconds": round(seconds, 3),
+        "Files per second": round(len(validation_results) / seconds, 2) if seconds else None,
+        "Rows per second": round(rows / seconds) if seconds else None,
+    }
+
+
+def validate_batch(paths, validation_type='standard'):
+    """Validate a batch's saved workbooks and write the batch ZIP; returns (ZIP path, report).
+
+    The report is batch_report plus "Total seconds", which also covers
+    writing the ZIP and summary tracking.
+    """
+    start = time.perf_counter()
+    dirs = timesheet_dirs()
+    validator = build_validator(validation_type)
+    output_manager = OutputManager(dirs['output'], dirs['archive'], dirs['validation'],
+                                   settings.TIMESHEET_ZIP_COMPRESSLEVEL)
+
+    workers = settings.TIMESHEET_BATCH_WORKERS
+    validation_results = validator.run_batch(paths, workers)
+    report = batch_report(validation_results, time.perf_counter() - start, workers)
+
+    # Unique like the batch folder: the outputs folder is shared by every user's batches
+    zip_path = os.path.join(dirs['output'],
+                            f"Timesheet_Batch_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}.zip")
+    validation_number = 1 if validation_type == 'custom' else None
+    if not output_manager.write_batch_zip(validation_results, zip_path, validation_number, report):
+        raise RuntimeError("Validation completed, but error creating the batch ZIP archive")
+
+    report["Total seconds"] = round(time.perf_counter() - start, 3)
+    print(f"Validated batch of {report['Files']} files ({report['Rows']} rows) in {report['Total seconds']}s, "
+          f"{report['Files per second']} files/s, {report['Failed']} failed")
+    return zip_path, report
+
+
+def discard_batch(batch_dir):
+    shutil.rmtree(batch_dir, ignore_errors=True)
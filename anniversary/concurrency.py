@@ -0,0 +1,144 @@
+"""Keep blocking work off the event loop for the async upload views.
+
+Under ASGI one event loop serves every request, so anything that blocks it
+stalls them all. Parsing multipart bodies, copying uploads to disk and
+reading files back run in the loop's default thread pool (run_io).
+Validation, deck generation and the writers of streamed ZIPs are CPU-heavy
+and run in the pipeline executor (run_pipeline, or a ZipStream given
+get_pipeline_executor()), capped at PIPELINE_EXECUTOR_WORKERS threads so a
+burst of uploads queues up instead of starving the server. All of them carry
+the request's context variables along, so pipeline stages still land in the
+Server-Timing header. Under WSGI the same views work unchanged.
+"""
+import mimetypes
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from django.utils.http import content_disposition_header
+
+STREAM_CHUNK_BYTES = 256 * 1024
+
+_pipeline_executor = None
+_pipeline_executor_lock = threading.Lock()
+
+
+def get_pipeline_executor():
+    """Return the process-wide executor for CPU-heavy pipeline work, creating it on first use."""
+    global _pipeline_executor
+    with _pipeline_executor_lock:
+        if _pipeline_executor is None:
+            _pipeline_executor = ThreadPoolExecutor(
+                max_workers=settings.PIPELINE_EXECUTOR_WORKERS,
+                thread_name_prefix='pipeline',
+            )
+        return _pipeline_executor
+
+
+async def run_pipeline(func, *args, **kwargs):
+    """Run a CPU-heavy call in the bounded pipeline executor and wait for its result."""
+    return await sync_to_async(func, thread_sensitive=False, executor=get_pipeline_executor())(*args, **kwargs)
+
+
+async def run_io(func, *args, **kwargs):
+    """Run a blocking file operation in a worker thread and wait for its result."""
+    return await sync_to_async(func, thread_sensitive=False)(*args, **kwargs)
+
+
+def _parse_upload_form(request, form_class):
+    return form_class(request.POST, request.FILES)
+
+
+async def bind_upload_form(request, form_class):
+    """Bind form_class to the request's POST data and files.
+
+    Reading request.POST parses the multipart body and writes large uploads
+    to temporary files, so it happens in a worker thread.
+    """
+    return await run_io(_parse_upload_form, request, form_class)
+
+
+def _copy_upload(uploaded_file, path):
+    # Written beside path and moved over it: an upload replacing an older one
+    # must not write through a hard link that apply_retention made
+    temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.part"
+    try:
+        with open(temp_path, 'wb+') as destination:
+            for chunk in uploaded_file.chunks():
+                destination.write(chunk)
+        os.replace(temp_path, path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+async def save_upload(uploaded_file, path):
+    """Write an uploaded file to path chunk by chunk without blocking the event loop."""
+    await run_io(_copy_upload, uploaded_file, path)
+
+
+def _remaining_size(fileobj):
+    position = fileobj.tell()
+    fileobj.seek(0, os.SEEK_END)
+    size = fileobj.tell() - position
+    fileobj.seek(position)
+    return size
+
+
+async def _read_chunks(fileobj):
+    try:
+        while True:
+            chunk = await run_io(fileobj.read, STREAM_CHUNK_BYTES)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        await run_io(fileobj.close)
+
+
+def stream_file(fileobj, filename):
+    """Send an open binary file as a download, reading it in chunks off the event loop.
+
+    FileResponse iterates synchronously, which ASGI servers can only do by
+    reading the whole file into memory first. The file is closed once sent.
+    """
+    response = StreamingHttpResponse(_read_chunks(fileobj))
+    content_type, _ = mimetypes.guess_type(filename)
+    response.headers['Content-Type'] = content_type or 'application/octet-stream'
+    response.headers['Content-Length'] = str(_remaining_size(fileobj))
+    response.headers['Content-Disposition'] = content_disposition_header(True, filename)
+    return response
+
+
+async def _read_zip_stream(zip_stream):
+    try:
+        while True:
+            chunk = await run_io(zip_stream.read_chunk)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        zip_stream.close()
+
+
+def stream_zip(zip_stream, filename):
+    """Send a ZipStream as a download while its archive is being written.
+
+    The size is not known up front, so there is no Content-Length. If the
+    client goes away the stream is closed and its writer stops. Build the
+    stream with executor=get_pipeline_executor() so its writer counts
+    against PIPELINE_EXECUTOR_WORKERS. Stages of the writer run after the
+    headers are sent, so they reach the pipeline metrics but not Server-Timing.
+    """
+    response = StreamingHttpResponse(_read_zip_stream(zip_stream))
+    response.headers['Content-Type'] = 'application/zip'
+    response.headers['Content-Disposition'] = content_disposition_header(True, filename)
+    return response
+
+
+async def open_for_streaming(path):
+    """Open path for stream_file in a worker thread."""
+    return await run_io(open, path, 'rb')
@@ -1,4 +1,7 @@
 from django import forms
+from django.conf import settings
+
+from scripts.validation_rules import load_rule_sets
 
 class UploadExcelForm(forms.Form):
     name = forms.CharField(label='Your Name', max_length=100)
@@ -9,7 +12,33 @@ class UploadExcelForm(forms.Form):
         choices=YEARS_CHOICES,
         widget=forms.Select(attrs={'class': 'form-control'})
     ) 
-    file = forms.FileField(label='Upload Excel File')
+    file = forms.FileField(label='Upload Excel or CSV File')
+
+class UploadBatchExcelForm(forms.Form):
+    batch_file = forms.FileField(
+        label='Upload Batch Excel or CSV File',
+        help_text='Excel or CSV, one row per wish with Employee, Years, Wishes and Name columns.'
+    )
+
+class MultipleFileInput(forms.ClearableFileInput):
+    allow_multiple_selected = True
+
+
+class MultipleFileField(forms.FileField):
+    """FileField that accepts several files; cleans to a list of uploaded files."""
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault('widget', MultipleFileInput())
+        super().__init__(*args, **kwargs)
+
+    def clean(self, data, initial=None):
+        single_file_clean = super().clean
+        if not isinstance(data, (list, tuple)):
+            return [single_file_clean(data, initial)]
+        if not data and self.required:
+            raise forms.ValidationError(self.error_messages['required'], code='required')
+        return [single_file_clean(item, initial) for item in data]
+
 
 class UploadTimesheetForm(forms.Form):
     timesheet_file = forms.FileField(
@@ -19,9 +48,23 @@ class UploadTimesheetForm(forms.Form):
     validation_type = forms.ChoiceField(
         choices=[
             ('standard', 'Standard Validation'),
-            ('custom', 'Custom Validation')
+            ('custom', 'Custom Validation (9 hr day)')
         ],
         initial='standard',
         widget=forms.RadioSelect,
         required=False
+    )
+
+    def clean_validation_type(self):
+        validation_type = self.cleaned_data.get('validation_type') or 'standard'
+        if validation_type not in load_rule_sets(settings.TIMESHEET_RULE_SETS):
+            raise forms.ValidationError("No rule set is configured for this validation type.")
+        return validation_type
+
+
+class UploadTimesheetBatchForm(UploadTimesheetForm):
+    timesheet_file = None
+    timesheet_files = MultipleFileField(
+        label='Upload Timesheet Excel Files',
+        help_text='Select several Excel files, or ZIP archives of them, to validate together.'
     )
\ No newline at end of file
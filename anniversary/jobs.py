@@ -0,0 +1,248 @@
+"""Background worker pool for timesheet validation uploads."""
+import os
+import shutil
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections
+from django.utils import timezone
+
+from scripts.timesheet_validation import RULES_VERSION, OutputManager, ResultCache, SheetCache, TimeValidator
+from scripts.validation_rules import load_rule_sets
+from .concurrency import run_io, run_pipeline, save_upload
+from .models import ValidationJob, current_worker
+
+_executor = None
+_executor_lock = threading.Lock()
+_recovery_done = False
+_recovery_lock = threading.Lock()
+
+
+def get_executor():
+    """Return the process-wide job executor, creating it on first use."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.TIMESHEET_JOB_WORKERS,
+                thread_name_prefix='timesheet-job',
+            )
+        return _executor
+
+
+def timesheet_dirs():
+    """Media directories used by the timesheet pipeline, created if missing."""
+    dirs = {
+        'upload': os.path.join(settings.MEDIA_ROOT, 'timesheet'),
+        'output': os.path.join(settings.MEDIA_ROOT, 'timesheet_outputs'),
+        'archive': os.path.join(settings.MEDIA_ROOT, 'timesheet_archives'),
+        'validation': os.path.join(settings.MEDIA_ROOT, 'timesheet_validations'),
+        'cache': os.path.join(settings.MEDIA_ROOT, 'timesheet_cache'),
+        'sheet_cache': os.path.join(settings.MEDIA_ROOT, 'timesheet_sheet_cache'),
+        'chunked': os.path.join(settings.MEDIA_ROOT, 'timesheet_chunked_uploads'),
+        'batch': os.path.join(settings.MEDIA_ROOT, 'timesheet_batches'),
+    }
+    for directory in dirs.values():
+        os.makedirs(directory, exist_ok=True)
+    return dirs
+
+
+def get_result_cache():
+    """The validation result cache, or None when TIMESHEET_RESULT_CACHE_BYTES is 0."""
+    if not settings.TIMESHEET_RESULT_CACHE_BYTES:
+        return None
+    return ResultCache(timesheet_dirs()['cache'], settings.TIMESHEET_RESULT_CACHE_BYTES)
+
+
+def get_rule_set(validation_type):
+    """The RuleSet from TIMESHEET_RULE_SETS for a validation type; ValueError if there is none."""
+    rule_sets = load_rule_sets(settings.TIMESHEET_RULE_SETS)
+    try:
+        return rule_sets[validation_type or 'standard']
+    except KeyError:
+        raise ValueError(f"Unknown validation type: {validation_type}") from None
+
+
+def build_validator(validation_type='standard'):
+    """TimeValidator with the validation type's rule set, reusing unchanged sheets when enabled."""
+    sheet_cache = None
+    if settings.TIMESHEET_SHEET_CACHE_ENTRIES:
+        sheet_cache = SheetCache(timesheet_dirs()['sheet_cache'], settings.TIMESHEET_SHEET_CACHE_ENTRIES)
+    return TimeValidator(
+        workers=settings.TIMESHEET_VALIDATION_WORKERS,
+        chunk_size=settings.TIMESHEET_READ_CHUNK_ROWS,
+        sheet_cache=sheet_cache,
+        rules=get_rule_set(validation_type),
+    )
+
+
+def result_cache_key(cache, upload_path, validation_type):
+    """Cache key for an upload: its content, name, validation type and rules."""
+    return cache.make_key(upload_path, os.path.basename(upload_path), validation_type or 'standard',
+                          RULES_VERSION, get_rule_set(validation_type).fingerprint())
+
+
+def new_validation_job(file_name, validation_type='standard'):
+    """An unsaved ValidationJob for an upload, with the folder its file goes in created."""
+    job = ValidationJob(file_name=file_name, validation_type=validation_type or 'standard')
+    job.upload_path = _job_upload_path(job)
+    return job
+
+
+async def submit_validation_job(uploaded_file, validation_type='standard'):
+    """Save an upload and queue it for validation from an async view; returns the ValidationJob.
+
+    Only the job row is saved on Django's thread for sync ORM code; the file
+    is copied in a worker thread. With TIMESHEET_JOB_WORKERS set to 0 the job
+    runs in the pipeline executor before this returns, which keeps tests and
+    single-threaded setups free of background threads.
+    """
+    job = await run_io(new_validation_job, uploaded_file.name, validation_type)
+    await save_upload(uploaded_file, job.upload_path)
+    await _queue_job(job)
+    return job
+
+
+async def submit_assembled_upload(path, file_name, validation_type='standard'):
+    """Queue a file already on disk (an assembled chunked upload) for validation; the file is moved.
+
+    Like submit_validation_job, only the job row is saved on Django's thread.
+    """
+    job = await run_io(new_validation_job, file_name, validation_type)
+    await run_io(os.replace, path, job.upload_path)
+    await _queue_job(job)
+    return job
+
+
+def _job_upload_path(job):
+    # Each job gets its own folder so concurrent uploads of the same file don't collide
+    job_dir = os.path.join(timesheet_dirs()['upload'], str(job.id))
+    os.makedirs(job_dir, exist_ok=True)
+    return os.path.join(job_dir, job.file_name)
+
+
+async def _queue_job(job):
+    await job.asave()
+    if settings.TIMESHEET_JOB_WORKERS:
+        get_executor().submit(_run_in_worker, job.id)
+    else:
+        await run_pipeline(_run_in_worker, job.id)
+
+
+def _run_in_worker(job_id):
+    try:
+        run_validation_job(job_id)
+    finally:
+        # Worker threads hold their own DB connection, release it between jobs
+        close_old_connections()
+
+
+def _worker_alive(worker):
+    try:
+        host, pid, _ = worker.rsplit(':', 2)
+        pid = int(pid)
+    except ValueError:
+        # Blank for jobs queued before workers were recorded
+        return False
+    if host != socket.gethostname() or os.name == 'nt':
+        # Processes on other hosts can't be checked (nor, safely, on Windows), they recover their own jobs
+        return True
+    if pid == os.getpid():
+        return worker == current_worker()
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        pass
+    return True
+
+
+def recover_interrupted_jobs():
+    """Requeue or fail the queued and running jobs of processes that are gone; returns how many.
+
+    Jobs live in their process's executor, so after a restart or crash their
+    rows would stay queued or running for good. Those whose upload is still
+    there go back on this process's queue, the rest (and all of them with
+    TIMESHEET_JOB_WORKERS at 0) are marked failed.
+    """
+    recovered = 0
+    for job in ValidationJob.objects.filter(status__in=[ValidationJob.QUEUED, ValidationJob.RUNNING]):
+        if _worker_alive(job.worker):
+            continue
+        requeue = bool(settings.TIMESHEET_JOB_WORKERS) and os.path.exists(job.upload_path)
+        if requeue:
+            fields = {'status': ValidationJob.QUEUED, 'stage': '', 'progress': 0, 'worker': current_worker()}
+        else:
+            fields = {'status': ValidationJob.FAILED, 'error': "Interrupted by a server restart, upload it again"}
+        # Claimed with a conditional update, so two processes starting together don't both take a job
+        if not ValidationJob.objects.filter(pk=job.pk, status=job.status, worker=job.worker).update(
+                updated_at=timezone.now(), **fields):
+            continue
+        if requeue:
+            get_executor().submit(_run_in_worker, job.pk)
+        recovered += 1
+    return recovered
+
+
+def recover_jobs_once(**kwargs):
+    """request_started receiver running recover_interrupted_jobs on the process's first request."""
+    global _recovery_done
+    with _recovery_lock:
+        if _recovery_done:
+            return
+        _recovery_done = True
+    try:
+        recovered = recover_interrupted_jobs()
+    except DatabaseError as e:
+        print(f"Could not recover interrupted validation jobs: {str(e)}")
+        return
+    if recovered:
+        print(f"Recovered {recovered} interrupted validation job(s)")
+
+
+def run_validation_job(job_id):
+    """Validate, save and zip one queued upload, recording progress on the job."""
+    try:
+        job = ValidationJob.objects.get(pk=job_id)
+        dirs = timesheet_dirs()
+        validator = build_validator(job.validation_type)
+        output_manager = OutputManager(dirs['output'], dirs['archive'], dirs['validation'],
+                                       settings.TIMESHEET_ZIP_COMPRESSLEVEL)
+
+        validation_number = 1 if job.validation_type == 'custom' else None
+        cache = get_result_cache()
+        cache_key = result_cache_key(cache, job.upload_path, job.validation_type) if cache else None
+        cached = cache.get(cache_key) if cache else None
+        if cached:
+            validation_result = output_manager.record_cached_validation(job.upload_path, cached['summary'],
+                                                                        validation_number)
+            # Keep a copy next to the other outputs so the download survives cache eviction
+            zip_path = os.path.join(dirs['output'], output_manager.validation_zip_name(validation_result))
+            shutil.copyfile(cached['zip_path'], zip_path)
+            job.set_stage('done', 100, status=ValidationJob.DONE, zip_path=zip_path)
+            return
+
+        job.set_stage('validating', 10, status=ValidationJob.RUNNING)
+        if validator.chunk_size:
+            # Validated chunks go straight into the ZIP, so memory stays flat for any file size
+            validation_result, zip_path = output_manager.write_validation_zip_streaming(
+                validator, job.upload_path, validation_number)
+        else:
+            validation_result = validator.run(job.upload_path)
+            if validation_result["success"]:
+                job.set_stage('saving', 60)
+                zip_path = output_manager.write_validation_zip(validation_result, validation_number)
+        if not validation_result["success"]:
+            raise RuntimeError(f"Error validating timesheet: {validation_result.get('error', 'Unknown error')}")
+        if not zip_path:
+            raise RuntimeError("Validation completed, but error creating ZIP archive")
+        if cache:
+            cache.put(cache_key, zip_path, validation_result["summary"])
+
+        job.set_stage('done', 100, status=ValidationJob.DONE, zip_path=zip_path)
+    except Exception as e:
+        print(f"Validation job {job_id} failed: {str(e)}")
+        ValidationJob.objects.filter(pk=job_id).update(status=ValidationJob.FAILED, error=str(e))
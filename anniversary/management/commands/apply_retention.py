@@ -0,0 +1,41 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from anniversary.retention import apply_retention
+
+
+def _megabytes(nbytes):
+    return f"{nbytes / 2**20:.1f} MB"
+
+
+class Command(BaseCommand):
+    help = ("Delete old timesheet uploads and results, compact old validation folders into monthly "
+            "archives and hard-link identical workbooks (see anniversary/retention.py)")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='report what would be done without changing anything')
+        parser.add_argument('--days', type=int, help='override TIMESHEET_RETENTION_DAYS')
+        parser.add_argument('--max-bytes', type=int, help='override TIMESHEET_RETENTION_MAX_BYTES')
+        parser.add_argument('--compact-after-days', type=int, help='override TIMESHEET_COMPACT_AFTER_DAYS')
+
+    def handle(self, *args, **options):
+        for name in ('days', 'max_bytes', 'compact_after_days'):
+            if options[name] is not None and options[name] < 0:
+                raise CommandError(f"--{name.replace('_', '-')} cannot be negative")
+
+        report = apply_retention(dry_run=options['dry_run'], max_age_days=options['days'],
+                                 max_bytes=options['max_bytes'], compact_after_days=options['compact_after_days'])
+
+        # A dry run always lists every action, a real run only with -v 2
+        if report.dry_run or options['verbosity'] > 1:
+            for action, path, nbytes, reason in report.actions:
+                self.stdout.write(f"{action:<8} {os.path.relpath(path, settings.MEDIA_ROOT)} "
+                                  f"({_megabytes(nbytes)}, {reason})")
+
+        totals = report.totals()
+        prefix = "Would " if report.dry_run else ""
+        for action, verb in (('compact', 'compact'), ('delete', 'delete'), ('dedupe', 'hard-link')):
+            count, nbytes = totals.get(action, (0, 0))
+            self.stdout.write(f"{prefix}{verb if prefix else verb.capitalize()} {count} item(s), {_megabytes(nbytes)}")
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:39
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('anniversary', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChunkedUpload',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('file_name', models.CharField(max_length=255)),
+                ('size', models.BigIntegerField()),
+                ('checksum', models.CharField(help_text='SHA-256 of the whole file, hex', max_length=64)),
+                ('received', models.BigIntegerField(default=0)),
+                ('validation_type', models.CharField(default='standard', max_length=20)),
+                ('part_path', models.CharField(max_length=500)),
+                ('status', models.CharField(choices=[('receiving', 'Receiving'), ('complete', 'Complete'), ('failed', 'Failed')], default='receiving', max_length=10)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('job', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='anniversary.validationjob')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:02
+
+import anniversary.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('anniversary', '0002_chunkedupload'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='validationjob',
+            name='worker',
+            field=models.CharField(blank=True, default='', help_text='The process whose executor runs the job', max_length=100),
+            preserve_default=False,
+        ),
+        # Rows from before are left blank, as no live process runs them
+        migrations.AlterField(
+            model_name='validationjob',
+            name='worker',
+            field=models.CharField(blank=True, default=anniversary.models.current_worker, help_text='The process whose executor runs the job', max_length=100),
+        ),
+    ]
@@ -0,0 +1,121 @@
+import os
+import socket
+import uuid
+
+from django.db import models
+
+_process_token = uuid.uuid4().hex[:8]
+
+
+def _new_process_token():
+    global _process_token
+    _process_token = uuid.uuid4().hex[:8]
+
+
+# A forked worker is a different process from its parent
+os.register_at_fork(after_in_child=_new_process_token)
+
+
+def current_worker():
+    """host:pid:token naming this process; the token tells it apart from an earlier process with its pid."""
+    return f"{socket.gethostname()}:{os.getpid()}:{_process_token}"
+
+
+class ValidationJob(models.Model):
+    """A timesheet upload queued for validation in the background."""
+
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    file_name = models.CharField(max_length=255)
+    upload_path = models.CharField(max_length=500)
+    validation_type = models.CharField(max_length=20, default='standard')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    stage = models.CharField(max_length=50, blank=True)
+    progress = models.PositiveSmallIntegerField(default=0)
+    zip_path = models.CharField(max_length=500, blank=True)
+    error = models.TextField(blank=True)
+    worker = models.CharField(max_length=100, blank=True, default=current_worker,
+                              help_text='The process whose executor runs the job')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.file_name} ({self.status})"
+
+    def set_stage(self, stage, progress, **fields):
+        """Record progress without overwriting fields changed elsewhere."""
+        self.stage = stage
+        self.progress = progress
+        for name, value in fields.items():
+            setattr(self, name, value)
+        self.save(update_fields=['stage', 'progress', 'updated_at', *fields])
+
+    def as_dict(self):
+        return {
+            'job_id': str(self.id),
+            'file_name': self.file_name,
+            'status': self.status,
+            'stage': self.stage,
+            'progress': self.progress,
+            'error': self.error,
+            'created_at': self.created_at.isoformat(),
+            'updated_at': self.updated_at.isoformat(),
+        }
+
+
+class ChunkedUpload(models.Model):
+    """A large timesheet sent in chunks; the chunks are assembled in one file under MEDIA_ROOT."""
+
+    RECEIVING = 'receiving'
+    COMPLETE = 'complete'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (RECEIVING, 'Receiving'),
+        (COMPLETE, 'Complete'),
+        (FAILED, 'Failed'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    file_name = models.CharField(max_length=255)
+    size = models.BigIntegerField()
+    checksum = models.CharField(max_length=64, help_text='SHA-256 of the whole file, hex')
+    received = models.BigIntegerField(default=0)
+    validation_type = models.CharField(max_length=20, default='standard')
+    part_path = models.CharField(max_length=500)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=RECEIVING)
+    job = models.ForeignKey(ValidationJob, null=True, blank=True, on_delete=models.SET_NULL)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.file_name} ({self.received}/{self.size} bytes, {self.status})"
+
+    def as_dict(self):
+        return {
+            'upload_id': str(self.id),
+            'file_name': self.file_name,
+            'size': self.size,
+            'offset': self.received,
+            'status': self.status,
+            'error': self.error,
+            'job_id': str(self.job_id) if self.job_id else None,
+            'created_at': self.created_at.isoformat(),
+            'updated_at': self.updated_at.isoformat(),
+        }
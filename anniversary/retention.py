@@ -0,0 +1,299 @@
+"""Retention and compaction of the timesheet pipeline's files under MEDIA_ROOT.
+
+Every upload leaves files behind: the uploaded workbook, a folder per job or
+batch, result ZIPs, and with save_validated_data a validation_<timestamp>
+folder per run. apply_retention, run by ``python manage.py apply_retention``
+(daily from cron, say), keeps them in check. ``--dry-run`` only reports.
+
+Policies (in settings, 0 turns one off):
+
+- TIMESHEET_RETENTION_DAYS: uploads, job and batch folders and files in
+  timesheet_outputs older than this are deleted
+- TIMESHEET_RETENTION_MAX_BYTES: after that, the oldest of them are deleted
+  until the rest fit
+- TIMESHEET_COMPACT_AFTER_DAYS: validation_<timestamp> folders older than
+  this are moved into one ZIP per month in timesheet_archives
+
+Identical workbooks among uploads, batches and archived versions are
+hard-linked to one copy, found by size and then SHA-256. Nothing here
+touches summary tracking, the result and sheet caches, chunked uploads or
+the files of jobs that are still queued or running, and nothing modified in
+the last IN_USE_SECONDS is deleted or relinked.
+"""
+import hashlib
+import os
+import re
+import shutil
+import time
+import zipfile
+from collections import defaultdict
+from datetime import datetime
+
+from django.conf import settings
+
+from scripts.zip_stream import STORED_EXTENSIONS
+from .batches import WORKBOOK_EXTENSIONS
+from .jobs import timesheet_dirs
+from .models import ValidationJob
+
+IN_USE_SECONDS = 60 * 60
+HASH_BLOCK_BYTES = 1024 * 1024
+DAY_SECONDS = 24 * 60 * 60
+
+_VALIDATION_FOLDER = re.compile(r'^validation_(\d{8}_\d{6})$')
+
+
+class RetentionReport:
+    """The actions of one retention run, in the order they were taken (or would be, in a dry run)."""
+
+    def __init__(self, dry_run=False):
+        self.dry_run = dry_run
+        self.actions = []
+
+    def add(self, action, path, nbytes, reason):
+        self.actions.append((action, path, nbytes, reason))
+
+    def totals(self):
+        """{action: (count, bytes)} over all actions."""
+        totals = defaultdict(lambda: (0, 0))
+        for action, _, nbytes, _ in self.actions:
+            count, total = totals[action]
+            totals[action] = (count + 1, total + nbytes)
+        return dict(totals)
+
+
+def _disk_bytes(path, seen):
+    """Bytes under path, each hard-linked inode counted once across calls sharing ``seen``."""
+    paths = [path] if os.path.isfile(path) else (
+        os.path.join(root, name) for root, _, files in os.walk(path) for name in files)
+    total = 0
+    for file_path in paths:
+        try:
+            stat = os.stat(file_path)
+        except FileNotFoundError:
+            continue
+        if (stat.st_dev, stat.st_ino) not in seen:
+            seen.add((stat.st_dev, stat.st_ino))
+            total += stat.st_size
+    return total
+
+
+def _last_modified(path):
+    """Latest mtime of path or anything under it."""
+    latest = os.path.getmtime(path)
+    for root, dirs, files in os.walk(path):
+        for name in dirs + files:
+            try:
+                latest = max(latest, os.path.getmtime(os.path.join(root, name)))
+            except FileNotFoundError:
+                pass
+    return latest
+
+
+def _protected_paths():
+    # The upload folders and ZIPs of jobs a worker may still be using
+    protected = set()
+    for upload_path, zip_path in (ValidationJob.objects
+                                  .filter(status__in=[ValidationJob.QUEUED, ValidationJob.RUNNING])
+                                  .values_list('upload_path', 'zip_path')):
+        protected.add(os.path.abspath(os.path.dirname(upload_path)))
+        protected.add(os.path.abspath(upload_path))
+        if zip_path:
+            protected.add(os.path.abspath(zip_path))
+    return protected
+
+
+def expirable_items(dirs):
+    """(path, last modified) of everything the age and size policies may delete.
+
+    Files uploaded straight to the timesheet folder, job folders inside it,
+    batch folders and the files in timesheet_outputs; folders count as one
+    item, as old as their newest file.
+    """
+    items = []
+    for key in ('upload', 'batch', 'output'):
+        with os.scandir(dirs[key]) as entries:
+            for entry in entries:
+                if entry.is_file(follow_symlinks=False):
+                    items.append((entry.path, entry.stat().st_mtime))
+                elif entry.is_dir(follow_symlinks=False) and key != 'output':
+                    items.append((entry.path, _last_modified(entry.path)))
+    return items
+
+
+def _remove(path):
+    if os.path.isdir(path):
+        shutil.rmtree(path)
+    else:
+        os.remove(path)
+
+
+def expire(dirs, report, now, max_age_days, max_bytes):
+    """Delete expirable items past max_age_days, then the oldest until the rest fit in max_bytes."""
+    protected = _protected_paths()
+    items = sorted((mtime, path) for path, mtime in expirable_items(dirs)
+                   if os.path.abspath(path) not in protected and now - mtime >= IN_USE_SECONDS)
+    seen = set()
+    sized = [(mtime, path, _disk_bytes(path, seen)) for mtime, path in items]
+
+    kept = []
+    for mtime, path, nbytes in sized:
+        if max_age_days and now - mtime > max_age_days * DAY_SECONDS:
+            report.add('delete', path, nbytes, f"older than {max_age_days} days")
+            if not report.dry_run:
+                _remove(path)
+        else:
+            kept.append((mtime, path, nbytes))
+
+    if max_bytes:
+        # Recent and protected items are never deleted but still take up room
+        recent = [path for path, mtime in expirable_items(dirs)
+                  if os.path.abspath(path) in protected or now - mtime < IN_USE_SECONDS]
+        total = sum(nbytes for _, _, nbytes in kept) + sum(_disk_bytes(path, seen) for path in recent)
+        for mtime, path, nbytes in kept:
+            if total <= max_bytes:
+                break
+            report.add('delete', path, nbytes, f"over the {max_bytes} byte limit")
+            if not report.dry_run:
+                _remove(path)
+            total -= nbytes
+
+
+def validation_folders(validation_dir):
+    """(path, run time) of the validation_<timestamp> folders, in the base folder and validationN folders."""
+    folders = []
+    parents = [validation_dir] + [entry.path for entry in os.scandir(validation_dir)
+                                  if entry.is_dir() and not _VALIDATION_FOLDER.match(entry.name)]
+    for parent in parents:
+        for entry in os.scandir(parent):
+            match = _VALIDATION_FOLDER.match(entry.name)
+            if not match or not entry.is_dir():
+                continue
+            try:
+                run_time = datetime.strptime(match.group(1), '%Y%m%d_%H%M%S').timestamp()
+            except ValueError:
+                run_time = entry.stat().st_mtime
+            folders.append((entry.path, run_time))
+    return sorted(folders, key=lambda folder: folder[1])
+
+
+def compact(dirs, report, now, after_days):
+    """Move validation folders older than after_days into validations_<YYYY-MM>.zip in the archive folder.
+
+    Members keep their path below timesheet_validations. Workbooks are
+    stored, everything else deflated. Members already in the archive, from a
+    run that stopped before removing the folder, are not added twice.
+    """
+    if not after_days:
+        return
+    by_month = defaultdict(list)
+    for path, run_time in validation_folders(dirs['validation']):
+        if now - run_time > after_days * DAY_SECONDS:
+            by_month[datetime.fromtimestamp(run_time).strftime('%Y-%m')].append(path)
+
+    for month, folders in sorted(by_month.items()):
+        archive_path = os.path.join(dirs['archive'], f"validations_{month}.zip")
+        for folder in folders:
+            report.add('compact', folder, _disk_bytes(folder, set()), f"into {os.path.basename(archive_path)}")
+        if report.dry_run:
+            continue
+
+        with zipfile.ZipFile(archive_path, 'a', zipfile.ZIP_DEFLATED) as archive:
+            existing = set(archive.namelist())
+            for folder in folders:
+                for root, _, files in os.walk(folder):
+                    for name in sorted(files):
+                        path = os.path.join(root, name)
+                        arcname = os.path.relpath(path, dirs['validation']).replace(os.sep, '/')
+                        if arcname in existing:
+                            continue
+                        stored = os.path.splitext(name)[1].lower() in STORED_EXTENSIONS
+                        archive.write(path, arcname, zipfile.ZIP_STORED if stored else zipfile.ZIP_DEFLATED)
+        # Only once the archive is closed, so a failed write keeps the folders
+        for folder in folders:
+            shutil.rmtree(folder)
+
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_BYTES), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _within(path, paths):
+    while True:
+        if path in paths:
+            return True
+        parent = os.path.dirname(path)
+        if parent == path:
+            return False
+        path = parent
+
+
+def _workbooks(dirs, now, deleted):
+    for key in ('upload', 'batch', 'archive'):
+        for root, _, files in os.walk(dirs[key]):
+            for name in files:
+                path = os.path.join(root, name)
+                # In a dry run the deleted items are still there
+                if not name.lower().endswith(WORKBOOK_EXTENSIONS) or _within(path, deleted):
+                    continue
+                stat = os.stat(path)
+                if now - stat.st_mtime >= IN_USE_SECONDS:
+                    yield path, stat
+
+
+def deduplicate(dirs, report, now):
+    """Hard-link identical workbooks to the oldest copy.
+
+    Only files of equal size are hashed. Copies that cannot be linked (on
+    another file system, say) are left as they are.
+    """
+    deleted = {path for action, path, _, _ in report.actions if action == 'delete'}
+    by_size = defaultdict(list)
+    for path, stat in _workbooks(dirs, now, deleted):
+        by_size[stat.st_size].append((stat.st_mtime, path, (stat.st_dev, stat.st_ino)))
+
+    for size, files in by_size.items():
+        if len({inode for _, _, inode in files}) < 2:
+            continue
+        by_hash = defaultdict(list)
+        for mtime, path, inode in sorted(files):
+            by_hash[_sha256(path)].append((path, inode))
+        for copies in by_hash.values():
+            original, original_inode = copies[0]
+            for path, inode in copies[1:]:
+                if inode == original_inode:
+                    continue
+                report.add('dedupe', path, size, f"same content as {os.path.relpath(original, settings.MEDIA_ROOT)}")
+                if report.dry_run:
+                    continue
+                temp_path = f"{path}.{os.getpid()}.link"
+                try:
+                    os.link(original, temp_path)
+                    os.replace(temp_path, path)
+                except OSError as e:
+                    report.actions.pop()
+                    print(f"Could not link {path} to {original}: {str(e)}")
+                    if os.path.exists(temp_path):
+                        os.remove(temp_path)
+
+
+def apply_retention(dry_run=False, max_age_days=None, max_bytes=None, compact_after_days=None, now=None):
+    """Apply the retention policies to MEDIA_ROOT; returns the RetentionReport.
+
+    Arguments left as None come from settings. Old validation folders are
+    compacted first, then expired items deleted, then what is left deduplicated.
+    """
+    dirs = timesheet_dirs()
+    now = time.time() if now is None else now
+    report = RetentionReport(dry_run)
+    compact(dirs, report, now, settings.TIMESHEET_COMPACT_AFTER_DAYS if compact_after_days is None
+            else compact_after_days)
+    expire(dirs, report, now,
+           settings.TIMESHEET_RETENTION_DAYS if max_age_days is None else max_age_days,
+           settings.TIMESHEET_RETENTION_MAX_BYTES if max_bytes is None else max_bytes)
+    deduplicate(dirs, report, now)
+    return report
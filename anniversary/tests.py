@@ -1,7 +1,45 @@
-from django.test import TestCase, Client
+from django.test import TestCase, TransactionTestCase, Client, override_settings
+from django.conf import settings
 from django.urls import reverse
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
 from unittest.mock import patch
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from asgiref.sync import async_to_sync
+from datetime import datetime
+import asyncio
+import contextvars
+import hashlib
+import io
+import json
+import os
+import shutil
+import socket
+import tempfile
+import threading
+import zipfile
+import pandas as pd
+from lxml import etree
+from pptx import Presentation
+from scripts.timesheet_validation import (DateParser, OutputManager, ResultCache, SheetCache, SheetIssues, SummaryStore,
+                                         TimeValidator, format_validated_sheet)
+from scripts.instrumentation import reset_metrics
+from scripts.ppt_generator import TemplateCache, load_wish_table, read_wishes
+from scripts.slide_layout import AREA_BOTTOM, AREA_TOP, WISH_WIDTH, pack_wishes, wrap_lines
+from scripts.text_boxes import TextBoxFactory, TextStyle, next_shape_id
+from scripts.validation_rules import RuleSet, load_rule_sets
+from scripts.zip_stream import ZipStream, open_member
+from .jobs import recover_interrupted_jobs
+from .models import ValidationJob, current_worker
+from .retention import apply_retention
+
+
+def streamed_content(response):
+    """Body of a download; the upload views stream it from an async iterator"""
+    async def read():
+        return b"".join([chunk async for chunk in response.streaming_content])
+    return async_to_sync(read)()
+
 
 class AnniversaryAppTests(TestCase):
     def setUp(self):
@@ -36,18 +74,22 @@ class AnniversaryAppTests(TestCase):
         self.assertIn('years', form.errors)
         self.assertIn('file', form.errors)
 
-    @patch('scripts.ppt_generator.generate_presentation')  
+    @patch('anniversary.views.generate_presentation')
     def test_ppt_form_valid_submission(self, mock_generate):
         """ Valid form returns PPTX file download"""
-        mock_generate.return_value = None 
+        uploaded_names = []
+
+        def generate(excel_path, output_path, **kwargs):
+            uploaded_names.extend(pd.read_excel(excel_path)["Name"])
+            output_path.write(b"deck")
+        mock_generate.side_effect = generate
 
-        
-        sample_excel = (
-            b"Name,Wishes\n"
-            b"John,Happy Work Anniversary!\n"
-            b"Alice,Congratulations on your service!\n"
-        )
-        file = SimpleUploadedFile("sample.xlsx", sample_excel, content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+        buffer = io.BytesIO()
+        pd.DataFrame({
+            "Name": ["John", "Alice"],
+            "Wishes": ["Happy Work Anniversary!", "Congratulations on your service!"],
+        }).to_excel(buffer, index=False)
+        file = SimpleUploadedFile("sample.xlsx", buffer.getvalue(), content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
 
         response = self.client.post(self.ppt_url, {
             'name': 'Guruvaran',
@@ -58,3 +100,1251 @@ class AnniversaryAppTests(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertIn('application/vnd.openxmlformats-officedocument.presentationml.presentation', response['Content-Type'])
         self.assertTrue(response.get('Content-Disposition').startswith('attachment'))
+        self.assertEqual(streamed_content(response), b"deck")
+        kwargs = mock_generate.call_args.kwargs
+        self.assertEqual((kwargs['user_name'], kwargs['years_of_service']), ('Guruvaran', '2'))
+        self.assertEqual(uploaded_names, ["John", "Alice"])
+
+
+class SlideLayoutTests(TestCase):
+    def test_longer_text_wraps_to_more_lines(self):
+        self.assertEqual(wrap_lines("Congratulations!", WISH_WIDTH), 1)
+        self.assertGreater(wrap_lines("Congratulations on another great year! " * 8, WISH_WIDTH), 3)
+        self.assertEqual(wrap_lines("first\nsecond", WISH_WIDTH), 2)
+
+    def test_pack_keeps_order_and_fits_slides(self):
+        """Short wishes share slides, long ones take more room, and every block stays in the area"""
+        wishes = [("Happy anniversary!", "Ravi")] * 5 + [("Thank you for all you do. " * 20, "Meena")] + \
+                 [("Congratulations!", "John")] * 3
+
+        slides = pack_wishes(wishes)
+
+        self.assertEqual([(p.wish, p.signer) for slide in slides for p in slide], wishes)
+        self.assertLess(len(slides), 5)
+        for slide in slides:
+            self.assertEqual(slide[0].wish_top, AREA_TOP)
+            if len(slide) > 1:
+                self.assertLessEqual(slide[-1].signer_top + slide[-1].signer_height, AREA_BOTTOM)
+            for first, second in zip(slide, slide[1:]):
+                self.assertGreater(second.wish_top, first.signer_top + first.signer_height)
+        self.assertEqual(pack_wishes(wishes), slides)
+
+
+class TextBoxFactoryTests(TestCase):
+    def test_cloned_boxes_match_styled_textbox(self):
+        """A cloned box carries the same style as one styled through python-pptx, with its own id and text"""
+        from pptx.dml.color import RGBColor
+        from pptx.enum.text import PP_ALIGN
+        from pptx.util import Inches, Pt
+
+        prs = Presentation()
+        slide = prs.slides.add_slide(prs.slide_layouts[6])
+        factory = TextBoxFactory(TextStyle("Times New Roman", 18, bold=True, italic=True,
+                                           color=RGBColor(255, 0, 0), alignment=PP_ALIGN.RIGHT))
+        first_id = next_shape_id(slide.shapes)
+        factory.add(slide.shapes, first_id, "- Ravi", Inches(3), Inches(2), Inches(5), Inches(0.5))
+        factory.add(slide.shapes, first_id + 1, "two\nlines", Inches(3), Inches(3), Inches(5), Inches(0.8))
+
+        expected = slide.shapes.add_textbox(Inches(3), Inches(2), Inches(5), Inches(0.5))
+        expected.text_frame.word_wrap = True
+        p = expected.text_frame.paragraphs[0]
+        p.font.name = "Times New Roman"
+        p.font.color.rgb = RGBColor(255, 0, 0)
+        p.text = "- Ravi"
+        p.font.size = Pt(18)
+        p.font.bold = True
+        p.font.italic = True
+        p.alignment = PP_ALIGN.RIGHT
+
+        first, second, styled = slide.shapes
+        self.assertEqual([first.shape_id, second.shape_id, styled.shape_id], [first_id, first_id + 1, first_id + 2])
+        self.assertEqual(first.text_frame.text, "- Ravi")
+        self.assertEqual(second.text_frame.text, "two\vlines")
+        self.assertEqual(first.top, Inches(2))
+        self.assertEqual(second.top, Inches(3))
+        first._element.nvSpPr.cNvPr.id = styled.shape_id
+        first._element.nvSpPr.cNvPr.name = styled.name
+        self.assertEqual(etree.tostring(first._element), etree.tostring(styled._element))
+
+
+class PresentationResponseTests(TestCase):
+    def test_deck_is_built_in_memory_for_each_request(self):
+        """The upload and the deck never go through shared files under MEDIA_ROOT"""
+        buffer = io.BytesIO()
+        pd.DataFrame({"Wishes": ["Congratulations!"], "Name": ["Ravi"]}).to_excel(buffer, index=False)
+        shared_files = [os.path.join(settings.MEDIA_ROOT, name)
+                        for name in ("uploaded.xlsx", "Final_Anniversary_Presentation.pptx")]
+        before = [os.stat(path).st_mtime_ns for path in shared_files]
+
+        response = self.client.post(reverse('ppt_automation'), {
+            'name': 'Asha',
+            'years': '2',
+            'file': SimpleUploadedFile("wishes.xlsx", buffer.getvalue()),
+        })
+
+        self.assertEqual(response.status_code, 200)
+        deck = Presentation(io.BytesIO(streamed_content(response)))
+        self.assertEqual(len(deck.slides), 3)
+        self.assertEqual([os.stat(path).st_mtime_ns for path in shared_files], before)
+
+    async def test_deck_streams_through_asgi_handler(self):
+        """Under ASGI the deck is built off the event loop and its stages still reach Server-Timing"""
+        buffer = io.BytesIO()
+        pd.DataFrame({"Wishes": ["Congratulations!"], "Name": ["Ravi"]}).to_excel(buffer, index=False)
+
+        response = await self.async_client.post(reverse('ppt_automation'), {
+            'name': 'Asha',
+            'years': '2',
+            'file': SimpleUploadedFile("wishes.xlsx", buffer.getvalue()),
+        })
+
+        self.assertEqual(response.status_code, 200)
+        content = b"".join([chunk async for chunk in response.streaming_content])
+        self.assertEqual(int(response['Content-Length']), len(content))
+        self.assertEqual(len(Presentation(io.BytesIO(content)).slides), 3)
+        self.assertIn('generate_presentation;', response['Server-Timing'])
+
+    def test_csv_export_is_accepted(self):
+        """A form export saved as CSV builds the same deck, ignoring its other columns"""
+        csv = "Timestamp,Name ,Wishes\n2025-03-01,Ravi,Congratulations!\n2025-03-01,,Unsigned\n"
+
+        response = self.client.post(reverse('ppt_automation'), {
+            'name': 'Asha',
+            'years': '2',
+            'file': SimpleUploadedFile("responses.csv", csv.encode()),
+        })
+
+        self.assertEqual(response.status_code, 200)
+        deck = Presentation(io.BytesIO(streamed_content(response)))
+        texts = [shape.text_frame.text for slide in deck.slides for shape in slide.shapes if shape.has_text_frame]
+        self.assertIn("Congratulations!", texts)
+        self.assertNotIn("Unsigned", texts)
+
+
+class WishLoadingTests(TestCase):
+    def test_only_wish_columns_are_read_as_strings(self):
+        buffer = io.BytesIO()
+        pd.DataFrame({"Email": ["a@example.com"], " Wishes": [2025], "Name ": ["Ravi"]}).to_excel(buffer, index=False)
+        buffer.seek(0)
+
+        df = load_wish_table(buffer)
+
+        self.assertEqual(sorted(df.columns), ["Name", "Wishes"])
+        self.assertEqual(read_wishes(df), [("2025", "Ravi")])
+
+    def test_blanks_are_dropped_and_whitespace_normalized(self):
+        df = pd.DataFrame({
+            "Wishes": ["  Happy \t anniversary! ", None, "   ", "nan", "Line one \r\n line two", "Happy anniversary!"],
+            "Name": ["Ravi", "Meena", "John", "Li", " Priya  S ", "Ravi"],
+        })
+
+        self.assertEqual(read_wishes(df), [("Happy anniversary!", "Ravi"), ("Line one\nline two", "Priya S"),
+                                           ("Happy anniversary!", "Ravi")])
+        self.assertEqual(read_wishes(df, dedupe=True),
+                         [("Happy anniversary!", "Ravi"), ("Line one\nline two", "Priya S")])
+
+
+class PresentationBatchTests(TestCase):
+    def _batch_upload(self, **columns):
+        buffer = io.BytesIO()
+        pd.DataFrame({
+            "Employee": ["Asha", "Ben", "Asha"],
+            "Years": [1, 3, 1],
+            "Wishes": ["Congratulations!", "Happy anniversary!", "Keep shining!"],
+            "Name": ["Ravi", "Meena", "John"],
+            **columns,
+        }).to_excel(buffer, index=False)
+        return SimpleUploadedFile("batch.xlsx", buffer.getvalue())
+
+    def test_batch_returns_one_deck_per_honoree(self):
+        """Wishes are grouped per employee and every deck lands in one ZIP"""
+        response = self.client.post(reverse('ppt_batch_automation'), {'batch_file': self._batch_upload()})
+
+        self.assertEqual(response.status_code, 200)
+        archive = zipfile.ZipFile(io.BytesIO(streamed_content(response)))
+        self.assertEqual(archive.namelist(), ["Asha_Anniversary_Slides.pptx", "Ben_Anniversary_Slides.pptx"])
+        asha = Presentation(io.BytesIO(archive.read("Asha_Anniversary_Slides.pptx")))
+        texts = [shape.text_frame.text for slide in asha.slides for shape in slide.shapes if shape.has_text_frame]
+        self.assertIn("Asha", "".join(texts))
+        self.assertIn("Keep shining!", "".join(texts))
+        self.assertNotIn("Happy anniversary!", "".join(texts))
+
+    def test_batch_rejects_invalid_years(self):
+        response = self.client.post(reverse('ppt_batch_automation'),
+                                    {'batch_file': self._batch_upload(Years=[1, 7, 1])})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Years must be 1-4 for: Ben")
+
+
+class TemplateCacheTests(TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.template_path = os.path.join(tmp.name, "template.pptx")
+        shutil.copyfile(os.path.join(settings.MEDIA_ROOT, "WorkAnniversaryLogo.pptx"), self.template_path)
+        self.cache = TemplateCache()
+
+    def test_template_is_trimmed_to_year_slide(self):
+        """Each copy holds only the chosen year's slide, and copies are independent"""
+        full = Presentation(self.template_path)
+        year_slide_xml = full.slides[2].shapes._spTree.xml
+
+        first = self.cache.get(self.template_path, 3)
+        first.slides.add_slide(first.slide_layouts[-1])
+        second = self.cache.get(self.template_path, 3)
+
+        self.assertEqual(len(first.slides), 2)
+        self.assertEqual(len(second.slides), 1)
+        self.assertEqual(second.slides[0].shapes._spTree.xml, year_slide_xml)
+
+    def test_template_reloaded_when_file_changes(self):
+        with patch("scripts.ppt_generator.Presentation", wraps=Presentation) as opened:
+            self.cache.get(self.template_path, 1)
+            self.cache.get(self.template_path, 2)
+            loads = opened.call_count
+            os.utime(self.template_path, ns=(0, 0))
+            self.cache.get(self.template_path, 1)
+
+        # One parse per year when loading, then one per get()
+        self.assertEqual(loads, 4 + 2)
+        self.assertEqual(opened.call_count, loads + 4 + 1)
+
+
+class TimeValidatorTests(TestCase):
+    def setUp(self):
+        self.validator = TimeValidator()
+
+    def test_validate_rules(self):
+        """Each business rule produces the expected Status and Flag"""
+        df = pd.DataFrame({
+            "Client": ["Client - ABC", "Client - ABC", "Leave", "Client - ABC", "Client - ABC", "Holiday", "Client - ABC"],
+            "Description": ["Dev", "", "Off", "Dev", "Dev", "Off", None],
+            "Date": pd.to_datetime(["2025-03-03", "2025-03-04", "2025-03-05", "2025-03-06", "2025-03-07", "2025-03-08", "2025-03-09"]),
+            "Duration (in hrs) - \nTotal : 0": [8.0, 4.0, 8.0, 6.5, None, 0.0, 8.0],
+        })
+
+        result = self.validator.validate(df)
+
+        self.assertEqual(list(result["Status"]), [
+            "valid", "half_day", "leave_error", "non_standard", "missing_hours", "valid", "valid",
+        ])
+        self.assertEqual(list(result["Flag"]), [0, 6, 0, 0, 0, 0, 5])
+
+        exported = format_validated_sheet(result)
+        self.assertEqual(list(exported["Status"]), [
+            "Valid",
+            "Half-day detected",
+            "Leave/Holiday should be 0 or empty",
+            "Full working day should be 8 hrs, found 6.5 hrs",
+            "Missing hours for a working day",
+            "Valid",
+            "Valid",
+        ])
+        self.assertEqual(list(exported["Flag"]), [
+            "",
+            "⚠ Half-Day Alert⚠ Blank Description; ",
+            "",
+            "",
+            "",
+            "",
+            "⚠ Weekend filled; ⚠ Blank Description; ",
+        ])
+
+    def test_validate_invalid_hours_and_dates(self):
+        """Text hours are an invalid format and unparseable dates are blanked"""
+        df = pd.DataFrame({
+            "Client": ["Client - ABC", "Client - ABC"],
+            "Description": ["Dev", "Dev"],
+            "Date": ["2025-03-03", "not a date"],
+            "Hours": ["8h", 8],
+        })
+
+        result = self.validator.validate(df)
+
+        self.assertEqual(list(result["Status"]), ["invalid_format", "valid"])
+        self.assertTrue(pd.isna(result["Hours"].iloc[0]))
+        self.assertEqual(result["Hours"].iloc[1], 8)
+        self.assertEqual(result["Date"].iloc[0], pd.Timestamp("2025-03-03"))
+        self.assertTrue(pd.isna(result["Date"].iloc[1]))
+
+    def test_validated_sheet_is_compact(self):
+        """Validated columns are typed, the messages only appear on export"""
+        df = pd.DataFrame({
+            "Client": ["Client - ABC", "Client - ABC", "Leave"],
+            "Description": ["Dev", "Dev", "Off"],
+            "Date": ["2025-03-03", "2025-03-08", "2025-03-04"],
+            "Hours": [6, 8, 0],
+        })
+
+        result, issues = self.validator.validate_with_issues(df)
+
+        self.assertIsInstance(result["Status"].dtype, pd.CategoricalDtype)
+        self.assertEqual(str(result["Flag"].dtype), "uint8")
+        self.assertEqual(str(result["Hours"].dtype), "Float64")
+        self.assertTrue(pd.api.types.is_datetime64_any_dtype(result["Date"]))
+        self.assertEqual(SheetIssues.from_frame(result), issues)
+
+        exported = format_validated_sheet(result)
+        self.assertEqual(list(exported["Status"]),
+                         ["Full working day should be 8 hrs, found 6 hrs", "Valid", "Valid"])
+        self.assertEqual(list(exported["Flag"]), ["", "⚠ Weekend filled; ", ""])
+        # Summaries pass through untouched
+        summary = self.validator.create_summary({"Zoe": result})
+        self.assertIs(format_validated_sheet(summary), summary)
+        self.assertEqual(summary["Hours"].iloc[0], 14)
+
+
+    def test_date_parser_mixed_formats(self):
+        """Dates outside the detected column format still parse, junk becomes NaT"""
+        dates = pd.Series(["2025-03-01", "2025-03-02", "March 3, 2025", "TBD", None], dtype=object)
+
+        parsed = DateParser().parse(dates)
+
+        self.assertEqual(list(parsed.dt.strftime("%Y-%m-%d")[:3]), ["2025-03-01", "2025-03-02", "2025-03-03"])
+        self.assertTrue(parsed[3:].isna().all())
+
+    def test_parallel_run_matches_serial(self):
+        """Process-pool run returns the same sheets, in order, and summary as a serial run"""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "team.xlsx")
+            with pd.ExcelWriter(path) as writer:
+                for name, hours in [("Zoe", 8), ("Adam", 4), ("Mia", 6)]:
+                    pd.DataFrame({
+                        "Client": ["Client - ABC", "Leave"],
+                        "Description": ["Dev", ""],
+                        "Date": pd.to_datetime(["2025-03-03", "2025-03-04"]),
+                        "Hours": [hours, 0],
+                    }).to_excel(writer, sheet_name=name, index=False)
+
+            serial = TimeValidator().run(path)
+            parallel = TimeValidator(workers=2).run(path)
+
+        self.assertEqual(list(parallel["validated_sheets"]), ["Zoe", "Adam", "Mia"])
+        for name, df in serial["validated_sheets"].items():
+            pd.testing.assert_frame_equal(df, parallel["validated_sheets"][name])
+        pd.testing.assert_frame_equal(serial["summary"], parallel["summary"])
+
+    def test_batch_run_in_pool_matches_serial(self):
+        """A batch validated in worker processes matches one validated file by file"""
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = []
+            for name, hours in [("zoe.xlsx", 8), ("adam.xlsx", 6), ("broken.xlsx", None)]:
+                path = os.path.join(tmp, name)
+                if hours is None:
+                    with open(path, "wb") as f:
+                        f.write(b"not a workbook")
+                else:
+                    pd.DataFrame({"Client": ["Client - ABC"], "Description": ["Dev"],
+                                  "Date": pd.to_datetime(["2025-03-03"]), "Hours": [hours]}).to_excel(path, index=False)
+                paths.append(path)
+
+            serial = TimeValidator().run_batch(paths)
+            pooled = TimeValidator().run_batch(paths, workers=2)
+
+        self.assertEqual([result["success"] for result in pooled], [True, True, False])
+        self.assertEqual([result["file_path"] for result in pooled], paths)
+        for expected, result in zip(serial[:2], pooled[:2]):
+            pd.testing.assert_frame_equal(expected["validated_sheets"]["Sheet1"], result["validated_sheets"]["Sheet1"])
+            pd.testing.assert_frame_equal(expected["summary"], result["summary"])
+
+    def test_streaming_run_matches_eager(self):
+        """Chunked read-only reading gives the same result as loading sheets whole"""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "team.xlsx")
+            with pd.ExcelWriter(path) as writer:
+                pd.DataFrame({
+                    "Client": ["Client - ABC", "Leave", "Client - ABC", "Client - ABC", "Client - ABC"],
+                    "Description": ["Dev", "", "Dev", "Dev", "Dev"],
+                    "Date": ["2025-03-03", "2025-03-04", "03/08/2025", "TBD", "2025-03-07"],
+                    "Hours": [8, "0", 8, 6, "8h"],
+                }).to_excel(writer, sheet_name="Zoe", index=False)
+
+            eager, eager_issues = TimeValidator().validate_sheets(path)
+            streamed, streamed_issues = TimeValidator(chunk_size=2).validate_sheets(path)
+
+        pd.testing.assert_frame_equal(eager["Zoe"], streamed["Zoe"])
+        self.assertEqual(eager_issues, streamed_issues)
+
+    def test_streaming_zip_matches_eager_zip(self):
+        """Validating chunk by chunk into the ZIP gives the eager archive without joining chunks"""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "team.xlsx")
+            with pd.ExcelWriter(path) as writer:
+                for name, hours in [("Zoe", [8, "0", 8, 6, "8h"]), ("Adam", [4, 8, 8, 0, 8])]:
+                    pd.DataFrame({
+                        "Client": ["Client - ABC", "Leave", "Client - ABC", "Client - ABC", "Client - ABC"],
+                        "Description": ["Dev", "", "Dev", "Dev", "Dev"],
+                        "Date": ["2025-03-03", "2025-03-04", "03/08/2025", "TBD", "2025-03-07"],
+                        "Hours": hours,
+                    }).to_excel(writer, sheet_name=name, index=False)
+            manager = OutputManager(*(os.path.join(tmp, name) for name in ("output", "archive", "validation")))
+
+            eager_zip = manager.write_validation_zip(TimeValidator().run(path), zip_path=os.path.join(tmp, "eager.zip"))
+            with patch.object(TimeValidator, 'concat_validated_chunks') as concat:
+                result, streamed_zip = manager.write_validation_zip_streaming(
+                    TimeValidator(chunk_size=2), path, zip_path=os.path.join(tmp, "streamed.zip"))
+            concat.assert_not_called()
+
+            self.assertNotIn("validated_sheets", result)
+            self.assertEqual(result["sheet_hours"], {"Zoe": 22, "Adam": 28})
+            for member, sheets in [("team_validated.xlsx", ["Zoe", "Adam"]), ("Validation_Summary.xlsx", ["Sheet1"])]:
+                for sheet in sheets:
+                    pd.testing.assert_frame_equal(
+                        pd.read_excel(io.BytesIO(zipfile.ZipFile(eager_zip).read(member)), sheet_name=sheet),
+                        pd.read_excel(io.BytesIO(zipfile.ZipFile(streamed_zip).read(member)), sheet_name=sheet))
+            # Summary tracking gets the same rows from the running totals
+            rows = manager.summary_store.rows("validation_summary.xlsx")
+            self.assertEqual(len(rows), 4)
+            pd.testing.assert_frame_equal(rows.iloc[:2, 1:5].reset_index(drop=True),
+                                          rows.iloc[2:, 1:5].reset_index(drop=True))
+
+    def test_streamed_zip_is_tracked_once_complete(self):
+        """A streamed ZIP is recorded in summary tracking only when the whole archive was written"""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "team.xlsx")
+            pd.DataFrame({
+                "Client": ["Client - ABC"] * 3,
+                "Description": ["Dev"] * 3,
+                "Date": ["2025-03-03", "2025-03-04", "2025-03-05"],
+                "Hours": [8, 8, 8],
+            }).to_excel(path, sheet_name="Zoe", index=False)
+            manager = OutputManager(*(os.path.join(tmp, name) for name in ("output", "archive", "validation")))
+            result = TimeValidator().run(path)
+            tracked = lambda: len(manager.summary_store.rows("validation_summary.xlsx"))
+
+            # The writer holds after its first member until the reader has gone
+            release = threading.Event()
+
+            def write_members(validation_result, zipf):
+                with open_member(zipf, "first.txt") as member:
+                    member.write(b"first")
+                release.wait(5)
+                with open_member(zipf, "second.txt") as member:
+                    member.write(b"second")
+
+            with patch.object(OutputManager, '_write_validation_members', side_effect=write_members):
+                stream = manager.stream_validation_zip(result)
+                self.assertTrue(stream.read_chunk())
+                stream.close()
+                release.set()
+                stream._future.result(timeout=5)
+            with patch.object(OutputManager, '_write_validation_members', side_effect=ValueError("disk full")):
+                with self.assertRaises(ValueError):
+                    b"".join(manager.stream_validation_zip(result))
+            self.assertEqual(tracked(), 0)
+
+            completed = []
+            zipfile.ZipFile(io.BytesIO(b"".join(manager.stream_validation_zip(result, on_complete=completed.append))))
+            self.assertEqual(tracked(), 1)
+            self.assertEqual(completed, [None])
+
+    def test_streaming_off_without_text_parser(self):
+        """Without pandas' TextParser sheets are loaded whole instead of streamed"""
+        with patch('scripts.timesheet_validation.STREAMING_AVAILABLE', False):
+            self.assertIsNone(TimeValidator(chunk_size=2).chunk_size)
+
+    def test_incremental_run_revalidates_changed_sheets_only(self):
+        """Unchanged sheets are reused from the sheet cache and the result matches a full run"""
+        def write(path, zoe_hours):
+            with pd.ExcelWriter(path) as writer:
+                for name, hours in [("Zoe", zoe_hours), ("Adam", 4), ("Mia", 6)]:
+                    pd.DataFrame({
+                        "Client": ["Client - ABC", "Leave"],
+                        "Description": [f"Dev {name}", ""],
+                        "Date": pd.to_datetime(["2025-03-03", "2025-03-04"]),
+                        "Hours": [hours, 0],
+                    }).to_excel(writer, sheet_name=name, index=False)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "team.xlsx")
+            validator = TimeValidator(sheet_cache=SheetCache(os.path.join(tmp, "sheets")))
+            write(path, 8)
+            validator.run(path)
+
+            write(path, 7)
+            with patch.object(validator, "validate_with_issues", wraps=validator.validate_with_issues) as validate:
+                incremental = validator.run(path)
+            full = TimeValidator().run(path)
+
+        self.assertEqual(validate.call_count, 1)
+        self.assertEqual(list(incremental["validated_sheets"]), ["Zoe", "Adam", "Mia"])
+        for name, df in full["validated_sheets"].items():
+            pd.testing.assert_frame_equal(df, incremental["validated_sheets"][name])
+        pd.testing.assert_frame_equal(full["summary"], incremental["summary"])
+
+    def test_issue_counts_match_status_and_flag(self):
+        """Issue counts from validation agree with a scan of the Status/Flag columns"""
+        df = pd.DataFrame({
+            "Client": ["Client - ABC", "Client - ABC", "Leave", "Client - ABC", "Client - ABC"],
+            "Description": ["Dev", "", "Off", "Dev", None],
+            "Date": pd.to_datetime(["2025-03-01", "2025-03-02", "2025-03-05", "2025-03-06", "2025-03-09"]),
+            "Hours": [8, 4, 8, 6.5, 8],
+        })
+
+        result, issues = self.validator.validate_with_issues(df)
+
+        self.assertEqual(issues, SheetIssues.from_frame(result))
+        self.assertEqual(issues.counts["weekend_filled"], 2)
+        self.assertEqual(issues.counts["blank_description"], 2)
+        self.assertEqual(issues.review(include_flags=False),
+                         "Contains half-days, Has non-standard hours, Incorrectly logged leave/holiday")
+        # A cached summary keeps only the Review message, which gives back the same reviews
+        rebuilt = SheetIssues.from_review(issues.review())
+        self.assertEqual(rebuilt.review(), issues.review())
+        self.assertEqual(rebuilt.review(include_flags=False), issues.review(include_flags=False))
+        self.assertEqual(SheetIssues.from_review("OK"), SheetIssues())
+
+    def test_custom_rule_set(self):
+        """A rule set changes the standard day, half day, leave keywords and weekend"""
+        rules = RuleSet.from_dict("nine", {
+            "full_day_hours": 9,
+            "half_day_hours": 4.5,
+            "leave_keywords": ["PTO", "time-off (paid)"],
+            "weekend_days": [4, 5, 6],
+        })
+        df = pd.DataFrame({
+            "Client": ["Client - ABC", "Client - ABC", "Client - ABC", "pto", "Time-Off (paid)", "Leave"],
+            "Description": ["Dev"] * 6,
+            "Date": pd.to_datetime(["2025-03-03", "2025-03-04", "2025-03-07", "2025-03-05", "2025-03-05", "2025-03-05"]),
+            "Hours": [9, 4.5, 8, 0, 0, 0],
+        })
+
+        result, issues = TimeValidator(rules=rules).validate_with_issues(df)
+
+        self.assertEqual(list(result["Status"]),
+                         ["valid", "half_day", "non_standard", "valid", "valid", "non_standard"])
+        self.assertEqual(issues.counts["weekend_filled"], 1)
+        exported = format_validated_sheet(result, rules)
+        self.assertEqual(exported["Status"].iloc[2], "Full working day should be 9 hrs, found 8 hrs")
+
+    def test_rule_set_definitions(self):
+        """Rule sets load from JSON, reject bad fields and fingerprint their content"""
+        with self.assertRaises(ValueError):
+            RuleSet.from_dict("bad", {"full_day": 9})
+        with self.assertRaises(ValueError):
+            RuleSet.from_dict("bad", {"leave_keywords": "leave"})
+        with self.assertRaises(ValueError):
+            RuleSet.from_dict("bad", {"weekend_days": [7]})
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "rules.json")
+            with open(path, "w") as f:
+                json.dump({"custom": {"full_day_hours": 7.5}}, f)
+            rule_sets = load_rule_sets(path)
+
+        self.assertEqual(sorted(rule_sets), ["custom", "standard"])
+        self.assertEqual(rule_sets["custom"].full_day_hours, 7.5)
+        self.assertEqual(rule_sets["custom"].leave_keywords, RuleSet().leave_keywords)
+        self.assertNotEqual(rule_sets["custom"].fingerprint(), rule_sets["standard"].fingerprint())
+        self.assertEqual(RuleSet.from_dict("standard", {}).fingerprint(), rule_sets["standard"].fingerprint())
+
+    def test_rule_sets_are_loaded_once(self):
+        """The same definition gives the same compiled rule sets; an edited file is read again"""
+        definition = {"custom": {"full_day_hours": 9}}
+        self.assertIs(load_rule_sets(definition)["custom"], load_rule_sets(dict(definition))["custom"])
+        # The shipped custom rule set is not the standard one under another name
+        self.assertNotEqual(RuleSet.from_dict("standard", settings.TIMESHEET_RULE_SETS["custom"]), RuleSet())
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "rules.json")
+            with open(path, "w") as f:
+                json.dump(definition, f)
+            first = load_rule_sets(path)
+            with patch("builtins.open", side_effect=AssertionError("read again")):
+                self.assertIs(load_rule_sets(path)["custom"], first["custom"])
+
+            with open(path, "w") as f:
+                json.dump({"custom": {"full_day_hours": 7.5}}, f)
+            os.utime(path, (0, 0))
+            self.assertEqual(load_rule_sets(path)["custom"].full_day_hours, 7.5)
+
+
+class SummaryStoreTests(TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.store = SummaryStore(os.path.join(tmp.name, "store.sqlite3"))
+        self.excel_path = os.path.join(tmp.name, "summary.xlsx")
+
+    def _entry(self, sheet):
+        return {"File Name": "team.xlsx", "Sheet Name": sheet, "Hours": 8, "Review": "OK",
+                "Validation Date": "2025-03-31 10:00:00"}
+
+    def test_append_continues_serial_numbers(self):
+        """S.No keeps counting across appends, including rows imported from an existing workbook"""
+        pd.DataFrame([{"S.No": 7, **self._entry("Old")}]).to_excel(self.excel_path, index=False)
+
+        self.store.append("summary.xlsx", [self._entry("Zoe")], legacy_excel_path=self.excel_path)
+        self.store.append("summary.xlsx", [self._entry("Adam"), self._entry("Mia")], legacy_excel_path=self.excel_path)
+
+        rows = self.store.rows("summary.xlsx")
+        self.assertEqual(list(rows["S.No"]), [7, 8, 9, 10])
+        self.assertEqual(list(rows["Sheet Name"]), ["Old", "Zoe", "Adam", "Mia"])
+
+    def test_export_is_cached_until_new_rows(self):
+        """The Excel export is only rewritten after rows are appended"""
+        self.store.append("summary.xlsx", [self._entry("Zoe")])
+        self.store.export_excel("summary.xlsx", self.excel_path)
+        first_mtime = os.stat(self.excel_path).st_mtime_ns
+
+        self.store.export_excel("summary.xlsx", self.excel_path)
+        self.assertEqual(os.stat(self.excel_path).st_mtime_ns, first_mtime)
+
+        self.store.append("summary.xlsx", [self._entry("Adam")])
+        self.store.export_excel("summary.xlsx", self.excel_path)
+        self.assertEqual(len(pd.read_excel(self.excel_path)), 2)
+
+
+class ResultCacheTests(TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.tmp = tmp.name
+
+    def _zip(self, name, size):
+        path = os.path.join(self.tmp, name)
+        with open(path, "wb") as f:
+            f.write(b"x" * size)
+        return path
+
+    def test_key_depends_on_content_and_parts(self):
+        """Same bytes and parts give the same key, anything else changes it"""
+        first, second = self._zip("a.xlsx", 10), self._zip("b.xlsx", 10)
+        self.assertEqual(ResultCache.make_key(first, "standard"), ResultCache.make_key(second, "standard"))
+        self.assertNotEqual(ResultCache.make_key(first, "standard"), ResultCache.make_key(first, "custom"))
+        self.assertNotEqual(ResultCache.make_key(first, "standard"),
+                            ResultCache.make_key(self._zip("c.xlsx", 11), "standard"))
+
+    def test_lru_eviction_and_stats(self):
+        """The least recently used entry is evicted once the size budget is exceeded"""
+        cache = ResultCache(os.path.join(self.tmp, "cache"), max_bytes=250)
+        summary = pd.DataFrame({"Sheet": ["Zoe"], "Total Hours": [8.0]})
+        cache.put("a", self._zip("a.zip", 100), summary)
+        cache.put("b", self._zip("b.zip", 100))
+        self.assertEqual(cache.get("a")["zip_name"], "a.zip")  # a is now more recent than b
+
+        cache.put("c", self._zip("c.zip", 100))
+
+        self.assertIsNone(cache.get("b"))
+        cached = cache.get("a")
+        pd.testing.assert_frame_equal(cached["summary"], summary)
+        self.assertTrue(os.path.exists(cached["zip_path"]))
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["evictions"]), (2, 1, 1))
+        self.assertEqual((stats["entries"], stats["bytes"]), (2, 200))
+
+
+class ZipStreamTests(TestCase):
+    def _write_members(self, zipf):
+        with open_member(zipf, "report.xlsx") as member:
+            member.write(os.urandom(300_000))
+        with open_member(zipf, "notes.txt") as member:
+            member.write(b"timesheet " * 50_000)
+
+    def test_chunks_form_a_valid_zip(self):
+        """Read chunk by chunk, the archive is valid; xlsx members are stored and text deflated"""
+        with tempfile.TemporaryDirectory() as tmp:
+            tee_path = os.path.join(tmp, "copy.zip")
+            completed = []
+            stream = ZipStream(self._write_members, compresslevel=1, chunk_bytes=64 * 1024,
+                               tee_path=tee_path, on_complete=completed.append)
+            data = b"".join(stream)
+
+            archive = zipfile.ZipFile(io.BytesIO(data))
+            self.assertIsNone(archive.testzip())
+            self.assertEqual(archive.getinfo("report.xlsx").compress_type, zipfile.ZIP_STORED)
+            self.assertEqual(archive.getinfo("notes.txt").compress_type, zipfile.ZIP_DEFLATED)
+            self.assertEqual(completed, [tee_path])
+            with open(tee_path, "rb") as f:
+                self.assertEqual(f.read(), data)
+
+    def test_close_stops_writer_and_drops_tee(self):
+        """Closing after the first chunk stops the writer thread and removes the partial copy"""
+        with tempfile.TemporaryDirectory() as tmp:
+            tee_path = os.path.join(tmp, "copy.zip")
+            completed = []
+            stream = ZipStream(self._write_members, chunk_bytes=16 * 1024, max_chunks=1,
+                               tee_path=tee_path, on_complete=completed.append)
+            self.assertTrue(stream.read_chunk())
+            stream.close()
+            stream._future.result(timeout=5)
+
+            self.assertTrue(stream._future.done())
+            self.assertEqual(completed, [])
+            self.assertFalse(os.path.exists(tee_path))
+
+    def test_writer_runs_in_executor_with_reader_context(self):
+        """Given an executor the writer runs there, in a copy of the reader's context"""
+        request_id = contextvars.ContextVar("request_id")
+        seen = []
+
+        def write_members(zipf):
+            seen.append((threading.current_thread().name, request_id.get()))
+            self._write_members(zipf)
+
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="pipeline") as executor:
+            request_id.set("req-1")
+            data = b"".join(ZipStream(write_members, executor=executor))
+
+        self.assertIsNone(zipfile.ZipFile(io.BytesIO(data)).testzip())
+        self.assertEqual(seen, [("pipeline_0", "req-1")])
+
+    def test_writer_error_is_raised_to_reader(self):
+        def fail(zipf):
+            raise ValueError("broken workbook")
+
+        with self.assertRaisesRegex(ValueError, "broken workbook"), \
+                self.assertLogs('scripts.zip_stream', level='ERROR') as logs:
+            b"".join(ZipStream(fail))
+        self.assertIn("Error writing ZIP stream", logs.output[0])
+        self.assertIn("Traceback", logs.output[0])
+
+
+# Jobs run in other threads, which must see the rows the test client's requests commit
+class TimesheetJobTests(TransactionTestCase):
+    def setUp(self):
+        self.media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media_root.cleanup)
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root.name, TIMESHEET_JOB_WORKERS=0)
+        self.settings_override.enable()
+        self.addCleanup(self.settings_override.disable)
+
+    def _workbook_upload(self):
+        # Built once per test: xlsx files embed their creation time, so a rebuilt
+        # workbook can differ byte-wise and miss the result cache
+        if not hasattr(self, '_upload_bytes'):
+            buffer = io.BytesIO()
+            pd.DataFrame({
+                "Client": ["Client - ABC", "Leave"],
+                "Description": ["Dev", "Off"],
+                "Date": pd.to_datetime(["2025-03-03", "2025-03-04"]),
+                "Hours": [8, 0],
+            }).to_excel(buffer, sheet_name="Zoe", index=False)
+            self._upload_bytes = buffer.getvalue()
+        return SimpleUploadedFile("team.xlsx", self._upload_bytes)
+
+    def test_job_submit_status_and_download(self):
+        """A submitted job reports completion and serves its ZIP"""
+        response = self.client.post(reverse('submit_timesheet_job'), {'timesheet_file': self._workbook_upload()})
+        self.assertEqual(response.status_code, 202)
+        job = response.json()
+
+        status = self.client.get(job['status_url']).json()
+        self.assertEqual(status['status'], 'done')
+        self.assertEqual(status['progress'], 100)
+
+        download = self.client.get(job['download_url'])
+        self.assertEqual(download.status_code, 200)
+        archive = zipfile.ZipFile(io.BytesIO(streamed_content(download)))
+        self.assertEqual(sorted(archive.namelist()), ["Validation_Summary.xlsx", "team_validated.xlsx"])
+        validated = pd.read_excel(io.BytesIO(archive.read("team_validated.xlsx")), sheet_name="Zoe")
+        self.assertEqual(list(validated["Status"]), ["Valid", "Valid"])
+        self.assertEqual(list(validated["Hours"]), [8, 0])
+
+    @override_settings(TIMESHEET_READ_CHUNK_ROWS=1)
+    def test_chunked_job_streams_into_zip(self):
+        """With chunked reading a job validates straight into its ZIP, without run()"""
+        with patch('anniversary.jobs.TimeValidator.run') as run:
+            job = self.client.post(reverse('submit_timesheet_job'), {'timesheet_file': self._workbook_upload()}).json()
+        run.assert_not_called()
+
+        archive = zipfile.ZipFile(io.BytesIO(streamed_content(self.client.get(job['download_url']))))
+        validated = pd.read_excel(io.BytesIO(archive.read("team_validated.xlsx")), sheet_name="Zoe")
+        self.assertEqual(list(validated["Status"]), ["Valid", "Valid"])
+        summary = pd.read_excel(io.BytesIO(archive.read("Validation_Summary.xlsx")))
+        self.assertEqual(list(summary["Hours"]), [8, 8])
+
+    def _tracked_rows(self):
+        store = SummaryStore(os.path.join(self.media_root.name, 'timesheet_validations', 'summary_store.sqlite3'))
+        return store.rows('validation_summary.xlsx')
+
+    def test_repeated_upload_is_served_from_cache(self):
+        """Re-uploading identical content skips validation and reuses the ZIP, named and tracked for the new upload"""
+        first = self.client.post(reverse('submit_timesheet_job'), {'timesheet_file': self._workbook_upload()}).json()
+        with patch('anniversary.jobs.TimeValidator.run') as run, \
+                patch('scripts.timesheet_validation.datetime') as clock:
+            clock.now.return_value = datetime(2030, 1, 2, 3, 4, 5)
+            second = self.client.post(reverse('submit_timesheet_job'), {'timesheet_file': self._workbook_upload()}).json()
+        run.assert_not_called()
+
+        self.assertEqual(self.client.get(second['status_url']).json()['status'], 'done')
+        first_zip = streamed_content(self.client.get(first['download_url']))
+        second_download = self.client.get(second['download_url'])
+        self.assertIn('team_20300102_030405.zip', second_download['Content-Disposition'])
+        self.assertEqual(first_zip, streamed_content(second_download))
+        rows = self._tracked_rows()
+        self.assertEqual(list(rows["Sheet Name"]), ["Zoe", "Zoe"])
+        self.assertEqual(list(rows["Hours"]), [8, 8])
+        self.assertEqual(list(rows["Review"]), ["OK", "OK"])
+        stats = self.client.get(reverse('timesheet_cache_stats')).json()
+        self.assertEqual((stats['hits'], stats['misses'], stats['entries']), (1, 1, 1))
+
+    def test_stage_timings_in_server_timing_header(self):
+        """Pipeline stages run during a request are reported in Server-Timing"""
+        response = self.client.post(reverse('submit_timesheet_job'), {'timesheet_file': self._workbook_upload()})
+
+        timings = response['Server-Timing']
+        for stage in ('read_excel;', 'validate;', 'create_summary;', 'write_validation_zip;', 'total;'):
+            self.assertIn(stage, timings)
+        self.assertIn('validate;dur=', timings)
+        self.assertIn('desc="2 rows"', timings)
+
+    @override_settings(PIPELINE_METRICS_ENABLED=True)
+    def test_metrics_endpoint_aggregates_stages(self):
+        """The metrics endpoint counts each stage run"""
+        reset_metrics()
+        self.client.post(reverse('submit_timesheet_job'), {'timesheet_file': self._workbook_upload()})
+
+        metrics = self.client.get(reverse('pipeline_metrics')).json()
+        self.assertEqual(metrics['stages']['validate']['count'], 1)
+        self.assertEqual(metrics['stages']['validate']['rows'], 2)
+
+    def test_metrics_endpoint_disabled_by_default(self):
+        self.assertEqual(self.client.get(reverse('pipeline_metrics')).status_code, 404)
+
+    @override_settings(TIMESHEET_RULE_SETS={'custom': {'full_day_hours': 9}})
+    def test_custom_validation_type_selects_its_rule_set(self):
+        """The custom validation type validates with the custom rule set"""
+        response = self.client.post(reverse('submit_timesheet_job'),
+                                    {'timesheet_file': self._workbook_upload(), 'validation_type': 'custom'})
+        self.assertEqual(response.status_code, 202)
+
+        download = self.client.get(response.json()['download_url'])
+        archive = zipfile.ZipFile(io.BytesIO(streamed_content(download)))
+        validated = pd.read_excel(io.BytesIO(archive.read("team_validated.xlsx")), sheet_name="Zoe")
+        self.assertEqual(list(validated["Status"]), ["Full working day should be 9 hrs, found 8 hrs", "Valid"])
+
+        with override_settings(TIMESHEET_RULE_SETS={}):
+            response = self.client.post(reverse('submit_timesheet_job'),
+                                        {'timesheet_file': self._workbook_upload(), 'validation_type': 'custom'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('validation_type', response.json()['errors'])
+
+    @override_settings(TIMESHEET_API_TOKENS=['s3cret'])
+    def test_job_api_needs_csrf_or_api_token(self):
+        """Scripts authenticate with an API token, browsers with the CSRF token"""
+        client = Client(enforce_csrf_checks=True)
+        url = reverse('submit_timesheet_job')
+
+        self.assertEqual(client.post(url, {'timesheet_file': self._workbook_upload()}).status_code, 403)
+        wrong = client.post(url, {'timesheet_file': self._workbook_upload()}, headers={'Authorization': 'Bearer nope'})
+        self.assertEqual(wrong.status_code, 401)
+        scripted = client.post(url, {'timesheet_file': self._workbook_upload()},
+                               headers={'Authorization': 'Bearer s3cret'})
+        self.assertEqual(scripted.status_code, 202)
+
+        client.get(reverse('timesheet_validation'))
+        browser = client.post(url, {'timesheet_file': self._workbook_upload()},
+                              headers={'X-CSRFToken': client.cookies['csrftoken'].value})
+        self.assertEqual(browser.status_code, 202)
+
+    @override_settings(TIMESHEET_JOB_WORKERS=1)
+    def test_interrupted_jobs_are_requeued_or_failed(self):
+        """Jobs left queued or running by a process that is gone are picked up again"""
+        upload_path = os.path.join(self.media_root.name, 'team.xlsx')
+        with open(upload_path, 'wb') as f:
+            f.write(self._workbook_upload().read())
+        gone = f"{socket.gethostname()}:{os.getpid()}:restarted"
+        requeued = ValidationJob.objects.create(file_name="team.xlsx", upload_path=upload_path,
+                                                status=ValidationJob.RUNNING, progress=60, worker=gone)
+        lost = ValidationJob.objects.create(file_name="lost.xlsx", upload_path="missing.xlsx", worker='')
+        live = ValidationJob.objects.create(file_name="live.xlsx", upload_path=upload_path)
+        elsewhere = ValidationJob.objects.create(file_name="other.xlsx", upload_path="missing.xlsx",
+                                                 worker="other-host:1:abc")
+
+        with patch('anniversary.jobs.get_executor') as get_executor:
+            self.assertEqual(recover_interrupted_jobs(), 2)
+        get_executor.return_value.submit.assert_called_once()
+        self.assertEqual(get_executor.return_value.submit.call_args.args[1], requeued.pk)
+
+        requeued.refresh_from_db()
+        self.assertEqual((requeued.status, requeued.progress, requeued.worker),
+                         (ValidationJob.QUEUED, 0, current_worker()))
+        lost.refresh_from_db()
+        self.assertEqual(lost.status, ValidationJob.FAILED)
+        for job in (live, elsewhere):
+            job.refresh_from_db()
+            self.assertEqual(job.status, ValidationJob.QUEUED)
+
+    def test_job_download_before_done(self):
+        """Downloading an unfinished job is refused"""
+        job = ValidationJob.objects.create(file_name="team.xlsx", upload_path="missing.xlsx")
+
+        response = self.client.get(reverse('download_timesheet_job', args=[job.id]))
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['status'], 'queued')
+
+    def test_upload_view_sets_up_off_the_event_loop(self):
+        """The upload view creates its folders, summary store and validator in a worker thread"""
+        setup_threads = []
+
+        def output_manager(*args):
+            try:
+                asyncio.get_running_loop()
+                setup_threads.append('event loop')
+            except RuntimeError:
+                setup_threads.append('worker')
+            return OutputManager(*args)
+
+        with patch('anniversary.views.OutputManager', side_effect=output_manager):
+            response = self.client.post(reverse('timesheet_validation'), {'timesheet_file': self._workbook_upload()})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(setup_threads, ['worker'])
+        self.assertEqual(self.client.get(reverse('timesheet_validation')).status_code, 200)
+        self.assertEqual(setup_threads, ['worker'])
+
+    @override_settings(PIPELINE_METRICS_ENABLED=True)
+    def test_upload_zip_is_written_in_pipeline_executor(self):
+        """The streamed ZIP's writer takes a pipeline worker and its stage is measured"""
+        reset_metrics()
+        writer_threads = []
+        write_members = OutputManager._write_validation_members
+
+        def record_thread(manager, validation_result, zipf):
+            writer_threads.append(threading.current_thread().name)
+            return write_members(manager, validation_result, zipf)
+
+        with patch.object(OutputManager, '_write_validation_members', autospec=True, side_effect=record_thread):
+            response = self.client.post(reverse('timesheet_validation'), {'timesheet_file': self._workbook_upload()})
+            streamed_content(response)
+
+        self.assertEqual(len(writer_threads), 1)
+        self.assertTrue(writer_threads[0].startswith('pipeline'))
+        metrics = self.client.get(reverse('pipeline_metrics')).json()
+        self.assertEqual(metrics['stages']['stream_validation_zip']['count'], 1)
+
+    def test_upload_streams_zip_without_writing_outputs(self):
+        """The upload view streams its ZIP, stores the workbooks and writes nothing to the outputs folder"""
+        response = self.client.post(reverse('timesheet_validation'), {'timesheet_file': self._workbook_upload()})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/zip')
+        self.assertNotIn('Content-Length', response)
+        archive = zipfile.ZipFile(io.BytesIO(streamed_content(response)))
+        self.assertIsNone(archive.testzip())
+        self.assertEqual({info.filename: info.compress_type for info in archive.infolist()},
+                         {"team_validated.xlsx": zipfile.ZIP_STORED, "Validation_Summary.xlsx": zipfile.ZIP_STORED})
+        validated = pd.read_excel(io.BytesIO(archive.read("team_validated.xlsx")), sheet_name="Zoe")
+        self.assertEqual(list(validated["Status"]), ["Valid", "Valid"])
+        self.assertEqual(os.listdir(os.path.join(self.media_root.name, 'timesheet_outputs')), [])
+
+    def test_streamed_upload_fills_result_cache(self):
+        """A streamed ZIP is kept in the result cache and served from it for the same upload"""
+        first = streamed_content(self.client.post(reverse('timesheet_validation'),
+                                                  {'timesheet_file': self._workbook_upload()}))
+        with patch('anniversary.views.build_validator') as build_validator:
+            build_validator.return_value.run.side_effect = AssertionError("validated again")
+            response = self.client.post(reverse('timesheet_validation'), {'timesheet_file': self._workbook_upload()})
+
+        self.assertEqual(streamed_content(response), first)
+        self.assertTrue(response['Content-Disposition'].endswith('.zip"'))
+        self.assertEqual(len(self._tracked_rows()), 2)
+        stats = self.client.get(reverse('timesheet_cache_stats')).json()
+        self.assertEqual((stats['hits'], stats['entries']), (1, 1))
+        self.assertFalse([name for name in os.listdir(os.path.join(self.media_root.name, 'timesheet_cache'))
+                          if name.endswith('.tmp')])
+
+
+class TimesheetBatchTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media_root.cleanup)
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root.name, TIMESHEET_BATCH_WORKERS=1)
+        self.settings_override.enable()
+        self.addCleanup(self.settings_override.disable)
+
+    def _workbook(self, hours):
+        buffer = io.BytesIO()
+        pd.DataFrame({
+            "Client": ["Client - ABC", "Leave"],
+            "Description": ["Dev", "Off"],
+            "Date": pd.to_datetime(["2025-03-03", "2025-03-04"]),
+            "Hours": [hours, 0],
+        }).to_excel(buffer, sheet_name="Zoe", index=False)
+        return buffer.getvalue()
+
+    def _zip(self, members):
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w") as archive:
+            for name, data in members.items():
+                archive.writestr(name, data)
+        return buffer.getvalue()
+
+    def _post(self, *files, **data):
+        return self.client.post(reverse('timesheet_batch_validation'), {'timesheet_files': list(files), **data})
+
+    def test_files_and_zips_validate_into_one_archive(self):
+        """Files and zipped workbooks are validated together with one summary write"""
+        archive = self._zip({
+            "march/adam.xlsx": self._workbook(6),
+            "march/zoe.xlsx": self._workbook(8),
+            "__MACOSX/march/._adam.xlsx": b"metadata",
+            "readme.txt": b"not a workbook",
+        })
+        with patch('scripts.timesheet_validation.SummaryStore.append', autospec=True,
+                   side_effect=SummaryStore.append) as append:
+            response = self._post(SimpleUploadedFile("zoe.xlsx", self._workbook(8)),
+                                  SimpleUploadedFile("broken.xlsx", b"not a workbook"),
+                                  SimpleUploadedFile("march.zip", archive))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(append.call_count, 1)
+        self.assertEqual(len(append.call_args.args[2]), 3)
+        self.assertEqual((response['X-Batch-Files'], response['X-Batch-Failed'], response['X-Batch-Rows']),
+                         ('4', '1', '6'))
+        self.assertGreater(float(response['X-Batch-Files-Per-Second']), 0)
+
+        result = zipfile.ZipFile(io.BytesIO(streamed_content(response)))
+        self.assertEqual(sorted(result.namelist()), [
+            "Batch_Summary.xlsx", "adam_validated.xlsx", "zoe_2_validated.xlsx", "zoe_validated.xlsx"])
+        summary = pd.read_excel(io.BytesIO(result.read("Batch_Summary.xlsx")), sheet_name=None)
+        self.assertEqual(list(summary), ["Summary", "Failed Files", "Batch Report"])
+        self.assertEqual(list(summary["Summary"]["File Name"]), ["zoe.xlsx", "adam.xlsx", "zoe_2.xlsx", "Total"])
+        self.assertEqual(list(summary["Summary"]["S.No"].iloc[:3]), [1, 2, 3])
+        self.assertEqual(summary["Summary"]["Hours"].iloc[-1], 22)
+        self.assertEqual(list(summary["Failed Files"]["File Name"]), ["broken.xlsx"])
+        report = dict(zip(summary["Batch Report"]["Metric"], summary["Batch Report"]["Value"]))
+        self.assertEqual((report["Files"], report["Validated"], report["Sheets"]), (4, 3, 3))
+
+    @override_settings(TIMESHEET_BATCH_WORKERS=2)
+    def test_pooled_batches_get_their_own_archive(self):
+        """With a process pool, batches finishing in the same second still get separate ZIPs"""
+        with patch('scripts.timesheet_validation.ProcessPoolExecutor', wraps=ProcessPoolExecutor) as pool, \
+                patch('anniversary.batches.datetime') as clock:
+            clock.now.return_value = datetime(2030, 1, 2, 3, 4, 5)
+            first = self._post(SimpleUploadedFile("adam.xlsx", self._workbook(6)),
+                               SimpleUploadedFile("zoe.xlsx", self._workbook(8)))
+            second = self._post(SimpleUploadedFile("mia.xlsx", self._workbook(4)),
+                                SimpleUploadedFile("zoe.xlsx", self._workbook(8)))
+
+        # Workers are never forked from the threaded server process
+        self.assertEqual(pool.call_count, 2)
+        self.assertNotEqual(pool.call_args.kwargs['mp_context'].get_start_method(), 'fork')
+        self.assertNotEqual(first['Content-Disposition'], second['Content-Disposition'])
+        self.assertEqual(sorted(zipfile.ZipFile(io.BytesIO(streamed_content(first))).namelist()),
+                         ["Batch_Summary.xlsx", "adam_validated.xlsx", "zoe_validated.xlsx"])
+        self.assertEqual(sorted(zipfile.ZipFile(io.BytesIO(streamed_content(second))).namelist()),
+                         ["Batch_Summary.xlsx", "mia_validated.xlsx", "zoe_validated.xlsx"])
+        self.assertEqual(second['X-Batch-Rows'], '4')
+
+    @override_settings(TIMESHEET_BATCH_MAX_FILES=2)
+    def test_unusable_batches_are_refused(self):
+        """Non-workbooks, empty ZIPs and batches over the limit come back as form errors"""
+        for files in [
+            [SimpleUploadedFile("notes.txt", b"hello")],
+            [SimpleUploadedFile("empty.zip", self._zip({"readme.txt": b"hello"}))],
+            [SimpleUploadedFile("broken.zip", b"not a zip")],
+            [SimpleUploadedFile(f"{name}.xlsx", self._workbook(8)) for name in ("a", "b", "c")],
+        ]:
+            response = self._post(*files)
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(response.context['batch_error'])
+        self.assertEqual(os.listdir(os.path.join(self.media_root.name, 'timesheet_batches')), [])
+
+
+@override_settings(CHUNKED_UPLOAD_CHUNK_MAX_BYTES=2048, CHUNKED_UPLOAD_READ_BYTES=512)
+class ChunkedUploadTests(TransactionTestCase):
+    def setUp(self):
+        self.media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media_root.cleanup)
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root.name, TIMESHEET_JOB_WORKERS=0)
+        self.settings_override.enable()
+        self.addCleanup(self.settings_override.disable)
+
+        buffer = io.BytesIO()
+        pd.DataFrame({
+            "Client": ["Client - ABC"] * 40,
+            "Description": ["Dev"] * 40,
+            "Date": pd.date_range("2025-03-03", periods=40),
+            "Hours": [8] * 40,
+        }).to_excel(buffer, sheet_name="Zoe", index=False)
+        self.data = buffer.getvalue()
+
+    def _start(self, client=None, headers=None, **fields):
+        body = {'file_name': 'team.xlsx', 'size': len(self.data),
+                'checksum': hashlib.sha256(self.data).hexdigest(), **fields}
+        return (client or self.client).post(reverse('create_chunked_upload'), json.dumps(body),
+                                            content_type='application/json', headers=headers)
+
+    def _put(self, upload_url, offset, chunk, client=None, **headers):
+        return (client or self.client).put(upload_url, chunk, content_type='application/octet-stream',
+                                           headers={'Upload-Offset': str(offset), **headers})
+
+    @override_settings(TIMESHEET_API_TOKENS=['s3cret'])
+    def test_upload_api_needs_csrf_or_api_token(self):
+        """Scripts can upload with an API token; without one the CSRF token is required"""
+        client = Client(enforce_csrf_checks=True)
+        self.assertEqual(self._start(client).status_code, 403)
+        self.assertEqual(self._start(client, headers={'Authorization': 'Bearer nope'}).status_code, 401)
+
+        token = {'Authorization': 'Bearer s3cret'}
+        upload = self._start(client, headers=token).json()
+        self.assertEqual(self._put(upload['upload_url'], 0, self.data[:2048], client).status_code, 403)
+        self.assertEqual(self._put(upload['upload_url'], 0, self.data[:2048], client, **token).json()['offset'], 2048)
+        self.assertEqual(client.get(upload['upload_url']).json()['offset'], 2048)
+
+        client.get(reverse('timesheet_validation'))
+        csrf = {'X-CSRFToken': client.cookies['csrftoken'].value}
+        self.assertEqual(self._put(upload['upload_url'], 2048, self.data[2048:4096], client, **csrf).status_code, 200)
+
+    def test_chunks_resume_and_queue_validation(self):
+        """A dropped transfer resumes from the reported offset and the last chunk starts validation"""
+        upload = self._start().json()
+        self.assertGreater(len(self.data), 2 * upload['chunk_bytes'])
+
+        first = self._put(upload['upload_url'], 0, self.data[:2048]).json()
+        self.assertEqual(first['offset'], 2048)
+        # A retried chunk at a stale offset is refused with the offset to resume from
+        stale = self._put(upload['upload_url'], 0, self.data[:2048])
+        self.assertEqual(stale.status_code, 409)
+        self.assertEqual(stale.json()['offset'], 2048)
+
+        offset = self.client.get(upload['upload_url']).json()['offset']
+        while offset < len(self.data):
+            chunk = self.data[offset:offset + 2048]
+            response = self._put(upload['upload_url'], offset, chunk,
+                                 **{'Upload-Checksum': hashlib.sha256(chunk).hexdigest()})
+            offset = response.json()['offset']
+
+        self.assertEqual(response.status_code, 202)
+        finished = response.json()
+        self.assertEqual(finished['status'], 'complete')
+        self.assertEqual(self.client.get(finished['status_url']).json()['status'], 'done')
+        archive = zipfile.ZipFile(io.BytesIO(streamed_content(self.client.get(finished['download_url']))))
+        self.assertIn("team_validated.xlsx", archive.namelist())
+        job = ValidationJob.objects.get(pk=finished['job_id'])
+        with open(job.upload_path, 'rb') as f:
+            self.assertEqual(f.read(), self.data)
+
+    def test_corrupt_chunk_and_checksum_mismatch_are_rejected(self):
+        upload = self._start(checksum='0' * 64).json()
+
+        corrupt = self._put(upload['upload_url'], 0, self.data[:2048], **{'Upload-Checksum': '0' * 64})
+        self.assertEqual(corrupt.status_code, 422)
+        self.assertEqual(corrupt.json()['offset'], 0)
+        self.assertEqual(self._put(upload['upload_url'], 0, self.data[:3000]).status_code, 413)
+
+        offset = 0
+        while offset < len(self.data):
+            response = self._put(upload['upload_url'], offset, self.data[offset:offset + 2048])
+            offset = response.json()['offset'] if response.status_code == 200 else len(self.data)
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(self.client.get(upload['upload_url']).json()['status'], 'failed')
+        self.assertFalse(ValidationJob.objects.exists())
+
+    def test_size_limits_are_enforced(self):
+        with override_settings(CHUNKED_UPLOAD_MAX_BYTES=1000):
+            self.assertEqual(self._start().status_code, 413)
+        with override_settings(CHUNKED_UPLOAD_PENDING_MAX_BYTES=len(self.data) * 3 // 2):
+            self.assertEqual(self._start().status_code, 201)
+            self.assertEqual(self._start().status_code, 507)
+        self.assertEqual(self._start(file_name='../../etc/passwd').json()['file_name'], 'passwd')
+        self.assertEqual(self._start(validation_type='bogus').status_code, 400)
+
+
+class RetentionTests(TestCase):
+    NOW = 1_740_830_400  # 2025-03-01 12:00 UTC
+
+    def setUp(self):
+        self.media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media_root.cleanup)
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root.name, TIMESHEET_RETENTION_DAYS=30,
+                                                   TIMESHEET_RETENTION_MAX_BYTES=0, TIMESHEET_COMPACT_AFTER_DAYS=7)
+        self.settings_override.enable()
+        self.addCleanup(self.settings_override.disable)
+
+    def _file(self, relative_path, content, days_old):
+        path = os.path.join(self.media_root.name, relative_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(content)
+        mtime = self.NOW - days_old * 24 * 60 * 60
+        os.utime(path, (mtime, mtime))
+        return path
+
+    def _media(self):
+        self._file('timesheet/old.xlsx', b'old upload', days_old=40)
+        self._file('timesheet/team.xlsx', b'same workbook', days_old=2)
+        self._file('timesheet_batches/20250220_090000_ab12cd34/team.xlsx', b'same workbook', days_old=3)
+        self._file('timesheet_outputs/old_20250101_120000.zip', b'old zip', days_old=40)
+        self._file('timesheet_outputs/new_20250228_120000.zip', b'new zip', days_old=1)
+        self._file('timesheet_validations/validation_summary.xlsx', b'summary', days_old=60)
+        self._file('timesheet_validations/validation_20250110_120000/team.xlsx', b'validated', days_old=50)
+        self._file('timesheet_validations/validation_20250110_120000/validation_summary.xlsx', b'summary', days_old=50)
+        self._file('timesheet_validations/validation1/validation_20250205_080000/team.xlsx', b'v1', days_old=24)
+        self._file('timesheet_validations/validation1/validation_20250227_080000/team.xlsx', b'recent', days_old=2)
+        queued = ValidationJob.objects.create(file_name='late.xlsx', upload_path=self._file(
+            'timesheet/0f0e/late.xlsx', b'queued upload', days_old=45))
+        return queued
+
+    def _tree(self):
+        return sorted(os.path.relpath(os.path.join(root, name), self.media_root.name)
+                      for root, _, files in os.walk(self.media_root.name) for name in files)
+
+    def test_dry_run_reports_without_changes(self):
+        self._media()
+        before = self._tree()
+
+        report = apply_retention(dry_run=True, now=self.NOW)
+
+        self.assertEqual(self._tree(), before)
+        actions = {(action, os.path.relpath(path, self.media_root.name)) for action, path, _, _ in report.actions}
+        self.assertEqual(actions, {
+            ('compact', 'timesheet_validations/validation_20250110_120000'),
+            ('compact', 'timesheet_validations/validation1/validation_20250205_080000'),
+            ('delete', 'timesheet/old.xlsx'),
+            ('delete', 'timesheet_outputs/old_20250101_120000.zip'),
+            ('dedupe', 'timesheet/team.xlsx'),  # the batch copy is older and kept
+        })
+        self.assertEqual(report.totals()['delete'], (2, len(b'old upload') + len(b'old zip')))
+
+    def test_policies_compact_delete_and_link(self):
+        """Old folders land in monthly archives, expired files go, duplicates share one copy"""
+        self._media()
+
+        apply_retention(now=self.NOW)
+
+        media = self.media_root.name
+        self.assertFalse(os.path.exists(os.path.join(media, 'timesheet/old.xlsx')))
+        self.assertFalse(os.path.exists(os.path.join(media, 'timesheet_outputs/old_20250101_120000.zip')))
+        self.assertTrue(os.path.exists(os.path.join(media, 'timesheet/0f0e/late.xlsx')))  # job still queued
+        self.assertTrue(os.path.exists(os.path.join(media, 'timesheet_validations/validation_summary.xlsx')))
+        self.assertTrue(os.path.isdir(os.path.join(media, 'timesheet_validations/validation1/validation_20250227_080000')))
+        self.assertFalse(os.path.exists(os.path.join(media, 'timesheet_validations/validation_20250110_120000')))
+
+        with zipfile.ZipFile(os.path.join(media, 'timesheet_archives/validations_2025-01.zip')) as archive:
+            self.assertEqual(sorted(archive.namelist()), ['validation_20250110_120000/team.xlsx',
+                                                          'validation_20250110_120000/validation_summary.xlsx'])
+            self.assertEqual(archive.getinfo('validation_20250110_120000/team.xlsx').compress_type, zipfile.ZIP_STORED)
+            self.assertEqual(archive.read('validation_20250110_120000/team.xlsx'), b'validated')
+        with zipfile.ZipFile(os.path.join(media, 'timesheet_archives/validations_2025-02.zip')) as archive:
+            self.assertEqual(archive.namelist(), ['validation1/validation_20250205_080000/team.xlsx'])
+
+        self.assertTrue(os.path.samefile(os.path.join(media, 'timesheet/team.xlsx'),
+                                         os.path.join(media, 'timesheet_batches/20250220_090000_ab12cd34/team.xlsx')))
+        # A second run has nothing left to do
+        self.assertEqual(apply_retention(now=self.NOW).actions, [])
+
+    def test_size_limit_deletes_oldest_first(self):
+        self._file('timesheet_outputs/a.zip', b'a' * 100, days_old=5)
+        self._file('timesheet_outputs/b.zip', b'b' * 100, days_old=4)
+        self._file('timesheet_outputs/c.zip', b'c' * 100, days_old=3)
+        self._file('timesheet_outputs/current.zip', b'd' * 100, days_old=0)  # in use, never deleted
+
+        report = apply_retention(max_age_days=0, max_bytes=250, now=self.NOW)
+
+        self.assertEqual([os.path.basename(path) for _, path, _, _ in report.actions], ['a.zip', 'b.zip'])
+        self.assertEqual(sorted(os.listdir(os.path.join(self.media_root.name, 'timesheet_outputs'))),
+                         ['c.zip', 'current.zip'])
+
+    def test_command_dry_run_report(self):
+        self._file('timesheet_outputs/old.zip', b'x' * 1024, days_old=400)
+        out = io.StringIO()
+
+        call_command('apply_retention', '--dry-run', stdout=out)
+
+        self.assertIn('delete   timesheet_outputs/old.zip', out.getvalue())
+        self.assertIn('Would delete 1 item(s)', out.getvalue())
+        self.assertTrue(os.path.exists(os.path.join(self.media_root.name, 'timesheet_outputs/old.zip')))
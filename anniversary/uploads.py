@@ -0,0 +1,142 @@
+"""Resumable chunked uploads of large timesheets.
+
+A client creates an upload with the file's name, size and SHA-256, then PUTs
+the bytes in order, each chunk with an Upload-Offset header. The chunks are
+written straight into one part file under MEDIA_ROOT, so a transfer that
+drops halfway resumes from the offset the server reports instead of starting
+over. When the last chunk lands the whole file is checked against the
+checksum and queued as a validation job at once.
+
+Limits (all in settings):
+
+- CHUNKED_UPLOAD_MAX_BYTES: largest file accepted
+- CHUNKED_UPLOAD_PENDING_MAX_BYTES: disk reserved by unfinished uploads together
+- CHUNKED_UPLOAD_CHUNK_MAX_BYTES: largest single chunk
+- CHUNKED_UPLOAD_READ_BYTES: how much of a chunk is held in memory at a time
+"""
+import hashlib
+import os
+import re
+
+from django.conf import settings
+from django.db.models import F, Sum
+from django.utils.text import get_valid_filename
+
+from .concurrency import run_io
+from .jobs import get_rule_set, submit_assembled_upload, timesheet_dirs
+from .models import ChunkedUpload
+
+_SHA256 = re.compile(r'^[0-9a-f]{64}$')
+
+
+class UploadError(Exception):
+    """A chunked upload request that cannot be accepted; ``status`` is the HTTP status to answer with."""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def create_upload(file_name, size, checksum, validation_type='standard'):
+    """Register a new upload and reserve its part file; returns the ChunkedUpload."""
+    file_name = get_valid_filename(os.path.basename(str(file_name or '')))
+    if not file_name:
+        raise UploadError("file_name is required")
+    if not isinstance(size, int) or size <= 0:
+        raise UploadError("size must be a positive number of bytes")
+    if size > settings.CHUNKED_UPLOAD_MAX_BYTES:
+        raise UploadError(f"File is larger than the {settings.CHUNKED_UPLOAD_MAX_BYTES} byte limit", status=413)
+    checksum = str(checksum or '').lower()
+    if not _SHA256.match(checksum):
+        raise UploadError("checksum must be the file's SHA-256 as 64 hex digits")
+    validation_type = validation_type or 'standard'
+    try:
+        get_rule_set(validation_type)
+    except ValueError as e:
+        raise UploadError(str(e))
+
+    pending = (ChunkedUpload.objects.filter(status=ChunkedUpload.RECEIVING)
+               .aggregate(total=Sum(F('size') - F('received')))['total'] or 0)
+    if pending + size > settings.CHUNKED_UPLOAD_PENDING_MAX_BYTES:
+        raise UploadError("Too many unfinished uploads, try again later", status=507)
+
+    upload = ChunkedUpload(file_name=file_name, size=size, checksum=checksum,
+                           validation_type=validation_type)
+    upload.part_path = os.path.join(timesheet_dirs()['chunked'], f"{upload.id}.part")
+    open(upload.part_path, 'wb').close()
+    upload.save()
+    return upload
+
+
+def check_chunk(upload, offset, length):
+    """Raise UploadError unless a chunk of length bytes at offset is the next one upload expects."""
+    if upload.status != ChunkedUpload.RECEIVING:
+        raise UploadError(f"Upload is {upload.status}", status=409)
+    if offset != upload.received:
+        raise UploadError(f"Expected offset {upload.received}", status=409)
+    if length is None:
+        raise UploadError("Content-Length is required", status=411)
+    if length <= 0 or offset + length > upload.size:
+        raise UploadError(f"Chunk must be 1 to {upload.size - offset} bytes")
+    if length > settings.CHUNKED_UPLOAD_CHUNK_MAX_BYTES:
+        raise UploadError(f"Chunks are limited to {settings.CHUNKED_UPLOAD_CHUNK_MAX_BYTES} bytes", status=413)
+
+
+def write_chunk(part_path, offset, stream, length, checksum=None):
+    """Copy length bytes from stream into the part file at offset; returns the number written.
+
+    Reads at most CHUNKED_UPLOAD_READ_BYTES at a time. When the stream ends
+    early, or ``checksum`` (the chunk's SHA-256) does not match, nothing is
+    acknowledged and the client re-sends the chunk at the same offset.
+    """
+    digest = hashlib.sha256()
+    written = 0
+    with open(part_path, 'r+b') as part:
+        part.seek(offset)
+        while written < length:
+            block = stream.read(min(settings.CHUNKED_UPLOAD_READ_BYTES, length - written))
+            if not block:
+                raise UploadError(f"Chunk ended after {written} of {length} bytes")
+            part.write(block)
+            digest.update(block)
+            written += len(block)
+    if checksum and digest.hexdigest() != checksum.lower():
+        raise UploadError("Chunk checksum does not match, send it again", status=422)
+    return written
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(settings.CHUNKED_UPLOAD_READ_BYTES), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def check_assembled_file(upload):
+    """Trim the part file to the upload's size and compare its SHA-256; a file that doesn't match is deleted."""
+    with open(upload.part_path, 'r+b') as part:
+        part.truncate(upload.size)
+    if file_sha256(upload.part_path) != upload.checksum:
+        os.remove(upload.part_path)
+        return False
+    return True
+
+
+async def finish_upload(upload):
+    """Verify a fully received upload and queue it for validation; returns the upload.
+
+    The file is hashed in a worker thread, only the rows are saved on
+    Django's thread for sync ORM code. On a checksum mismatch the part file
+    is deleted and the upload marked failed, the client has to start a new one.
+    """
+    if not await run_io(check_assembled_file, upload):
+        upload.status = ChunkedUpload.FAILED
+        upload.error = "Checksum of the assembled file does not match"
+        await upload.asave(update_fields=['status', 'error', 'updated_at'])
+        raise UploadError(upload.error, status=422)
+
+    upload.job = await submit_assembled_upload(upload.part_path, upload.file_name, upload.validation_type)
+    upload.status = ChunkedUpload.COMPLETE
+    await upload.asave(update_fields=['job', 'status', 'updated_at'])
+    return upload
@@ -5,7 +5,17 @@ from . import views
 urlpatterns = [
     path('', views.home, name='home'),
     path('ppt/', views.ppt_automation, name='ppt_automation'),
+    path('ppt/batch/', views.ppt_batch_automation, name='ppt_batch_automation'),
     path('timesheet/', views.timesheet_validation, name='timesheet_validation'),
+    path('timesheet/batch/', views.timesheet_batch_validation, name='timesheet_batch_validation'),
+    path('timesheet/jobs/', views.submit_timesheet_job, name='submit_timesheet_job'),
+    path('timesheet/jobs/<uuid:job_id>/', views.timesheet_job_status, name='timesheet_job_status'),
+    path('timesheet/jobs/<uuid:job_id>/download/', views.download_timesheet_job, name='download_timesheet_job'),
+    path('timesheet/uploads/', views.create_chunked_upload, name='create_chunked_upload'),
+    path('timesheet/uploads/<uuid:upload_id>/', views.chunked_upload, name='chunked_upload'),
+    path('timesheet/summary/', views.download_summary_history, name='download_summary_history'),
+    path('timesheet/cache/', views.timesheet_cache_stats, name='timesheet_cache_stats'),
+    path('metrics/', views.pipeline_metrics, name='pipeline_metrics'),
     path('timesheet/generate_template/', views.generate_timesheet_template, name='generate_timesheet_template'),
     path('timesheet/download/<str:filename>/', views.download_timesheet_template, name='download_timesheet_template'),
 ]
\ No newline at end of file
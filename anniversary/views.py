@@ -1,102 +1,119 @@
-from django.shortcuts import render
+from django.shortcuts import render, get_object_or_404, aget_object_or_404
 from django.http import FileResponse, HttpResponse, JsonResponse
-from .forms import UploadExcelForm, UploadTimesheetForm
+from django.urls import reverse
+from asgiref.sync import sync_to_async
+from .concurrency import (bind_upload_form, get_pipeline_executor, open_for_streaming, run_io, run_pipeline, save_upload,
+                          stream_file, stream_zip)
+from .batches import create_batch_dir, discard_batch, save_batch_files, validate_batch
+from .forms import UploadBatchExcelForm, UploadExcelForm, UploadTimesheetBatchForm, UploadTimesheetForm
+from .api import api_view
+from .jobs import build_validator, get_result_cache, result_cache_key, submit_validation_job, timesheet_dirs
+from .models import ChunkedUpload, ValidationJob
+from .uploads import UploadError, check_chunk, create_upload, finish_upload, write_chunk
 import os
-from scripts.ppt_generator import generate_presentation
-from scripts.timesheet_validation import TimeValidator, OutputManager
+import tempfile
+from datetime import datetime
+from scripts.ppt_generator import generate_presentation, generate_presentations_batch
+from scripts.instrumentation import aggregated_metrics
+from scripts.timesheet_validation import OutputManager
 from django.conf import settings
+from django.utils import timezone
 import json
 
 def home(request):
     return render(request, 'anniversary/home.html')
 
-def ppt_automation(request):
-    output_path = os.path.join(settings.MEDIA_ROOT, 'Final_Anniversary_Presentation.pptx')
+async def ppt_automation(request):
     if request.method == 'POST':
-        form = UploadExcelForm(request.POST, request.FILES)
+        form = await bind_upload_form(request, UploadExcelForm)
         if form.is_valid():
             name = form.cleaned_data['name']
             years = form.cleaned_data['years'] 
             file = request.FILES['file']
             template_path = os.path.join(settings.MEDIA_ROOT, 'WorkAnniversaryLogo.pptx')
-            excel_path = os.path.join(settings.MEDIA_ROOT, 'uploaded.xlsx')
 
-            with open(excel_path, 'wb+') as destination:
-                for chunk in file.chunks():
-                    destination.write(chunk)
-
-            os.makedirs(os.path.dirname(output_path), exist_ok=True)
-            print(f"Saving PPTX to: {output_path}")        
-
-            generate_presentation(
+            # Each request reads its own upload and builds its deck in memory,
+            # only spilling to a temp file past PPT_SPOOL_MAX_BYTES
+            output = tempfile.SpooledTemporaryFile(max_size=settings.PPT_SPOOL_MAX_BYTES)
+            await run_pipeline(
+                generate_presentation,
                 template_path=template_path,
-                excel_path=excel_path,
-                output_path=output_path,
+                excel_path=file,
+                output_path=output,
                 user_name=name,
-                years_of_service=years
+                years_of_service=years,
+                dedupe=settings.PPT_DEDUPE_WISHES
             )
-            return FileResponse(open(output_path, 'rb'), as_attachment=True, filename='Anniversary_Slides.pptx')
+            output.seek(0)
+            return stream_file(output, 'Anniversary_Slides.pptx')
     else:
         form = UploadExcelForm()
 
-    return render(request, 'anniversary/ppt_automation.html', {'form': form})
+    return render(request, 'anniversary/ppt_automation.html', {'form': form, 'batch_form': UploadBatchExcelForm()})
+
+async def ppt_batch_automation(request):
+    """Build decks for every honoree in one uploaded workbook and return them as a ZIP"""
+    batch_error = None
+    if request.method == 'POST':
+        batch_form = await bind_upload_form(request, UploadBatchExcelForm)
+        if batch_form.is_valid():
+            template_path = os.path.join(settings.MEDIA_ROOT, 'WorkAnniversaryLogo.pptx')
+            # Held in memory up to PPT_SPOOL_MAX_BYTES, removed when the response is closed
+            zip_file = tempfile.SpooledTemporaryFile(max_size=settings.PPT_SPOOL_MAX_BYTES)
+            try:
+                await run_pipeline(
+                    generate_presentations_batch,
+                    template_path=template_path,
+                    excel_file=request.FILES['batch_file'],
+                    zip_file=zip_file,
+                    workers=settings.PPT_BATCH_WORKERS,
+                    dedupe=settings.PPT_DEDUPE_WISHES
+                )
+            except ValueError as e:
+                zip_file.close()
+                batch_error = str(e)
+            else:
+                zip_file.seek(0)
+                filename = f"Anniversary_Slides_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip"
+                return stream_file(zip_file, filename)
+    else:
+        batch_form = UploadBatchExcelForm()
+
+    return render(request, 'anniversary/ppt_automation.html', {
+        'form': UploadExcelForm(),
+        'batch_form': batch_form,
+        'batch_error': batch_error
+    })
 
 # def timesheet_validation(request):
 #     return render(request, 'anniversary/timesheet_validation.html')
 
-def timesheet_validation(request):
+async def timesheet_validation(request):
     result = None
     validation_summary = None
     
-    # Setup directories for timesheet operations
-    timesheet_dir = os.path.join(settings.MEDIA_ROOT, 'timesheet')
-    timesheet_output_dir = os.path.join(settings.MEDIA_ROOT, 'timesheet_outputs')
-    timesheet_archive_dir = os.path.join(settings.MEDIA_ROOT, 'timesheet_archives')
-    timesheet_validation_dir = os.path.join(settings.MEDIA_ROOT, 'timesheet_validations')
-    
-    # Create directories if they don't exist
-    for directory in [timesheet_dir, timesheet_output_dir, timesheet_archive_dir, timesheet_validation_dir]:
-        if not os.path.exists(directory):
-            os.makedirs(directory)
-    
-    # Initialize timesheet validator and output manager
-    validator = TimeValidator()
-    output_manager = OutputManager(timesheet_output_dir, timesheet_archive_dir, timesheet_validation_dir)
-    
     if request.method == 'POST':
-        form = UploadTimesheetForm(request.POST, request.FILES)
+        form = await bind_upload_form(request, UploadTimesheetForm)
         if form.is_valid():
             timesheet_file = request.FILES['timesheet_file']
-            validation_type = form.cleaned_data.get('validation_type', 'standard')
+            validation_type = form.cleaned_data.get('validation_type') or 'standard'
+            # Creates the folders and opens the summary store and sheet cache, so not on the event loop
+            timesheet_dir, output_manager, validator = await run_io(_timesheet_pipeline, validation_type)
             
             # Save uploaded file
             timesheet_path = os.path.join(timesheet_dir, timesheet_file.name)
-            with open(timesheet_path, 'wb+') as destination:
-                for chunk in timesheet_file.chunks():
-                    destination.write(chunk)
-            
-            # Run validation
-            validation_result = validator.run(timesheet_path)
+            await save_upload(timesheet_file, timesheet_path)
             
+            validation_result, cached_path, zip_stream, zip_name = await run_pipeline(
+                _validate_timesheet, validator, output_manager, timesheet_path, validation_type
+            )
+            if cached_path:
+                return stream_file(await open_for_streaming(cached_path), zip_name)
+            if zip_stream:
+                return stream_zip(zip_stream, zip_name)
+
             if validation_result["success"]:
-                # Save validated data
-                validation_number = 1 if validation_type == 'custom' else None
-                validated_file_path = output_manager.save_validated_data(validation_result, validation_number)
-                
-                if validated_file_path:
-                    # Create a ZIP archive
-                    zip_path = output_manager.create_zip_archive(validated_file_path)
-                    
-                    if zip_path:
-                        return FileResponse(
-                            open(zip_path, 'rb'), 
-                            as_attachment=True, 
-                            filename=os.path.basename(zip_path)
-                        )
-                    else:
-                        result = "Validation completed, but error creating ZIP archive"
-                else:
-                    result = "Validation completed, but error saving results"
+                result = "Validation completed, but error creating ZIP archive"
                 
                 # Extract summary for display
                 validation_summary = validation_result["summary"].to_dict('records')
@@ -107,10 +124,217 @@ def timesheet_validation(request):
     
     return render(request, 'anniversary/timesheet_validation.html', {
         'form': form,
+        'batch_form': UploadTimesheetBatchForm(),
         'result': result,
         'validation_summary': validation_summary
     })
 
+def _timesheet_pipeline(validation_type):
+    """Upload folder, OutputManager and validator for a validation type, with the media folders created"""
+    dirs = timesheet_dirs()
+    output_manager = OutputManager(dirs['output'], dirs['archive'], dirs['validation'],
+                                   settings.TIMESHEET_ZIP_COMPRESSLEVEL)
+    return dirs['upload'], output_manager, build_validator(validation_type)
+
+def _validate_timesheet(validator, output_manager, timesheet_path, validation_type):
+    """Validate a saved upload; returns (validation result, cached ZIP path, ZipStream, download name)
+
+    A cache hit gives the cached ZIP's path and no result; otherwise the ZIP is
+    a ZipStream, written while it is sent. Both are None when no ZIP can be made.
+    """
+    # Serve a previously built ZIP for an identical upload, named for this upload
+    validation_number = 1 if validation_type == 'custom' else None
+    cache = get_result_cache()
+    cache_key = result_cache_key(cache, timesheet_path, validation_type) if cache else None
+    cached = cache.get(cache_key) if cache else None
+    if cached:
+        validation_result = output_manager.record_cached_validation(timesheet_path, cached['summary'],
+                                                                    validation_number)
+        return None, cached['zip_path'], None, output_manager.validation_zip_name(validation_result)
+
+    # Run validation
+    validation_result = validator.run(timesheet_path)
+    if not validation_result["success"]:
+        return validation_result, None, None, None
+
+    # The ZIP is built as the response is sent and tracked once complete; with
+    # the cache on, a copy is written next to the cache and moved in then too
+    zip_name = output_manager.validation_zip_name(validation_result)
+    tee_path = on_complete = None
+    if cache:
+        tee_path = cache.temp_path(cache_key)
+        summary = validation_result["summary"]
+        on_complete = lambda path: cache.put(cache_key, path, summary, zip_name=zip_name, move=True)
+    zip_stream = output_manager.stream_validation_zip(validation_result, validation_number, tee_path, on_complete,
+                                                      executor=get_pipeline_executor())
+    return validation_result, None, zip_stream, zip_name if zip_stream else None
+
+def _save_batch(uploaded_files):
+    """Save a batch upload into a new batch folder; returns the workbook paths"""
+    batch_dir = create_batch_dir()
+    try:
+        return save_batch_files(uploaded_files, batch_dir)
+    except Exception:
+        discard_batch(batch_dir)
+        raise
+
+# Batch report entries sent as response headers next to the ZIP
+BATCH_REPORT_HEADERS = {
+    'Files': 'X-Batch-Files',
+    'Failed': 'X-Batch-Failed',
+    'Rows': 'X-Batch-Rows',
+    'Total seconds': 'X-Batch-Seconds',
+    'Files per second': 'X-Batch-Files-Per-Second',
+}
+
+async def timesheet_batch_validation(request):
+    """Validate many timesheets, uploaded as files or ZIPs of workbooks, and return one ZIP"""
+    batch_error = None
+    if request.method == 'POST':
+        batch_form = await bind_upload_form(request, UploadTimesheetBatchForm)
+        if batch_form.is_valid():
+            try:
+                paths = await run_io(_save_batch, batch_form.cleaned_data['timesheet_files'])
+                zip_path, report = await run_pipeline(validate_batch, paths, batch_form.cleaned_data['validation_type'])
+            except (ValueError, RuntimeError) as e:
+                batch_error = str(e)
+            else:
+                response = stream_file(await open_for_streaming(zip_path), os.path.basename(zip_path))
+                for key, header in BATCH_REPORT_HEADERS.items():
+                    response.headers[header] = str(report[key])
+                return response
+    else:
+        batch_form = UploadTimesheetBatchForm()
+
+    return render(request, 'anniversary/timesheet_validation.html', {
+        'form': UploadTimesheetForm(),
+        'batch_form': batch_form,
+        'batch_error': batch_error
+    })
+
+@api_view
+async def submit_timesheet_job(request):
+    """Queue an uploaded timesheet for background validation"""
+    if request.method != 'POST':
+        return JsonResponse({'success': False, 'error': 'Invalid request method'}, status=405)
+
+    form = await bind_upload_form(request, UploadTimesheetForm)
+    if not form.is_valid():
+        return JsonResponse({'success': False, 'errors': form.errors}, status=400)
+
+    job = await submit_validation_job(request.FILES['timesheet_file'], form.cleaned_data.get('validation_type'))
+    return JsonResponse({
+        'success': True,
+        'job_id': str(job.id),
+        'status_url': reverse('timesheet_job_status', args=[job.id]),
+        'download_url': reverse('download_timesheet_job', args=[job.id]),
+    }, status=202)
+
+@api_view
+async def create_chunked_upload(request):
+    """Start a resumable upload of a large timesheet from JSON {file_name, size, checksum, validation_type}"""
+    if request.method != 'POST':
+        return JsonResponse({'success': False, 'error': 'Invalid request method'}, status=405)
+    try:
+        data = json.loads(request.body)
+        upload = await sync_to_async(create_upload)(
+            data.get('file_name'), data.get('size'), data.get('checksum'), data.get('validation_type')
+        )
+    except (ValueError, AttributeError):
+        return JsonResponse({'success': False, 'error': 'Expected a JSON object'}, status=400)
+    except UploadError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=e.status)
+    return JsonResponse({
+        **_chunked_upload_response(upload),
+        'chunk_bytes': settings.CHUNKED_UPLOAD_CHUNK_MAX_BYTES,
+    }, status=201)
+
+@api_view
+async def chunked_upload(request, upload_id):
+    """Report how much of an upload has arrived (GET) or receive its next chunk (PUT)
+
+    A chunk is the raw request body, sent with an Upload-Offset header and
+    optionally Upload-Checksum (the chunk's SHA-256). The response to the
+    last chunk carries the validation job's URLs.
+    """
+    upload = await aget_object_or_404(ChunkedUpload, pk=upload_id)
+    if request.method == 'GET':
+        return JsonResponse(_chunked_upload_response(upload))
+    if request.method != 'PUT':
+        return JsonResponse({'success': False, 'error': 'Invalid request method'}, status=405)
+
+    try:
+        offset = int(request.headers.get('Upload-Offset', ''))
+        length = int(request.headers['Content-Length']) if request.headers.get('Content-Length') else None
+    except ValueError:
+        return JsonResponse({'success': False, 'error': 'Upload-Offset and Content-Length must be integers',
+                             'offset': upload.received}, status=400)
+    try:
+        check_chunk(upload, offset, length)
+        written = await run_io(write_chunk, upload.part_path, offset, request, length,
+                               request.headers.get('Upload-Checksum'))
+        # Only the request that wrote at the expected offset moves it on
+        if not await ChunkedUpload.objects.filter(pk=upload.pk, received=offset).aupdate(
+                received=offset + written, updated_at=timezone.now()):
+            await upload.arefresh_from_db()
+            raise UploadError(f"Expected offset {upload.received}", status=409)
+        upload.received = offset + written
+        if upload.received == upload.size:
+            upload = await finish_upload(upload)
+    except UploadError as e:
+        return JsonResponse({'success': False, 'error': str(e), 'offset': upload.received}, status=e.status)
+    return JsonResponse(_chunked_upload_response(upload), status=202 if upload.job_id else 200)
+
+def _chunked_upload_response(upload):
+    response = {'success': True, **upload.as_dict(),
+                'upload_url': reverse('chunked_upload', args=[upload.id])}
+    if upload.job_id:
+        response['status_url'] = reverse('timesheet_job_status', args=[upload.job_id])
+        response['download_url'] = reverse('download_timesheet_job', args=[upload.job_id])
+    return response
+
+def timesheet_job_status(request, job_id):
+    """Report the status and progress of a validation job"""
+    job = get_object_or_404(ValidationJob, pk=job_id)
+    return JsonResponse({'success': True, **job.as_dict()})
+
+async def download_timesheet_job(request, job_id):
+    """Download the ZIP produced by a finished validation job"""
+    job = await aget_object_or_404(ValidationJob, pk=job_id)
+    if job.status != ValidationJob.DONE:
+        return JsonResponse({'success': False, 'error': f'Job is {job.status}', **job.as_dict()}, status=409)
+    if not os.path.exists(job.zip_path):
+        return HttpResponse("Result file not found", status=404)
+
+    return stream_file(await open_for_streaming(job.zip_path), os.path.basename(job.zip_path))
+
+def timesheet_cache_stats(request):
+    """Hit/miss counters and size of the validation result cache"""
+    cache = get_result_cache()
+    if cache is None:
+        return JsonResponse({'success': True, 'enabled': False})
+    return JsonResponse({'success': True, 'enabled': True, **cache.stats()})
+
+def pipeline_metrics(request):
+    """Per-stage timing totals for both pipelines, when PIPELINE_METRICS_ENABLED is set"""
+    if not settings.PIPELINE_METRICS_ENABLED:
+        return HttpResponse("Pipeline metrics are disabled", status=404)
+    return JsonResponse({'success': True, **aggregated_metrics()})
+
+def download_summary_history(request):
+    """Download the accumulated validation summary history as Excel"""
+    dirs = timesheet_dirs()
+    output_manager = OutputManager(dirs['output'], dirs['archive'], dirs['validation'])
+
+    if request.GET.get('master'):
+        summary_path = output_manager.export_master_summary()
+    else:
+        summary_path = output_manager.export_summary_tracking(request.GET.get('validation') or None)
+
+    if not summary_path:
+        return HttpResponse("No validation summary recorded yet", status=404)
+    return FileResponse(open(summary_path, 'rb'), as_attachment=True, filename=os.path.basename(summary_path))
+
 def generate_timesheet_template(request):
     """Generate a monthly timesheet template and return it for download"""
     if request.method == 'POST':
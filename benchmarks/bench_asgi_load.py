@@ -0,0 +1,168 @@
+"""Load-test the deck upload endpoint through the ASGI and WSGI handlers.
+
+Usage:
+    python -m benchmarks.bench_asgi_load [--uploads 16] [--wishes 200] [--probe-interval 0.02]
+
+Django's test clients stand in for real HTTP clients and servers, so the
+comparison needs no network or server process:
+
+- "wsgi": one thread per in-flight request, as the runserver dev server does,
+  each driving the WSGI handler through Client;
+- "asgi": every request is a coroutine on one event loop driving the ASGI
+  handler through AsyncClient, with deck generation in the bounded pipeline
+  executor (PIPELINE_EXECUTOR_WORKERS).
+
+All --uploads deck requests are sent at once. Meanwhile a probe GETs the home
+page every --probe-interval seconds, showing how responsive the server stays
+for light requests under load. Reported: wall time for all uploads, upload
+latency, probe latency percentiles and the peak number of threads.
+"""
+import argparse
+import asyncio
+import io
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import django
+import numpy as np
+import pandas as pd
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "hr_automation_tool.settings")
+django.setup()
+
+from asgiref.sync import async_to_sync  # noqa: E402
+from django.core.files.uploadedfile import SimpleUploadedFile  # noqa: E402
+from django.test import AsyncClient, Client  # noqa: E402
+from django.urls import reverse  # noqa: E402
+
+from benchmarks.bench_slide_layout import make_wishes  # noqa: E402
+
+
+def make_upload(wishes, seed=0):
+    wish_text, names = zip(*make_wishes(wishes, seed))
+    buffer = io.BytesIO()
+    pd.DataFrame({"Wishes": wish_text, "Name": names}).to_excel(buffer, index=False)
+    return buffer.getvalue()
+
+
+async def drain(response):
+    return [chunk async for chunk in response.streaming_content]
+
+
+def upload_data(payload):
+    return {"name": "Asha", "years": "2", "file": SimpleUploadedFile("wishes.xlsx", payload)}
+
+
+class ThreadPeak:
+    """Samples threading.active_count() in the background and keeps the maximum."""
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.peak = threading.active_count()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, threading.active_count())
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def run_wsgi(payload, uploads, probe_interval):
+    def upload():
+        start = time.perf_counter()
+        response = Client().post(reverse("ppt_automation"), upload_data(payload))
+        assert response.status_code == 200, response.status_code
+        # The view streams from an async iterator; WSGI has to drain it through an event loop
+        async_to_sync(drain)(response)
+        return time.perf_counter() - start
+
+    probes, done = [], threading.Event()
+
+    def probe():
+        client = Client()
+        while not done.is_set():
+            start = time.perf_counter()
+            client.get(reverse("home"))
+            probes.append(time.perf_counter() - start)
+            done.wait(probe_interval)
+
+    with ThreadPeak() as threads:
+        prober = threading.Thread(target=probe)
+        prober.start()
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=uploads) as pool:
+            latencies = list(pool.map(lambda _: upload(), range(uploads)))
+        wall = time.perf_counter() - start
+        done.set()
+        prober.join()
+    return wall, latencies, probes, threads.peak
+
+
+async def _run_asgi(payload, uploads, probe_interval):
+    client = AsyncClient()
+
+    async def upload():
+        start = time.perf_counter()
+        response = await client.post(reverse("ppt_automation"), upload_data(payload))
+        assert response.status_code == 200, response.status_code
+        await drain(response)
+        return time.perf_counter() - start
+
+    probes, done = [], asyncio.Event()
+
+    async def probe():
+        while not done.is_set():
+            start = time.perf_counter()
+            await client.get(reverse("home"))
+            probes.append(time.perf_counter() - start)
+            await asyncio.sleep(probe_interval)
+
+    prober = asyncio.create_task(probe())
+    start = time.perf_counter()
+    latencies = await asyncio.gather(*(upload() for _ in range(uploads)))
+    wall = time.perf_counter() - start
+    done.set()
+    await prober
+    return wall, latencies, probes
+
+
+def run_asgi(payload, uploads, probe_interval):
+    with ThreadPeak() as threads:
+        wall, latencies, probes = asyncio.run(_run_asgi(payload, uploads, probe_interval))
+    return wall, latencies, probes, threads.peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--uploads", type=int, default=16, help="deck requests sent at once")
+    parser.add_argument("--wishes", type=int, default=200, help="wishes per uploaded workbook")
+    parser.add_argument("--probe-interval", type=float, default=0.02)
+    args = parser.parse_args()
+
+    payload = make_upload(args.wishes)
+    # Warm the template cache and imports outside the timings
+    Client().post(reverse("ppt_automation"), upload_data(payload))
+
+    print(f"{args.uploads} concurrent uploads of {args.wishes} wishes ({len(payload) / 1024:.0f} KB each)")
+    print(f"{'mode':>5} {'wall s':>7} {'upload p50':>11} {'upload max':>11} "
+          f"{'probe p50 ms':>13} {'probe p95 ms':>13} {'probes':>7} {'threads':>8}")
+    for mode, run in [("wsgi", run_wsgi), ("asgi", run_asgi)]:
+        wall, latencies, probes, threads = run(payload, args.uploads, args.probe_interval)
+        probe_ms = np.array(probes) * 1000
+        print(f"{mode:>5} {wall:>7.2f} {np.median(latencies):>11.2f} {max(latencies):>11.2f} "
+              f"{np.percentile(probe_ms, 50):>13.1f} {np.percentile(probe_ms, 95):>13.1f} "
+              f"{len(probes):>7} {threads:>8}")
+
+
+if __name__ == "__main__":
+    main()
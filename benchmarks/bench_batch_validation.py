@@ -0,0 +1,73 @@
+"""Time validating a month-end batch file by file vs as one batch.
+
+Usage:
+    python -m benchmarks.bench_batch_validation [--files 20 60] [--sheets 1] [--rows 500] [--workers 1 4]
+
+"per file" repeats what one upload per file costs: run() then
+write_validation_zip() for each workbook, so summary tracking is written once
+per file and every file gets its own ZIP. "batch" is run_batch() over all
+workbooks with --workers processes, then write_batch_zip(), which writes one
+ZIP, one consolidated summary and summary tracking once. Reported: total
+seconds, files and rows per second, and summary tracking writes.
+"""
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+import time
+import warnings
+from unittest.mock import patch
+
+from benchmarks.synthetic import write_workbook
+from scripts.timesheet_validation import OutputManager, SummaryStore, TimeValidator
+
+
+def per_file(paths, manager, workers):
+    for path in paths:
+        manager.write_validation_zip(TimeValidator().run(path))
+
+
+def batch(paths, manager, workers):
+    results = TimeValidator().run_batch(paths, workers)
+    manager.write_batch_zip(results, os.path.join(manager.output_dir, "batch.zip"))
+
+
+def measure(func, paths, out_dir, workers):
+    manager = OutputManager(*(os.path.join(out_dir, name) for name in ("output", "archive", "validation")))
+    with patch.object(SummaryStore, "append", autospec=True, side_effect=SummaryStore.append) as append, \
+            contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        func(paths, manager, workers)
+        elapsed = time.perf_counter() - start
+    return elapsed, append.call_count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, nargs="+", default=[20, 60])
+    parser.add_argument("--sheets", type=int, default=1, help="employee sheets per workbook")
+    parser.add_argument("--rows", type=int, default=500, help="rows per sheet")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4])
+    args = parser.parse_args()
+
+    warnings.simplefilter("ignore", UserWarning)
+    print(f"{os.cpu_count()} CPUs")
+    print(f"{'files':>6} {'mode':>12} {'seconds':>8} {'files/s':>8} {'rows/s':>9} {'summary writes':>15}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for count in args.files:
+            paths = [write_workbook(os.path.join(tmp, f"employee_{i}.xlsx"), args.sheets, args.rows, seed=i)
+                     for i in range(count)]
+            rows = count * args.sheets * args.rows
+            modes = [("per file", per_file, 1)] + [(f"batch x{w}", batch, w) for w in args.workers]
+            for name, func, workers in modes:
+                with tempfile.TemporaryDirectory() as out_dir:
+                    elapsed, writes = measure(func, paths, out_dir, workers)
+                print(f"{count:>6} {name:>12} {elapsed:>8.2f} {count / elapsed:>8.1f} "
+                      f"{rows / elapsed:>9.0f} {writes:>15}")
+            for path in paths:
+                os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
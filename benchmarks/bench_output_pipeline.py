@@ -0,0 +1,101 @@
+"""Compare bytes written and time of the old and streaming output paths.
+
+Usage:
+    python -m benchmarks.bench_output_pipeline [--sheets 5 20] [--rows 2000] [--compresslevel 6]
+
+"files + zip" is save_validated_data followed by create_zip_archive, which
+writes both workbooks to disk and then reads them back into the archive.
+"streamed zip" is write_validation_zip, which writes both workbooks straight
+into the ZIP members. "zip stream" is stream_validation_zip read to the end
+the way the upload view sends it, with nothing written to disk. Summary
+tracking is disabled for all of them so only the workbook output is
+measured. Bytes written come from /proc/self/io where available, otherwise
+from the size of the files left behind.
+
+"first byte" is when a download could start: once the archive is complete
+for the first two modes, at the first chunk for the zip stream.
+"""
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+import time
+import warnings
+
+from benchmarks.synthetic import write_workbook
+from scripts.timesheet_validation import OutputManager, TimeValidator
+
+
+def bytes_written():
+    try:
+        with open("/proc/self/io") as f:
+            for line in f:
+                if line.startswith("wchar:"):
+                    return int(line.split()[1])
+    except OSError:
+        return None
+
+
+def tree_size(path):
+    return sum(os.path.getsize(os.path.join(root, name))
+               for root, _, files in os.walk(path) for name in files)
+
+
+def measure(func, out_dir):
+    before = bytes_written()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        first_byte = func()
+    elapsed = time.perf_counter() - start
+    after = bytes_written()
+    written = after - before if before is not None else tree_size(out_dir)
+    first_byte = elapsed if first_byte is None else first_byte - start
+    return elapsed, first_byte, written / 2**20, tree_size(out_dir) / 2**20
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sheets", type=int, nargs="+", default=[5, 20])
+    parser.add_argument("--rows", type=int, default=2000, help="rows per sheet")
+    parser.add_argument("--compresslevel", type=int, default=None, help="deflate level of non-xlsx members")
+    args = parser.parse_args()
+
+    warnings.simplefilter("ignore", UserWarning)
+
+    def files_then_zip(manager, result):
+        manager.create_zip_archive(manager.save_validated_data(result))
+
+    def streamed_zip(manager, result):
+        manager.write_validation_zip(result)
+
+    def zip_stream(manager, result):
+        stream = manager.stream_validation_zip(result)
+        stream.read_chunk()
+        first_byte = time.perf_counter()
+        for _ in stream:
+            pass
+        return first_byte
+
+    modes = {"files + zip": files_then_zip, "streamed zip": streamed_zip, "zip stream": zip_stream}
+
+    print(f"{'sheets':>7} {'rows':>8} {'mode':>13} {'seconds':>8} {'first byte':>11} "
+          f"{'written MB':>11} {'on disk MB':>11}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for sheets in args.sheets:
+            path = write_workbook(os.path.join(tmp, f"bench_{sheets}.xlsx"), sheets, args.rows)
+            with contextlib.redirect_stdout(io.StringIO()):
+                result = TimeValidator().run(path)
+            for mode, func in modes.items():
+                out_dir = os.path.join(tmp, f"{mode.replace(' ', '_')}_{sheets}")
+                manager = OutputManager(os.path.join(out_dir, "out"), os.path.join(out_dir, "archive"),
+                                        os.path.join(out_dir, "validation"), args.compresslevel)
+                manager.add_to_summary_tracking = lambda *a, **k: None
+                manager.add_to_master_summary = lambda *a, **k: None
+                elapsed, first_byte, written, on_disk = measure(lambda: func(manager, result), out_dir)
+                print(f"{sheets:>7} {sheets * args.rows:>8} {mode:>13} {elapsed:>8.2f} {first_byte:>11.3f} "
+                      f"{written:>11.1f} {on_disk:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""Benchmark serial vs process-pool TimeValidator.run by sheet count.
+
+Usage:
+    python -m benchmarks.bench_parallel_run [--sheets 10 50 100 200] [--rows 31] [--workers N]
+"""
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+import time
+import warnings
+
+import pandas as pd
+
+from benchmarks.synthetic import write_workbook
+from scripts.timesheet_validation import TimeValidator
+
+
+def timed_run(validator, path):
+    start = time.perf_counter()
+    # Keep the pipeline's progress prints out of the results table
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = validator.run(path)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sheets", type=int, nargs="+", default=[10, 50, 100, 200])
+    parser.add_argument("--rows", type=int, default=31, help="rows per sheet")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    warnings.simplefilter("ignore", UserWarning)
+    print(f"workers={args.workers}")
+    print(f"{'sheets':>7} {'serial s':>10} {'parallel s':>11} {'speedup':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for sheets in args.sheets:
+            path = write_workbook(os.path.join(tmp, f"bench_{sheets}.xlsx"), sheets, args.rows)
+
+            serial_time, serial = timed_run(TimeValidator(), path)
+            parallel_time, parallel = timed_run(TimeValidator(workers=args.workers), path)
+
+            assert list(serial["validated_sheets"]) == list(parallel["validated_sheets"])
+            for name, df in serial["validated_sheets"].items():
+                pd.testing.assert_frame_equal(df, parallel["validated_sheets"][name])
+            pd.testing.assert_frame_equal(serial["summary"], parallel["summary"])
+
+            print(f"{sheets:>7} {serial_time:>10.2f} {parallel_time:>11.2f} {serial_time / parallel_time:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+"""Time each stage of the timesheet validation pipeline and record the results.
+
+Usage:
+    python -m benchmarks.bench_pipeline [--sheets 20] [--rows 500] [--repeat 3]
+        [--leave-share 0.25] [--weekend-share 0.1] [--messy-dates 0.3]
+        [--blank-descriptions 0.2] [--text-hours] [--output benchmarks/pipeline_results.jsonl]
+
+A synthetic workbook is generated once, then the stages run in order on it:
+read_excel, standardize_column_names, validate (TimeValidator.validate_with_issues,
+which standardizes again internally), create_summary, save_validated_data,
+create_zip_archive and write_validation_zip (the streamed replacement for the
+last two). Times are the best of --repeat runs; peak memory is measured in a
+separate tracemalloc pass so tracing does not slow the timed runs.
+
+Every run appends one JSON line to --output with the commit, the settings
+and per-stage seconds, rows/s and peak MB. The table shows the change from
+the last recorded run with the same settings, so regressions stand out.
+The default output file is local history and ignored by git.
+--text-hours puts text such as '8h' in Hours, which validation reads as
+missing and reports as an invalid hour format. Stages that fail are
+recorded with their error and later stages skipped.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import subprocess
+import tempfile
+import time
+import tracemalloc
+import warnings
+from datetime import datetime
+
+import pandas as pd
+
+from benchmarks.synthetic import write_workbook
+from scripts.timesheet_validation import OutputManager, TimeValidator
+
+STAGES = ["read_excel", "standardize_column_names", "validate", "create_summary",
+          "save_validated_data", "create_zip_archive", "write_validation_zip"]
+
+
+def current_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_pipeline(path, work_dir, trace=False):
+    """Run every stage once; returns {stage: seconds or peak MB} and {stage: error}."""
+    validator = TimeValidator()
+    manager = OutputManager(os.path.join(work_dir, "out"), os.path.join(work_dir, "archive"),
+                            os.path.join(work_dir, "validation"))
+    state = {}
+
+    def read_excel():
+        state["sheets"] = pd.read_excel(path, sheet_name=None)
+
+    def standardize():
+        state["standardized"] = {name: validator.standardize_column_names(df) for name, df in state["sheets"].items()}
+
+    def validate():
+        state["validated"], state["issues"] = {}, {}
+        for name, df in state["standardized"].items():
+            state["validated"][name], state["issues"][name] = validator.validate_with_issues(df)
+
+    def create_summary():
+        summary = validator.create_summary(state["validated"], state["issues"])
+        summary["File Name"] = os.path.basename(path)
+        state["result"] = {"file_path": path, "validated_sheets": state["validated"], "summary": summary,
+                           "issues": state["issues"], "success": True}
+
+    def save_validated_data():
+        state["saved_path"] = manager.save_validated_data(state["result"])
+
+    def create_zip_archive():
+        manager.create_zip_archive(state["saved_path"], os.path.join(work_dir, "files_then_zip.zip"))
+
+    def write_validation_zip():
+        manager.write_validation_zip(state["result"], zip_path=os.path.join(work_dir, "streamed.zip"))
+
+    steps = [read_excel, standardize, validate, create_summary, save_validated_data,
+             create_zip_archive, write_validation_zip]
+    measurements, errors = {}, {}
+    for stage, step in zip(STAGES, steps):
+        if trace:
+            tracemalloc.start()
+        start = time.perf_counter()
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                step()
+        except Exception as e:
+            errors[stage] = f"{type(e).__name__}: {e}"
+            break
+        finally:
+            elapsed = time.perf_counter() - start
+            if trace:
+                measurements[stage] = tracemalloc.get_traced_memory()[1] / 2**20
+                tracemalloc.stop()
+        if not trace:
+            measurements[stage] = elapsed
+    return measurements, errors
+
+
+def previous_run(output, settings):
+    if not os.path.exists(output):
+        return None
+    last = None
+    with open(output) as f:
+        for line in f:
+            record = json.loads(line)
+            if record.get("settings") == settings:
+                last = record
+    return last
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sheets", type=int, default=20)
+    parser.add_argument("--rows", type=int, default=500, help="rows per sheet")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs; the fastest is kept")
+    parser.add_argument("--leave-share", type=float, default=0.25)
+    parser.add_argument("--weekend-share", type=float, default=0.1)
+    parser.add_argument("--messy-dates", type=float, default=0.0, help="fraction of free-form date strings")
+    parser.add_argument("--blank-descriptions", type=float, default=0.2)
+    parser.add_argument("--text-hours", action="store_true", help="put text values such as '8h' in Hours, reported as invalid hour format")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc pass")
+    parser.add_argument("--output", default=os.path.join(os.path.dirname(__file__), "pipeline_results.jsonl"))
+    args = parser.parse_args()
+
+    warnings.simplefilter("ignore", UserWarning)
+    settings = {
+        "sheets": args.sheets, "rows": args.rows, "leave_share": args.leave_share,
+        "weekend_share": args.weekend_share, "messy_dates": args.messy_dates,
+        "blank_descriptions": args.blank_descriptions, "text_hours": args.text_hours,
+    }
+    total_rows = args.sheets * args.rows
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = write_workbook(
+            os.path.join(tmp, "bench.xlsx"), args.sheets, args.rows,
+            leave_share=args.leave_share, weekend_share=args.weekend_share, messy_dates=args.messy_dates,
+            blank_descriptions=args.blank_descriptions, text_hours=args.text_hours)
+        file_mb = os.path.getsize(path) / 2**20
+
+        timings, errors = {}, {}
+        for i in range(args.repeat):
+            seconds, errors = run_pipeline(path, os.path.join(tmp, f"run_{i}"))
+            for stage, elapsed in seconds.items():
+                timings[stage] = min(elapsed, timings.get(stage, elapsed))
+        peaks = {} if args.no_memory else run_pipeline(path, os.path.join(tmp, "trace"), trace=True)[0]
+
+    stages = {stage: {"seconds": round(timings[stage], 4),
+                      "rows_per_second": round(total_rows / timings[stage]) if timings[stage] else None,
+                      "peak_mb": round(peaks[stage], 2) if stage in peaks else None}
+              for stage in STAGES if stage in timings}
+    record = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "commit": current_commit(),
+        "settings": settings,
+        "file_mb": round(file_mb, 2),
+        "stages": stages,
+        "errors": errors,
+    }
+    previous = previous_run(args.output, settings)
+
+    print(f"{total_rows} rows in {args.sheets} sheets, {file_mb:.1f} MB"
+          + (f"; compared with {previous['commit']} ({previous['timestamp']})" if previous else ""))
+    print(f"{'stage':>25} {'seconds':>8} {'rows/s':>10} {'peak MB':>8} {'vs last':>8}")
+    for stage, values in stages.items():
+        change = ""
+        before = previous["stages"].get(stage) if previous else None
+        if before and before["seconds"]:
+            change = f"{(values['seconds'] / before['seconds'] - 1) * 100:+.0f}%"
+        peak = f"{values['peak_mb']:.1f}" if values["peak_mb"] is not None else "-"
+        print(f"{stage:>25} {values['seconds']:>8.3f} {values['rows_per_second'] or 0:>10} {peak:>8} {change:>8}")
+    for stage, error in errors.items():
+        print(f"{stage:>25} failed: {error}")
+
+    with open(args.output, "a") as f:
+        f.write(json.dumps(record) + "\n")
+    print(f"Results appended to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Compare slide count, deck size and build time of wish packing strategies.
+
+Usage:
+    python -m benchmarks.bench_slide_layout [--wishes 10 50 300 1000] [--seed 0]
+
+"paired" is the original loop (two wishes per slide when both are under 120
+characters, see benchmarks.legacy); "packed" is pack_wishes, which fits as
+many wishes per slide as their estimated text height allows. Both start from
+the same cached, trimmed template and the timing covers adding the wish
+slides and saving the deck.
+"""
+import argparse
+import io
+import os
+import time
+
+import numpy as np
+
+from benchmarks.legacy import add_wish_slides_paired
+from scripts.ppt_generator import _add_wishes, template_cache
+from scripts.slide_layout import pack_wishes
+
+TEMPLATE_PATH = os.path.join(os.path.dirname(__file__), os.pardir, "media", "WorkAnniversaryLogo.pptx")
+PHRASES = ["Happy work anniversary!", "Thank you for everything you do for the team.",
+           "Congratulations on another great year.", "Your dedication inspires all of us every day.",
+           "Wishing you many more years of success and growth here.",
+           "It has been a pleasure working with you on so many projects."]
+NAMES = ["Ravi", "Meena Krishnan", "John", "Priya S", "Alexander Fitzgerald", "Li"]
+
+
+def make_wishes(count, seed=0):
+    """Wishes of one to six phrases, so most fall between 25 and 300 characters."""
+    rng = np.random.default_rng(seed)
+    return [(" ".join(rng.choice(PHRASES, size=rng.integers(1, 7))), str(rng.choice(NAMES)))
+            for _ in range(count)]
+
+
+def build_paired(wishes):
+    prs = template_cache.get(TEMPLATE_PATH, 1)
+    add_wish_slides_paired(prs, wishes, prs.slide_layouts[-1])
+    return prs
+
+
+def build_packed(wishes):
+    prs = template_cache.get(TEMPLATE_PATH, 1)
+    for slide_wishes in pack_wishes(wishes):
+        slide = prs.slides.add_slide(prs.slide_layouts[-1])
+        _add_wishes(slide, slide_wishes)
+    return prs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--wishes", type=int, nargs="+", default=[10, 50, 300, 1000])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    template_cache.get(TEMPLATE_PATH, 1)  # load outside the timings
+    print(f"{'wishes':>7} {'layout':>7} {'slides':>7} {'deck KB':>8} {'seconds':>8}")
+    for count in args.wishes:
+        wishes = make_wishes(count, args.seed)
+        for name, build in [("paired", build_paired), ("packed", build_packed)]:
+            start = time.perf_counter()
+            prs = build(wishes)
+            buffer = io.BytesIO()
+            prs.save(buffer)
+            elapsed = time.perf_counter() - start
+            # The trimmed template's year slide is not a wish slide
+            slides = len(prs.slides) - 1
+            print(f"{count:>7} {name:>7} {slides:>7} {len(buffer.getvalue()) / 1024:>8.0f} {elapsed:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Compare peak memory of eager and streaming workbook validation.
+
+Usage:
+    python -m benchmarks.bench_streaming_read [--sheets 5 20 80] [--rows 2000] [--chunk-size 5000]
+
+"eager" is pd.read_excel(sheet_name=None) followed by validate. "streaming"
+consumes TimeValidator.iter_validated_chunks without keeping the chunks,
+which is the constant-memory path; "streaming (kept)" is
+validate_sheets_streaming, which also holds every validated sheet.
+
+End to end: "eager zip" is run() then write_validation_zip, as validation
+jobs do by default; "streaming zip" is write_validation_zip_streaming, as
+they do with TIMESHEET_READ_CHUNK_ROWS set.
+"""
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+import time
+import tracemalloc
+import warnings
+
+from benchmarks.synthetic import write_workbook
+from scripts.timesheet_validation import OutputManager, TimeValidator
+
+
+def measure(func):
+    tracemalloc.start()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        func()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / 2**20
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sheets", type=int, nargs="+", default=[5, 20, 80])
+    parser.add_argument("--rows", type=int, default=2000, help="rows per sheet")
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    args = parser.parse_args()
+
+    warnings.simplefilter("ignore", UserWarning)
+    streaming = TimeValidator(chunk_size=args.chunk_size)
+
+    print(f"{'sheets':>7} {'file MB':>8} {'mode':>17} {'seconds':>8} {'peak MB':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = OutputManager(*(os.path.join(tmp, name) for name in ("output", "archive", "validation")))
+        zip_path = os.path.join(tmp, "result.zip")
+        modes = {
+            "eager": lambda path: TimeValidator().validate_sheets(path),
+            "streaming": lambda path: sum(1 for _ in streaming.iter_validated_chunks(path)),
+            "streaming (kept)": lambda path: streaming.validate_sheets_streaming(path),
+            "eager zip": lambda path: manager.write_validation_zip(TimeValidator().run(path), zip_path=zip_path),
+            "streaming zip": lambda path: manager.write_validation_zip_streaming(streaming, path, zip_path=zip_path),
+        }
+        for sheets in args.sheets:
+            path = write_workbook(os.path.join(tmp, f"bench_{sheets}.xlsx"), sheets, args.rows)
+            size = os.path.getsize(path) / 2**20
+            for mode, func in modes.items():
+                elapsed, peak = measure(lambda: func(path))
+                print(f"{sheets:>7} {size:>8.1f} {mode:>17} {elapsed:>8.2f} {peak:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Time adding wish slides with per-property styling vs cloned text boxes.
+
+Usage:
+    python -m benchmarks.bench_text_boxes [--wishes 100 300 1000] [--repeat 3] [--seed 0] [--profile]
+
+"per-property" styles every wish and signer box through python-pptx font
+setters (benchmarks.legacy); "cloned" is _add_wishes, which copies a box
+pre-built by TextBoxFactory. Both fill the same packed slides of the cached,
+trimmed template, and the timing covers adding the slides and their text
+boxes but not saving. Times are the best of --repeat runs. With --profile
+the largest deck is also run under cProfile for each variant and the top
+functions by cumulative time are printed.
+"""
+import argparse
+import cProfile
+import pstats
+import time
+
+from benchmarks.bench_slide_layout import TEMPLATE_PATH, make_wishes
+from benchmarks.legacy import add_wish_styled_per_property
+from scripts.ppt_generator import _add_wishes, template_cache
+from scripts.slide_layout import pack_wishes
+
+
+def add_per_property(slide, placements):
+    for placement in placements:
+        add_wish_styled_per_property(slide, placement)
+
+
+def build(wishes, add_wishes):
+    prs = template_cache.get(TEMPLATE_PATH, 1)
+    layout = prs.slide_layouts[-1]
+    for slide_wishes in pack_wishes(wishes):
+        add_wishes(prs.slides.add_slide(layout), slide_wishes)
+    return prs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--wishes", type=int, nargs="+", default=[100, 300, 1000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--profile", action="store_true", help="cProfile the largest deck")
+    args = parser.parse_args()
+
+    variants = [("per-property", add_per_property), ("cloned", _add_wishes)]
+    template_cache.get(TEMPLATE_PATH, 1)  # load outside the timings
+    print(f"{'wishes':>7} {'slides':>7} {'variant':>13} {'seconds':>8} {'ms/slide':>9}")
+    for count in args.wishes:
+        wishes = make_wishes(count, args.seed)
+        slides = len(pack_wishes(wishes))
+        for name, add_wishes in variants:
+            best = None
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                build(wishes, add_wishes)
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+            print(f"{count:>7} {slides:>7} {name:>13} {best:>8.3f} {best / slides * 1000:>9.2f}")
+
+    if args.profile:
+        wishes = make_wishes(max(args.wishes), args.seed)
+        for name, add_wishes in variants:
+            profiler = cProfile.Profile()
+            profiler.runcall(build, wishes, add_wishes)
+            print(f"\n{name}, {len(wishes)} wishes:")
+            pstats.Stats(profiler).strip_dirs().sort_stats("cumulative").print_stats(12)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Benchmark TimeValidator.validate against the original row-by-row loop.
+
+Usage:
+    python -m benchmarks.bench_validate [--sizes 1000 10000 100000 1000000] [--legacy-max 20000] [--messy]
+
+The legacy loop is only timed up to ``--legacy-max`` rows; past that it takes
+minutes per run. Wherever both are timed, the typed columns of validate are
+checked against the legacy loop's Date, Status and Flag text.
+"""
+import argparse
+import time
+import warnings
+
+import pandas as pd
+
+from benchmarks.legacy import validate_rowwise
+from benchmarks.synthetic import make_sheet
+from scripts.timesheet_validation import TimeValidator, format_validated_sheet
+
+
+def time_call(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+
+def check_against_legacy(fast, legacy):
+    exported = format_validated_sheet(fast)
+    # The legacy loop prints hours as stored, "found 6.0 hrs" where export says "found 6 hrs"
+    legacy_status = legacy["Status"].astype(str).str.replace(r"found (-?\d+)\.0 hrs$", r"found \1 hrs", regex=True)
+    assert (exported["Status"].to_numpy() == legacy_status.to_numpy()).all(), "Status differs"
+    assert (exported["Flag"].to_numpy() == legacy["Flag"].to_numpy()).all(), "Flag differs"
+    legacy_dates = pd.to_datetime(legacy["Date"]).astype(fast["Date"].dtype)
+    pd.testing.assert_series_equal(fast["Date"], legacy_dates)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000, 1_000_000])
+    parser.add_argument("--legacy-max", type=int, default=20_000)
+    parser.add_argument("--messy", action="store_true", help="use text hours and free-form date strings")
+    args = parser.parse_args()
+
+    warnings.simplefilter("ignore", UserWarning)
+    validator = TimeValidator()
+
+    print(f"{'rows':>10} {'columnar s':>12} {'rows/s':>12} {'legacy s':>10} {'speedup':>8}")
+    for rows in args.sizes:
+        df = make_sheet(rows, messy=args.messy)
+        fast_time, fast = time_call(validator.validate, df)
+
+        legacy_col, speedup_col = "-", "-"
+        if rows <= args.legacy_max:
+            legacy_time, legacy = time_call(validate_rowwise, validator, df)
+            check_against_legacy(fast, legacy)
+            legacy_col = f"{legacy_time:.3f}"
+            speedup_col = f"{legacy_time / fast_time:.0f}x"
+
+        print(f"{rows:>10} {fast_time:>12.3f} {rows / fast_time:>12.0f} {legacy_col:>10} {speedup_col:>8}")
+
+
+if __name__ == "__main__":
+    main()
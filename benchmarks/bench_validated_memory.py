@@ -0,0 +1,85 @@
+"""Measure the memory of validated sheets with typed columns vs object strings.
+
+Usage:
+    python -m benchmarks.bench_validated_memory [--sizes 100000 1000000] [--messy] [--repeat 3]
+
+"object" is the layout validate used to return (benchmarks.legacy.to_object_frame):
+Date, Hours, Status and Flag as Python objects, with Status and Flag text
+built per row. "typed" is validate's output: datetime64 Date, Float64 Hours,
+categorical Status and uint8 Flag bits. Memory is DataFrame.memory_usage(deep=True)
+for the four columns and for the whole frame.
+
+Also timed, best of --repeat: counting weekend and non-standard rows with
+str.contains/str.startswith on the text vs bit and category tests on the
+typed columns, and format_validated_sheet, the cost now paid at export.
+"""
+import argparse
+import time
+import warnings
+
+import numpy as np
+
+from benchmarks.legacy import to_object_frame
+from benchmarks.synthetic import make_sheet
+from scripts.timesheet_validation import FLAG_WEEKEND_BIT, TimeValidator, format_validated_sheet
+
+COLUMNS = ["Date", "Hours", "Status", "Flag"]
+
+
+def best_of(repeat, func, *args):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def scan_text(df):
+    weekend = df["Flag"].str.contains("Weekend filled", regex=False).sum()
+    non_standard = df["Status"].str.startswith("Full working day should be 8 hrs").sum()
+    return weekend, non_standard
+
+
+def scan_typed(df):
+    weekend = np.count_nonzero(df["Flag"].to_numpy() & FLAG_WEEKEND_BIT)
+    non_standard = (df["Status"] == "non_standard").sum()
+    return weekend, non_standard
+
+
+def mib(nbytes):
+    return nbytes / 2 ** 20
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--messy", action="store_true", help="use text hours and free-form date strings")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    warnings.simplefilter("ignore", UserWarning)
+    validator = TimeValidator()
+
+    print(f"{'rows':>9} {'layout':>7} " + " ".join(f"{col + ' MiB':>11}" for col in COLUMNS)
+          + f" {'frame MiB':>10} {'scan ms':>8} {'export ms':>10}")
+    for rows in args.sizes:
+        typed = validator.validate(make_sheet(rows, messy=args.messy))
+        text = to_object_frame(typed)
+        assert scan_text(text) == scan_typed(typed)
+
+        totals = {}
+        for layout, df, scan in [("object", text, scan_text), ("typed", typed, scan_typed)]:
+            usage = df.memory_usage(deep=True, index=False)
+            totals[layout] = usage.sum()
+            scan_ms = best_of(args.repeat, scan, df) * 1000
+            export = f"{best_of(args.repeat, format_validated_sheet, df) * 1000:.1f}" if layout == "typed" else "-"
+            print(f"{rows:>9} {layout:>7} " + " ".join(f"{mib(usage[col]):>11.2f}" for col in COLUMNS)
+                  + f" {mib(totals[layout]):>10.2f} {scan_ms:>8.1f} {export:>10}")
+        print(f"{'':>9} {'saved':>7} {mib(totals['object'] - totals['typed']):>11.2f} MiB "
+              f"({1 - totals['typed'] / totals['object']:.0%} of the frame)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Time loading wishes from a form export: row-by-row vs columnar, xlsx vs CSV.
+
+Usage:
+    python -m benchmarks.bench_wish_loading [--rows 1000 10000 50000] [--repeat 3] [--seed 0]
+
+The synthetic export looks like a Google Form download: a timestamp, email,
+name, wish and a few survey columns the deck never uses, with some blank
+rows. "rowwise" is the old read_excel + iterrows loop (benchmarks.legacy);
+"columnar" is load_wish_table + read_wishes reading only Name and Wishes,
+from the same data saved as xlsx and as CSV. Times are the best of --repeat.
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.bench_slide_layout import NAMES, PHRASES
+from benchmarks.legacy import read_wishes_rowwise
+from scripts.ppt_generator import load_wish_table, read_wishes
+
+
+def make_export(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    wishes = [" ".join(rng.choice(PHRASES, size=rng.integers(1, 4))) for _ in range(rows)]
+    names = rng.choice(NAMES, size=rows).astype(object)
+    names[rng.random(rows) < 0.03] = None
+    return pd.DataFrame({
+        "Timestamp": pd.date_range("2025-03-01", periods=rows, freq="min"),
+        "Email Address": [f"user{i}@example.com" for i in range(rows)],
+        "Name": names,
+        "Wishes": np.where(rng.random(rows) < 0.03, None, wishes),
+        "Team": rng.choice(["Engineering", "HR", "Finance"], size=rows),
+        "Rating": rng.integers(1, 6, size=rows),
+        "Comments": rng.choice(["", "Great!", "Looking forward to the party"], size=rows),
+    })
+
+
+def best_of(repeat, func, *args):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{'rows':>7} {'variant':>16} {'seconds':>8} {'wishes':>7}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in args.rows:
+            export = make_export(rows, args.seed)
+            xlsx_path, csv_path = os.path.join(tmp, "wishes.xlsx"), os.path.join(tmp, "wishes.csv")
+            export.to_excel(xlsx_path, index=False)
+            export.to_csv(csv_path, index=False)
+            variants = [
+                ("rowwise xlsx", read_wishes_rowwise, xlsx_path),
+                ("columnar xlsx", lambda path: read_wishes(load_wish_table(path)), xlsx_path),
+                ("columnar csv", lambda path: read_wishes(load_wish_table(path)), csv_path),
+            ]
+            for name, load, path in variants:
+                seconds, wishes = best_of(args.repeat, load, path)
+                print(f"{rows:>7} {name:>16} {seconds:>8.3f} {len(wishes):>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+"""Reference copies of the original row-by-row implementations.
+
+Kept only so the benchmarks can time the old code paths and check that the
+optimized ones produce the same output.
+"""
+import pandas as pd
+from dateutil.parser import parse
+from pptx.dml.color import RGBColor
+from pptx.util import Inches, Pt
+
+from scripts.slide_layout import (FONT_SIZE, SIGNER_LEFT, SIGNER_WIDTH, WISH_LEFT, WISH_WIDTH,
+                                  signer_text)
+from scripts.timesheet_validation import format_validated_sheet
+
+
+def validate_rowwise(validator, df):
+    """TimeValidator.validate as it was before the columnar rule engine."""
+    df = validator.standardize_column_names(df)
+
+    required_columns = ["Client", "Sheet Name", "Hours"]
+    for col in required_columns:
+        if col not in df.columns:
+            df[col] = None
+
+    df["Status"] = "Valid"
+    df["Flag"] = ""
+
+    for index, row in df.iterrows():
+        client = str(row["Client"]).strip() if pd.notna(row["Client"]) else ""
+        hours = row["Hours"]
+
+        date_val = row.get("Date", "")
+        weekday = ""
+        try:
+            if pd.notna(date_val):
+                weekday = pd.to_datetime(date_val).strftime("%A")
+        except Exception:
+            pass
+        if weekday in ["Saturday", "Sunday"]:
+            if pd.notna(hours) and hours not in [0, "0", "", None]:
+                df.at[index, "Flag"] = (df.at[index, "Flag"] + "⚠ Weekend filled; "
+                                        if df.at[index, "Flag"] else "⚠ Weekend filled; ")
+
+        is_leave_type = any(leave_type.lower() in client.lower() for leave_type in ["leave", "holiday", "weekend"])
+
+        if is_leave_type:
+            if pd.notna(hours) and hours != 0:
+                df.at[index, "Status"] = "Leave/Holiday should be 0 or empty"
+            else:
+                df.at[index, "Status"] = "Valid"
+        else:
+            if pd.notna(hours):
+                if isinstance(hours, (int, float)):
+                    if hours == 4:
+                        df.at[index, "Status"] = "Half-day detected"
+                        df.at[index, "Flag"] = "⚠ Half-Day Alert"
+                    elif hours != 8:
+                        df.at[index, "Status"] = f"Full working day should be 8 hrs, found {hours} hrs"
+                else:
+                    df.at[index, "Status"] = "Invalid Hours Format"
+            else:
+                df.at[index, "Status"] = "Missing hours for a working day"
+
+    for index, row in df.iterrows():
+        description = str(row["Sheet Name"]).strip() if pd.notna(row["Sheet Name"]) else ""
+        if not description:
+            df.at[index, "Flag"] = df.at[index, "Flag"] + "⚠ Blank Description; " if df.at[index, "Flag"] else "⚠ Blank Description; "
+
+    for index, row in df.iterrows():
+        date_str = str(row["Date"])
+        try:
+            parsed_date = parse(date_str)
+            df.at[index, "Date"] = parsed_date.strftime("%Y-%m-%d")
+        except ValueError:
+            df.at[index, "Date"] = None
+
+    return df[["Client", "Date", "Sheet Name", "Hours", "Status", "Flag"]]
+
+
+def to_object_frame(df):
+    """A validated sheet in the object-column layout validate returned before typed columns.
+
+    Date as "YYYY-MM-DD" strings, Hours as Python objects and Status and Flag
+    as their message text, one string per row.
+    """
+    df = format_validated_sheet(df)
+    dates = df["Date"].dt.strftime("%Y-%m-%d").astype(object)
+    return pd.DataFrame({
+        "Client": df["Client"].astype(object),
+        "Date": dates.where(df["Date"].notna(), None),
+        "Sheet Name": df["Sheet Name"].astype(object),
+        "Hours": df["Hours"].astype(object),
+        "Status": df["Status"].astype(object),
+        "Flag": df["Flag"].astype(object),
+    })
+
+
+def add_wish_slides_paired(prs, wishes, blank_layout):
+    """The wish slide loop of generate_presentation before the layout engine.
+
+    Pairs two wishes on a slide when both are under 120 characters and
+    offsets signers by a fixed step per 80 characters.
+    """
+    i = 0
+    while i < len(wishes):
+        wish_text_1, signer_name_1 = wishes[i]
+        wish_text_2, signer_name_2 = None, None
+
+        # Check if next wish exists and both are short
+        if (i + 1 < len(wishes)
+            and len(wish_text_1) < 120  
+            and len(wishes[i + 1][0]) < 120
+        ):
+            wish_text_2, signer_name_2 = wishes[i + 1]
+            i += 2
+        else:
+            i += 1
+
+        slide = prs.slides.add_slide(blank_layout)
+
+        # First wish
+        wish1_top = 1.5
+        txBox1 = slide.shapes.add_textbox(Inches(2), Inches(wish1_top), Inches(7), Inches(1))
+        tf1 = txBox1.text_frame
+        tf1.clear()
+        tf1.word_wrap = True
+        p1 = tf1.add_paragraph()
+        p1.font.name = "Times New Roman"
+        p1.text = wish_text_1
+        p1.font.size = Pt(18)
+        p1.font.bold = False
+        p1.font.italic = False
+        p1.alignment = 1  # Center alignment
+
+        # Dynamic Y for signer based on wish length
+        signer1_offset = 0.5 if len(wish_text_1) < 80 else 1.0 + ((len(wish_text_1) - 80) // 80) * 0.3
+        signer1_top = wish1_top + signer1_offset
+        signer_box1 = slide.shapes.add_textbox(Inches(3), Inches(signer1_top), Inches(5), Inches(0.6))
+        signer_tf1 = signer_box1.text_frame
+        signer_tf1.clear()
+        signer_tf1.word_wrap = True
+        signer_p1 = signer_tf1.add_paragraph()
+        signer_p1.font.name = "Times New Roman"
+        signer_p1.font.color.rgb = RGBColor(255, 0, 0)
+        signer_p1.text = f"- {signer_name_1}"
+        signer_p1.font.size = Pt(18)
+        signer_p1.font.bold = True
+        signer_p1.font.italic = True
+        signer_p1.alignment = 3  # Right alignment
+
+        # Second wish (if present)
+        if wish_text_2:
+            wish2_top = signer1_top + 0.8  # Add space after first signer
+            txBox2 = slide.shapes.add_textbox(Inches(2), Inches(wish2_top), Inches(7), Inches(1))
+            tf2 = txBox2.text_frame
+            tf2.clear()
+            tf2.word_wrap = True
+            p2 = tf2.add_paragraph()
+            p2.font.name = "Times New Roman"
+            p2.text = wish_text_2
+            p2.font.size = Pt(18)
+            p2.font.bold = False
+            p2.font.italic = False
+            p2.alignment = 1  # Center alignment
+
+            # Dynamic Y for second signer
+            signer2_offset = 0.5 if len(wish_text_2) < 80 else 1.0 + ((len(wish_text_2) - 80) // 80) * 0.3
+            signer2_top = wish2_top + signer2_offset
+            signer_box2 = slide.shapes.add_textbox(Inches(3), Inches(signer2_top), Inches(5), Inches(0.6))
+            signer_tf2 = signer_box2.text_frame
+            signer_tf2.clear()
+            signer_tf2.word_wrap = True
+            signer_p2 = signer_tf2.add_paragraph()
+            signer_p2.font.name = "Times New Roman"
+            signer_p2.font.color.rgb = RGBColor(255, 0, 0)
+            signer_p2.text = f"- {signer_name_2}"
+            signer_p2.font.size = Pt(18)
+            signer_p2.font.bold = True
+            signer_p2.font.italic = True
+            signer_p2.alignment = 3  # Right alignment
+
+
+def add_wish_styled_per_property(slide, placement):
+    """_add_wishes for one placement before the text box factory: every font
+    property is set through python-pptx on each new box.
+    """
+    txBox = slide.shapes.add_textbox(Inches(WISH_LEFT), Inches(placement.wish_top),
+                                     Inches(WISH_WIDTH), Inches(placement.wish_height))
+    tf = txBox.text_frame
+    tf.word_wrap = True
+    p = tf.paragraphs[0]
+    p.font.name = "Times New Roman"
+    p.text = placement.wish
+    p.font.size = Pt(FONT_SIZE)
+    p.font.bold = False
+    p.font.italic = False
+    p.alignment = 1  # Center alignment
+
+    signer_box = slide.shapes.add_textbox(Inches(SIGNER_LEFT), Inches(placement.signer_top),
+                                          Inches(SIGNER_WIDTH), Inches(placement.signer_height))
+    signer_tf = signer_box.text_frame
+    signer_tf.word_wrap = True
+    signer_p = signer_tf.paragraphs[0]
+    signer_p.font.name = "Times New Roman"
+    signer_p.font.color.rgb = RGBColor(255, 0, 0)
+    signer_p.text = signer_text(placement.signer)
+    signer_p.font.size = Pt(FONT_SIZE)
+    signer_p.font.bold = True
+    signer_p.font.italic = True
+    signer_p.alignment = 3  # Right alignment
+
+
+def read_wishes_rowwise(excel_path):
+    """generate_presentation's wish loading before load_wish_table/read_wishes."""
+    df = pd.read_excel(excel_path)
+    df.columns = df.columns.str.strip()
+    wishes = []
+    for _, row in df.iterrows():
+        wish = str(row['Wishes']).strip()
+        signer = str(row['Name']).strip()
+        if not wish or wish.lower() == 'nan' or not signer or signer.lower() == 'nan':
+            continue
+        wishes.append((wish, signer))
+    return wishes
@@ -0,0 +1,93 @@
+"""Synthetic timesheet data for the benchmark scripts."""
+import numpy as np
+import pandas as pd
+
+CLIENTS = ["Client - ABC", "Client - Subtask", "Leave", "Holiday", "Weekend", "leave"]
+CLIENT_WEIGHTS = [0.4, 0.35, 0.08, 0.04, 0.1, 0.03]
+LEAVE_CLIENTS = 4  # the last four entries of CLIENTS mark leave/holiday rows
+HOURS = [8.0, 8.0, 8.0, 4.0, 6.0, 7.5, 0.0, np.nan]
+DATE_FORMATS = ["%Y-%m-%d", "%d/%m/%Y", "%d %b %Y", "%B %d, %Y"]
+
+
+def _client_weights(leave_share):
+    if leave_share is None:
+        return CLIENT_WEIGHTS
+    weights = np.array(CLIENT_WEIGHTS)
+    work, leave = weights[:-LEAVE_CLIENTS], weights[-LEAVE_CLIENTS:]
+    return np.concatenate([work / work.sum() * (1 - leave_share), leave / leave.sum() * leave_share])
+
+
+def _dates(rng, rows, weekend_share):
+    month = pd.date_range("2025-03-01", "2025-03-31")
+    if weekend_share is None:
+        return month[np.arange(rows) % len(month)]
+    weekends, weekdays = month[month.dayofweek >= 5], month[month.dayofweek < 5]
+    on_weekend = rng.random(rows) < weekend_share
+    picked = np.where(on_weekend,
+                      weekends.values[rng.integers(0, len(weekends), size=rows)],
+                      weekdays.values[rng.integers(0, len(weekdays), size=rows)])
+    return pd.DatetimeIndex(np.sort(picked))
+
+
+def make_sheet(rows, seed=0, messy=False, leave_share=None, weekend_share=None,
+               messy_dates=None, blank_descriptions=None, text_hours=None):
+    """Build one employee sheet shaped like the uploaded timesheets.
+
+    With ``messy`` the Hours column gets text values and the Date column is
+    written as free-form strings, which forces the object-dtype code paths.
+    The other arguments set the mix explicitly and override ``messy``:
+
+    - ``leave_share``: fraction of rows with a leave/holiday/weekend client
+    - ``weekend_share``: fraction of rows dated on a Saturday or Sunday
+      (by default dates cycle through March 2025)
+    - ``messy_dates``: fraction of dates written as free-form text; the rest
+      stay real dates unless any are text, then they become ISO strings
+    - ``blank_descriptions``: fraction of rows with an empty Description
+    - ``text_hours``: whether some Hours are text such as "8h" or "0"
+    """
+    rng = np.random.default_rng(seed)
+    dates = _dates(rng, rows, weekend_share)
+    client = rng.choice(CLIENTS, size=rows, p=_client_weights(leave_share))
+    hours = rng.choice(HOURS, size=rows)
+    if blank_descriptions is None:
+        description = rng.choice(["Development", "Review", "Testing", "", None], size=rows)
+    else:
+        description = np.where(rng.random(rows) < blank_descriptions, None,
+                               rng.choice(["Development", "Review", "Testing"], size=rows)).astype(object)
+
+    df = pd.DataFrame({
+        "S.No": np.arange(1, rows + 1),
+        "Client": client,
+        "Description": description,
+        "Date": dates,
+        "Duration (in hrs) - \nTotal : 0": hours,
+    })
+    if text_hours is None:
+        text_hours = messy
+    if text_hours:
+        hours_col = df["Duration (in hrs) - \nTotal : 0"].astype(object)
+        hours_col[rng.random(rows) < 0.05] = "8h"
+        hours_col[rng.random(rows) < 0.02] = "0"
+        df["Duration (in hrs) - \nTotal : 0"] = hours_col
+    if messy_dates is None:
+        messy_dates = 1.0 if messy else 0.0
+    if messy_dates:
+        formats = np.array(DATE_FORMATS)
+        picked = np.where(rng.random(rows) < messy_dates, formats[rng.integers(0, len(formats), size=rows)], "%Y-%m-%d")
+        date_text = [d.strftime(f) for d, f in zip(dates, picked)]
+        for i in np.flatnonzero(rng.random(rows) < 0.01 * messy_dates):
+            date_text[i] = "TBD"
+        df["Date"] = pd.Series(date_text, dtype=object)
+    return df
+
+
+def write_workbook(path, sheets, rows, seed=0, messy=False, **mix):
+    """Write a workbook with ``sheets`` employee sheets of ``rows`` rows each.
+
+    Extra keyword arguments are passed to make_sheet to set the data mix.
+    """
+    with pd.ExcelWriter(path) as writer:
+        for i in range(sheets):
+            make_sheet(rows, seed=seed + i, messy=messy, **mix).to_excel(
+                writer, sheet_name=f"Employee {i + 1}", index=False)
+    return path
@@ -1,3 +1,10 @@
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+from scripts.instrumentation import collect, server_timing_header
+
+
 class NgrokBypassMiddleware:
     def __init__(self, get_response):
         self.get_response = get_response
@@ -5,3 +12,39 @@ class NgrokBypassMiddleware:
     def __call__(self, request):
         request.META["HTTP_NGROK_SKIP_BROWSER_WARNING"] = "true"
         return self.get_response(request)
+
+
+class ServerTimingMiddleware:
+    """Collect pipeline stage timings for each request and report them in a Server-Timing header."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self._acall(request)
+        start = time.perf_counter()
+        with collect() as records:
+            request.pipeline_stages = records
+            response = self.get_response(request)
+        return self._add_header(response, records, start)
+
+    async def _acall(self, request):
+        start = time.perf_counter()
+        with collect() as records:
+            request.pipeline_stages = records
+            response = await self.get_response(request)
+        return self._add_header(response, records, start)
+
+    @staticmethod
+    def _add_header(response, records, start):
+        timings = server_timing_header(records)
+        total = f"total;dur={(time.perf_counter() - start) * 1000:.1f}"
+        response["Server-Timing"] = f"{timings}, {total}" if timings else total
+        return response
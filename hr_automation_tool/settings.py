@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 
 # Base directory
@@ -34,6 +35,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'hr_automation_tool.middleware.ServerTimingMiddleware',
 ]
 
 # Root URL configuration
@@ -58,6 +60,7 @@ TEMPLATES = [
 
 # WSGI application
 WSGI_APPLICATION = 'hr_automation_tool.wsgi.application'
+ASGI_APPLICATION = 'hr_automation_tool.asgi.application'
 
 # Database (default SQLite for development)
 DATABASES = {
@@ -98,5 +101,89 @@ STATIC_ROOT = BASE_DIR / "staticfiles"  # for collectstatic
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / "media"
 
+# Worker processes used to validate multi-sheet timesheets (1 = serial)
+TIMESHEET_VALIDATION_WORKERS = 1
+
+# Rows per chunk when streaming uploaded timesheets from disk (None = load sheets whole). Validation
+# jobs then write each validated chunk straight into the result ZIP, so their memory stays flat
+# whatever the file size; they skip the sheet cache, which needs whole validated sheets
+TIMESHEET_READ_CHUNK_ROWS = None
+
+# Background threads running queued validation jobs (0 = run inside the request)
+TIMESHEET_JOB_WORKERS = 2
+
+# Tokens scripts send as `Authorization: Bearer <token>` to call the job and chunked upload APIs
+# without a CSRF token, comma-separated in the environment (none = browser sessions only)
+TIMESHEET_API_TOKENS = [token for token in os.environ.get('TIMESHEET_API_TOKENS', '').split(',') if token]
+
+# Worker processes validating the files of a batch upload (1 = serial; more than the CPU count
+# only adds overhead, and each batch starts its own pool), and the most workbooks and workbook
+# bytes one batch may hold once its ZIPs are unpacked
+TIMESHEET_BATCH_WORKERS = 1
+TIMESHEET_BATCH_MAX_FILES = 200
+TIMESHEET_BATCH_MAX_BYTES = 1024 * 1024 * 1024
+
+# Deflate level (0-9) for ZIP members that are not compressed already; xlsx members are always stored
+TIMESHEET_ZIP_COMPRESSLEVEL = 6
+
+# Disk budget for cached validation results of repeated uploads (0 = no caching)
+TIMESHEET_RESULT_CACHE_BYTES = 512 * 1024 * 1024
+
+# Retention of timesheet files under MEDIA_ROOT, applied by `manage.py apply_retention` (run it daily):
+# uploads, job and batch folders and result ZIPs older than TIMESHEET_RETENTION_DAYS are deleted, then the
+# oldest until the rest fit in TIMESHEET_RETENTION_MAX_BYTES; validation_<timestamp> folders older than
+# TIMESHEET_COMPACT_AFTER_DAYS are moved into monthly ZIPs in timesheet_archives (0 turns a policy off)
+TIMESHEET_RETENTION_DAYS = 30
+TIMESHEET_RETENTION_MAX_BYTES = 5 * 1024 * 1024 * 1024
+TIMESHEET_COMPACT_AFTER_DAYS = 7
+
+# Validated sheets kept for incremental re-validation of edited workbooks (0 = re-validate every sheet)
+TIMESHEET_SHEET_CACHE_ENTRIES = 5000
+
+# Validation rule sets selected by the upload's validation type, as a dict or the path of a JSON
+# file of the same shape; fields left out keep the standard rules (see scripts/validation_rules.py).
+# "custom" is for teams on a 9 hour day that also book leave as PTO
+TIMESHEET_RULE_SETS = {
+    'custom': {
+        'full_day_hours': 9,
+        'half_day_hours': 4.5,
+        'leave_keywords': ['leave', 'holiday', 'weekend', 'pto'],
+    },
+}
+
+# Threads running validation and deck generation for the async upload views; requests beyond this queue
+PIPELINE_EXECUTOR_WORKERS = 2
+
+# Resumable chunked timesheet uploads: largest file, disk held by unfinished uploads together,
+# largest chunk per request and how much of a chunk is read into memory at a time
+CHUNKED_UPLOAD_MAX_BYTES = 500 * 1024 * 1024
+CHUNKED_UPLOAD_PENDING_MAX_BYTES = 2 * 1024 * 1024 * 1024
+CHUNKED_UPLOAD_CHUNK_MAX_BYTES = 8 * 1024 * 1024
+CHUNKED_UPLOAD_READ_BYTES = 256 * 1024
+
+# Worker processes building decks for a batch of anniversaries (1 = serial)
+PPT_BATCH_WORKERS = 1
+
+# Generated decks and deck ZIPs stay in memory up to this size before spilling to a temp file
+PPT_SPOOL_MAX_BYTES = 64 * 1024 * 1024
+
+# Drop repeats of the same wish from the same signer before building decks
+PPT_DEDUPE_WISHES = False
+
+# Serve per-stage pipeline totals as JSON at /metrics/
+PIPELINE_METRICS_ENABLED = False
+
+# Pipeline stage timings are logged at INFO by scripts.instrumentation
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'scripts.instrumentation': {'handlers': ['console'], 'level': 'INFO'},
+    },
+}
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
\ No newline at end of file
@@ -0,0 +1,162 @@
+"""Stage-level timing for the timesheet and presentation pipelines.
+
+Wrap a pipeline stage in ``with stage("validate") as record:`` (set
+``record.rows`` inside the block when the row count is known) or decorate a
+function with ``@instrumented("save_validated_data")``. Every finished stage
+is logged to the ``scripts.instrumentation`` logger, added to process-wide
+totals, and appended to the records of the current ``collect()`` block, which
+the Server-Timing middleware opens once per request.
+
+Bytes read/written come from /proc/self/io and peak RSS from getrusage, so
+both are process-wide: the byte counts include other threads working at the
+same time, and peak RSS is the process high-water mark when the stage ended.
+Where those sources are unavailable the fields are None.
+"""
+import functools
+import logging
+import re
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+_current_records = ContextVar("pipeline_stage_records", default=None)
+_totals = {}
+_totals_lock = threading.Lock()
+
+
+class StageRecord:
+    """Measurements for one run of a pipeline stage."""
+
+    def __init__(self, name, rows=None):
+        self.name = name
+        self.rows = rows
+        self.seconds = 0.0
+        self.bytes_read = None
+        self.bytes_written = None
+        self.peak_rss_mb = None
+
+    def as_dict(self):
+        return {
+            "stage": self.name,
+            "seconds": self.seconds,
+            "rows": self.rows,
+            "bytes_read": self.bytes_read,
+            "bytes_written": self.bytes_written,
+            "peak_rss_mb": self.peak_rss_mb,
+        }
+
+
+def _io_counters():
+    """Bytes read and written by this process so far, or (None, None)."""
+    try:
+        with open("/proc/self/io") as f:
+            counters = dict(line.split(":", 1) for line in f)
+        return int(counters["rchar"]), int(counters["wchar"])
+    except (OSError, KeyError, ValueError):
+        return None, None
+
+
+def _peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+    return peak / 2**20 if sys.platform == "darwin" else peak / 1024
+
+
+@contextmanager
+def stage(name, rows=None):
+    """Measure the enclosed block as one run of stage ``name``; yields its StageRecord."""
+    record = StageRecord(name, rows)
+    read_before, written_before = _io_counters()
+    start = time.perf_counter()
+    try:
+        yield record
+    finally:
+        record.seconds = time.perf_counter() - start
+        read_after, written_after = _io_counters()
+        if read_before is not None:
+            record.bytes_read = read_after - read_before
+            record.bytes_written = written_after - written_before
+        record.peak_rss_mb = _peak_rss_mb()
+        _finish(record)
+
+
+def instrumented(name=None):
+    """Decorator form of stage(); the stage name defaults to the function's qualified name."""
+    def decorator(func):
+        stage_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(stage_name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _finish(record):
+    logger.info("stage=%s seconds=%.4f rows=%s bytes_read=%s bytes_written=%s peak_rss_mb=%s",
+                record.name, record.seconds, record.rows, record.bytes_read, record.bytes_written,
+                None if record.peak_rss_mb is None else round(record.peak_rss_mb, 1))
+
+    with _totals_lock:
+        totals = _totals.setdefault(record.name, {"count": 0, "total_seconds": 0.0, "max_seconds": 0.0,
+                                                  "rows": 0, "bytes_read": 0, "bytes_written": 0})
+        totals["count"] += 1
+        totals["total_seconds"] += record.seconds
+        totals["max_seconds"] = max(totals["max_seconds"], record.seconds)
+        totals["rows"] += record.rows or 0
+        totals["bytes_read"] += record.bytes_read or 0
+        totals["bytes_written"] += record.bytes_written or 0
+
+    records = _current_records.get()
+    if records is not None:
+        records.append(record)
+
+
+@contextmanager
+def collect():
+    """Collect the StageRecords finished inside the block (in this thread/task) into a list."""
+    records = []
+    token = _current_records.set(records)
+    try:
+        yield records
+    finally:
+        _current_records.reset(token)
+
+
+def aggregated_metrics():
+    """Per-stage totals since start-up (or the last reset_metrics call)."""
+    with _totals_lock:
+        metrics = {name: dict(totals) for name, totals in _totals.items()}
+    for totals in metrics.values():
+        totals["mean_seconds"] = totals["total_seconds"] / totals["count"]
+    return {"stages": metrics, "peak_rss_mb": _peak_rss_mb()}
+
+
+def reset_metrics():
+    with _totals_lock:
+        _totals.clear()
+
+
+def server_timing_header(records):
+    """Format StageRecords as a Server-Timing header value."""
+    entries = []
+    for record in records:
+        # Metric names must be HTTP tokens
+        metric = re.sub(r"[^A-Za-z0-9!#$%&'*+.^_`|~-]", "_", record.name)
+        entry = f"{metric};dur={record.seconds * 1000:.1f}"
+        if record.rows is not None:
+            entry += f';desc="{record.rows} rows"'
+        entries.append(entry)
+    return ", ".join(entries)
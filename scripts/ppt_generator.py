@@ -1,40 +1,193 @@
+import io
+import os
+import re
+import threading
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
 import pandas as pd
 from pptx import Presentation
 from pptx.util import Inches, Pt
 from pptx.dml.color import RGBColor
 from pptx.enum.text import PP_ALIGN
 
-def generate_presentation(template_path, excel_path, output_path, user_name, years_of_service):
-    df = pd.read_excel(excel_path)
+try:
+    from scripts.instrumentation import instrumented, stage
+    from scripts.slide_layout import (FONT_SIZE, SIGNER_LEFT, SIGNER_WIDTH, WISH_LEFT, WISH_WIDTH,
+                                      pack_wishes, signer_text)
+    from scripts.text_boxes import TextBoxFactory, TextStyle, next_shape_id
+except ImportError:  # run directly from the scripts folder
+    from instrumentation import instrumented, stage
+    from slide_layout import FONT_SIZE, SIGNER_LEFT, SIGNER_WIDTH, WISH_LEFT, WISH_WIDTH, pack_wishes, signer_text
+    from text_boxes import TextBoxFactory, TextStyle, next_shape_id
+
+# Template slides ahead of the wishes: one per year of service, then extras
+TEMPLATE_SLIDES = 6
+TEMPLATE_YEARS = range(1, 5)
+
+# Columns of a batch workbook naming who each wish is for
+HONOREE_COLUMN = 'Employee'
+YEARS_COLUMN = 'Years'
+WISH_COLUMNS = ['Wishes', 'Name']
+
+# Wish and signer text boxes are cloned from these rather than styled one by one.
+# The wish alignment has always been PP_ALIGN.LEFT (the value 1).
+wish_boxes = TextBoxFactory(TextStyle("Times New Roman", FONT_SIZE, alignment=PP_ALIGN.LEFT))
+signer_boxes = TextBoxFactory(TextStyle("Times New Roman", FONT_SIZE, bold=True, italic=True,
+                                        color=RGBColor(255, 0, 0), alignment=PP_ALIGN.RIGHT))
+
+
+def _is_csv(source):
+    """Whether a wish upload is CSV: by file name, or for unnamed file objects by not being a zip/OLE workbook."""
+    name = source if isinstance(source, (str, os.PathLike)) else getattr(source, 'name', None)
+    if name:
+        return os.fspath(name).lower().endswith('.csv')
+    position = source.tell()
+    head = source.read(4)
+    source.seek(position)
+    return head not in (b'PK\x03\x04', b'\xd0\xcf\x11\xe0')
+
+
+def load_wish_table(source, columns=WISH_COLUMNS):
+    """Read only ``columns`` of an xlsx or CSV wish upload, every value as a string.
+
+    CSV files (large form exports) are parsed by pandas directly instead of
+    openpyxl. Column names are matched after stripping surrounding spaces.
+    """
+    wanted = set(columns)
+    if _is_csv(source):
+        df = pd.read_csv(source, usecols=lambda col: col.strip() in wanted, dtype=str, skipinitialspace=True)
+    else:
+        df = pd.read_excel(source, usecols=lambda col: str(col).strip() in wanted, dtype=str)
     df.columns = df.columns.str.strip()
+    missing = [col for col in columns if col not in df.columns]
+    if missing:
+        raise ValueError(f"Upload is missing column(s): {', '.join(missing)}")
+    return df
+
+
+def read_wishes(df, dedupe=False):
+    """Return (wish, signer) pairs from a wishes sheet, skipping rows without a wish or a signer.
+
+    Runs of spaces and tabs become one space and each line is stripped; line
+    breaks inside a wish are kept. With ``dedupe`` only the first of several
+    identical wishes from the same signer is kept.
+    """
+    wishes = (df['Wishes'].astype('string')
+              .str.replace(r'\r\n?', '\n', regex=True)
+              .str.replace(r'[^\S\n]+', ' ', regex=True)
+              .str.replace(r' ?\n ?', '\n', regex=True)
+              .str.strip())
+    signers = df['Name'].astype('string').str.replace(r'\s+', ' ', regex=True).str.strip()
+    # 'nan' is what str() made of empty cells before; keep skipping it as text too
+    keep = (wishes.fillna('').ne('') & signers.fillna('').ne('')
+            & wishes.str.lower().ne('nan') & signers.str.lower().ne('nan')).fillna(False)
+    cleaned = pd.DataFrame({'Wishes': wishes[keep], 'Name': signers[keep]})
+    if dedupe:
+        cleaned = cleaned.drop_duplicates()
+    return list(zip(cleaned['Wishes'].tolist(), cleaned['Name'].tolist()))
+
 
-    wishes = []
-    for _, row in df.iterrows():
-        wish = str(row['Wishes']).strip()
-        signer = str(row['Name']).strip()
-        if not wish or wish.lower() == 'nan' or not signer or signer.lower() == 'nan':
-            continue
-        wishes.append((wish, signer))
+@instrumented("generate_presentation")
+def generate_presentation(template_path, excel_path, output_path, user_name, years_of_service, dedupe=False):
+    """Build one honoree's deck. excel_path (xlsx or CSV) and output_path may be paths or file objects."""
+    with stage("ppt_read_excel") as record:
+        df = load_wish_table(excel_path)
+        record.rows = len(df)
 
-    prs = Presentation(template_path)
+    wishes = read_wishes(df, dedupe)
+    prs = template_cache.get(template_path, years_of_service)
+    build_presentation(prs, wishes, user_name, years_of_service, trimmed=True)
 
-    # Place the user name in the correct year slide (index = years_of_service - 1)
+    with stage("ppt_save"):
+        prs.save(output_path)
+    if isinstance(output_path, (str, os.PathLike)):
+        print(f"Presentation saved to {output_path}")
+
+
+def trim_template(prs, years_of_service):
+    """Remove every template slide except the one for years_of_service (index = years - 1)."""
     year_slide_idx = int(years_of_service) - 1  # 1-based to 0-based index
-    for idx, slide in enumerate(prs.slides):
-        if idx == year_slide_idx:
-            left = Inches(3)
-            top = Inches(3.5)
-            width = Inches(4)
-            height = Inches(1.2)
-            txBox = slide.shapes.add_textbox(left, top, width, height)
-            tf = txBox.text_frame
-            tf.clear()
-            p = tf.add_paragraph()
-            p.text = user_name
-            p.font.size = Pt(24)
-            p.font.bold = True
-            p.font.name = "Times New Roman"
-            p.alignment = PP_ALIGN.CENTER
+    xml_slides = prs.slides._sldIdLst
+    for i in sorted((i for i in range(TEMPLATE_SLIDES) if i != year_slide_idx), reverse=True):
+        slide_id = xml_slides[i]
+        xml_slides.remove(slide_id)
+        # Drop the relationship too, so the removed slide isn't saved into the deck
+        prs.part.drop_rel(slide_id.rId)
+    # Renumber the kept slide to slide1.xml so slides added later get free part names
+    prs.part.rename_slide_parts([slide_id.rId for slide_id in xml_slides])
+    return prs
+
+
+class TemplateCache:
+    """Anniversary templates read once per process and pre-trimmed for each year.
+
+    The template is parsed once, cut down to each year's slide and kept as
+    in-memory .pptx bytes, so get() opens a small deck without touching the
+    disk or building slides that are thrown away. Copies are made from bytes
+    rather than with deepcopy because python-pptx objects hold lxml elements
+    that deepcopy would detach from each other. The template is re-read when
+    its file's mtime or size changes.
+    """
+
+    def __init__(self):
+        self._templates = {}
+        self._lock = threading.Lock()
+
+    def _load(self, template_path, signature):
+        with open(template_path, 'rb') as f:
+            template_bytes = f.read()
+        trimmed = {}
+        for years in TEMPLATE_YEARS:
+            buffer = io.BytesIO()
+            trim_template(Presentation(io.BytesIO(template_bytes)), years).save(buffer)
+            trimmed[years] = buffer.getvalue()
+        print(f"Loaded presentation template {template_path}")
+        return signature, trimmed
+
+    def get(self, template_path, years_of_service):
+        """Return a fresh Presentation of the template trimmed to years_of_service."""
+        stat = os.stat(template_path)
+        signature = (stat.st_mtime_ns, stat.st_size)
+        key = os.path.abspath(template_path)
+        with self._lock:
+            cached = self._templates.get(key)
+            if cached is None or cached[0] != signature:
+                cached = self._templates[key] = self._load(template_path, signature)
+        return Presentation(io.BytesIO(cached[1][int(years_of_service)]))
+
+    def clear(self):
+        with self._lock:
+            self._templates.clear()
+
+
+template_cache = TemplateCache()
+
+
+def build_presentation(prs, wishes, user_name, years_of_service, trimmed=False):
+    """Fill a template with the honoree's name and the wishes, packed onto slides by pack_wishes.
+
+    ``prs`` is the full template, or with ``trimmed`` one already cut down to
+    its year slide by trim_template (as TemplateCache.get returns).
+    """
+    if not trimmed:
+        trim_template(prs, years_of_service)
+
+    # Place the user name on the year slide, the only template slide left
+    slide = prs.slides[0]
+    left = Inches(3)
+    top = Inches(3.5)
+    width = Inches(4)
+    height = Inches(1.2)
+    txBox = slide.shapes.add_textbox(left, top, width, height)
+    tf = txBox.text_frame
+    tf.clear()
+    p = tf.add_paragraph()
+    p.text = user_name
+    p.font.size = Pt(24)
+    p.font.bold = True
+    p.font.name = "Times New Roman"
+    p.alignment = PP_ALIGN.CENTER
 
     def get_blank_layout(prs, year_idx):
       """
@@ -50,83 +203,9 @@ def generate_presentation(template_path, excel_path, output_path, user_name, yea
 
     # Add one slide per wish (blank layout)
     blank_layout = get_blank_layout(prs, int(years_of_service))
-    i = 0
-    while i < len(wishes):
-        wish_text_1, signer_name_1 = wishes[i]
-        wish_text_2, signer_name_2 = None, None
-
-        # Check if next wish exists and both are short
-        if (i + 1 < len(wishes)
-            and len(wish_text_1) < 120  
-            and len(wishes[i + 1][0]) < 120
-        ):
-            wish_text_2, signer_name_2 = wishes[i + 1]
-            i += 2
-        else:
-            i += 1
-
+    for slide_wishes in pack_wishes(wishes):
         slide = prs.slides.add_slide(blank_layout)
-
-        # First wish
-        wish1_top = 1.5
-        txBox1 = slide.shapes.add_textbox(Inches(2), Inches(wish1_top), Inches(7), Inches(1))
-        tf1 = txBox1.text_frame
-        tf1.clear()
-        tf1.word_wrap = True
-        p1 = tf1.add_paragraph()
-        p1.font.name = "Times New Roman"
-        p1.text = wish_text_1
-        p1.font.size = Pt(18)
-        p1.font.bold = False
-        p1.font.italic = False
-        p1.alignment = 1  # Center alignment
-
-        # Dynamic Y for signer based on wish length
-        signer1_offset = 0.5 if len(wish_text_1) < 80 else 1.0 + ((len(wish_text_1) - 80) // 80) * 0.3
-        signer1_top = wish1_top + signer1_offset
-        signer_box1 = slide.shapes.add_textbox(Inches(3), Inches(signer1_top), Inches(5), Inches(0.6))
-        signer_tf1 = signer_box1.text_frame
-        signer_tf1.clear()
-        signer_tf1.word_wrap = True
-        signer_p1 = signer_tf1.add_paragraph()
-        signer_p1.font.name = "Times New Roman"
-        signer_p1.font.color.rgb = RGBColor(255, 0, 0)
-        signer_p1.text = f"- {signer_name_1}"
-        signer_p1.font.size = Pt(18)
-        signer_p1.font.bold = True
-        signer_p1.font.italic = True
-        signer_p1.alignment = 3  # Right alignment
-
-        # Second wish (if present)
-        if wish_text_2:
-            wish2_top = signer1_top + 0.8  # Add space after first signer
-            txBox2 = slide.shapes.add_textbox(Inches(2), Inches(wish2_top), Inches(7), Inches(1))
-            tf2 = txBox2.text_frame
-            tf2.clear()
-            tf2.word_wrap = True
-            p2 = tf2.add_paragraph()
-            p2.font.name = "Times New Roman"
-            p2.text = wish_text_2
-            p2.font.size = Pt(18)
-            p2.font.bold = False
-            p2.font.italic = False
-            p2.alignment = 1  # Center alignment
-
-            # Dynamic Y for second signer
-            signer2_offset = 0.5 if len(wish_text_2) < 80 else 1.0 + ((len(wish_text_2) - 80) // 80) * 0.3
-            signer2_top = wish2_top + signer2_offset
-            signer_box2 = slide.shapes.add_textbox(Inches(3), Inches(signer2_top), Inches(5), Inches(0.6))
-            signer_tf2 = signer_box2.text_frame
-            signer_tf2.clear()
-            signer_tf2.word_wrap = True
-            signer_p2 = signer_tf2.add_paragraph()
-            signer_p2.font.name = "Times New Roman"
-            signer_p2.font.color.rgb = RGBColor(255, 0, 0)
-            signer_p2.text = f"- {signer_name_2}"
-            signer_p2.font.size = Pt(18)
-            signer_p2.font.bold = True
-            signer_p2.font.italic = True
-            signer_p2.alignment = 3  # Right alignment
+        _add_wishes(slide, slide_wishes)
 
     # Add a Thank You slide at the end
     thank_slide = prs.slides.add_slide(blank_layout)
@@ -141,13 +220,92 @@ def generate_presentation(template_path, excel_path, output_path, user_name, yea
     p.font.color.rgb = RGBColor(255, 0, 0)  # Red color
     p.font.italic = True
     p.alignment = 1  # Center
+    return prs
+
+
+def _add_wishes(slide, placements):
+    """Add each wish and its signer at the position pack_wishes chose."""
+    shapes = slide.shapes
+    shape_id = next_shape_id(shapes)
+    for placement in placements:
+        wish_boxes.add(shapes, shape_id, placement.wish, Inches(WISH_LEFT), Inches(placement.wish_top),
+                       Inches(WISH_WIDTH), Inches(placement.wish_height))
+        signer_boxes.add(shapes, shape_id + 1, signer_text(placement.signer), Inches(SIGNER_LEFT),
+                         Inches(placement.signer_top), Inches(SIGNER_WIDTH), Inches(placement.signer_height))
+        shape_id += 2
+
+
+def group_honorees(df, dedupe=False):
+    """Split a batch workbook into (name, years, wishes) per honoree, in order of first appearance."""
+    df.columns = df.columns.str.strip()
+    missing = [col for col in (HONOREE_COLUMN, YEARS_COLUMN) if col not in df.columns]
+    if missing:
+        raise ValueError(f"Batch workbook is missing column(s): {', '.join(missing)}")
+
+    df = df.dropna(subset=[HONOREE_COLUMN, YEARS_COLUMN])
+    names = df[HONOREE_COLUMN].astype(str).str.strip()
+    years = pd.to_numeric(df[YEARS_COLUMN], errors='coerce')
+    invalid = sorted(set(names[~years.isin([1, 2, 3, 4])]))
+    if invalid:
+        raise ValueError(f"Years must be 1-4 for: {', '.join(invalid)}")
+
+    honorees = []
+    for (name, year), group in df.groupby([names, years.astype(int)], sort=False):
+        honorees.append((name, int(year), read_wishes(group, dedupe)))
+    return honorees
+
+
+def _deck_bytes(template_path, user_name, years_of_service, wishes):
+    """Build one deck from the cached template and return the .pptx bytes."""
+    prs = template_cache.get(template_path, years_of_service)
+    build_presentation(prs, wishes, user_name, years_of_service, trimmed=True)
+    buffer = io.BytesIO()
+    prs.save(buffer)
+    return buffer.getvalue()
+
+
+def _deck_file_name(user_name, used_names):
+    base = re.sub(r'[^\w\- ]+', '_', user_name).strip() or 'Employee'
+    name, counter = f"{base}_Anniversary_Slides.pptx", 2
+    while name in used_names:
+        name, counter = f"{base}_{counter}_Anniversary_Slides.pptx", counter + 1
+    used_names.add(name)
+    return name
+
+
+@instrumented("generate_presentations_batch")
+def generate_presentations_batch(template_path, excel_file, zip_file, workers=None, dedupe=False):
+    """Build one deck per honoree of a batch workbook and write them all into one ZIP.
+
+    The workbook needs Employee and Years columns next to Wishes and Name;
+    rows are grouped per employee. The workbook may also be a CSV. Each deck starts from an in-memory copy
+    of the template, parsed once per process by template_cache. With
+    workers > 1 decks are built in a process pool. excel_file and zip_file
+    may be paths or file objects. Returns the deck file names in ZIP order.
+    """
+    with stage("ppt_read_excel") as record:
+        df = load_wish_table(excel_file, [HONOREE_COLUMN, YEARS_COLUMN] + WISH_COLUMNS)
+        record.rows = len(df)
+    honorees = group_honorees(df, dedupe)
+
+    if workers and workers > 1 and len(honorees) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(honorees))) as executor:
+            # map() yields decks in honoree order
+            decks = executor.map(_deck_bytes, [template_path] * len(honorees), *zip(*honorees))
+            return _write_deck_zip(honorees, decks, zip_file)
+
+    decks = (_deck_bytes(template_path, *honoree) for honoree in honorees)
+    return _write_deck_zip(honorees, decks, zip_file)
 
-    # --- Remove all template slides except the relevant year slide (first 6 slides) ---
-    slides_to_remove = [i for i in range(6) if i != year_slide_idx]
-    for i in sorted(slides_to_remove, reverse=True):
-        xml_slides = prs.slides._sldIdLst
-        xml_slides.remove(xml_slides[i])
 
-    prs.save(output_path)
-    print(f"Presentation saved to {output_path}")
+def _write_deck_zip(honorees, decks, zip_file):
+    used_names = set()
+    deck_names = []
+    # .pptx files are already deflated, storing them avoids compressing twice
+    with stage("ppt_write_zip", rows=len(honorees)), zipfile.ZipFile(zip_file, 'w', zipfile.ZIP_STORED) as zipf:
+        for (user_name, _, _), deck in zip(honorees, decks):
+            deck_names.append(_deck_file_name(user_name, used_names))
+            zipf.writestr(deck_names[-1], deck)
+    print(f"Added {len(deck_names)} presentations to the ZIP archive")
+    return deck_names
 
@@ -0,0 +1,119 @@
+"""Pack anniversary wishes onto slides by their estimated rendered height.
+
+Text height is estimated from Times New Roman advance widths (the Adobe
+Times-Roman metrics it is metric-compatible with) and a greedy word wrap at
+the text box width. pack_wishes then fills each slide top to bottom with as
+many wishes as fit, keeping the wishes in their original order, so the
+same input always gives the same slides.
+"""
+from collections import namedtuple
+
+# Advance widths of Times-Roman in 1/1000 em for printable ASCII
+_TIMES_WIDTHS = dict(zip(
+    " !\"#$%&'()*+,-./0123456789:;<=>?@ABCDEFGHIJKLMNOPQRSTUVWXYZ[\\]^_`abcdefghijklmnopqrstuvwxyz{|}~",
+    [250, 333, 408, 500, 500, 833, 778, 333, 333, 333, 500, 564, 250, 333, 250, 278,
+     500, 500, 500, 500, 500, 500, 500, 500, 500, 500, 278, 278, 564, 564, 564, 444,
+     921, 722, 667, 667, 722, 611, 556, 722, 722, 333, 389, 722, 611, 889, 722, 722,
+     556, 722, 667, 556, 611, 722, 722, 944, 722, 722, 611, 333, 278, 333, 469, 500,
+     333, 444, 500, 444, 500, 444, 333, 500, 500, 278, 278, 500, 278, 778, 500, 500,
+     500, 500, 333, 389, 278, 500, 500, 722, 500, 500, 444, 480, 200, 480, 541],
+))
+_DEFAULT_WIDTH = 500
+_WIDE_WIDTH = 1000  # CJK and other full-width characters
+# Bold italic runs a little wider than the regular face
+BOLD_ITALIC_SCALE = 1.05
+
+POINTS_PER_INCH = 72
+LINE_SPACING = 1.2  # line height as a multiple of the font size
+TEXT_INSET_X = 0.1  # python-pptx text box default left/right inset, inches
+TEXT_INSET_Y = 0.05  # default top/bottom inset, inches
+
+# Slide geometry for wish slides, in inches
+FONT_SIZE = 18
+AREA_TOP = 1.5
+AREA_BOTTOM = 5.2
+WISH_LEFT = 2
+WISH_WIDTH = 7
+SIGNER_LEFT = 3
+SIGNER_WIDTH = 5
+SIGNER_GAP = 0.05  # between a wish and its signer
+WISH_GAP = 0.25  # between one signer and the next wish
+# Wrap a little short of the box so estimates err towards more lines
+WRAP_SAFETY = 0.95
+
+Placement = namedtuple("Placement", "wish signer wish_top wish_height signer_top signer_height")
+
+
+def _char_width(char):
+    width = _TIMES_WIDTHS.get(char)
+    if width is None:
+        width = _WIDE_WIDTH if ord(char) >= 0x2E80 else _DEFAULT_WIDTH
+    return width
+
+
+def text_width(text, font_size=FONT_SIZE, scale=1.0):
+    """Estimated rendered width of a single line of text, in inches."""
+    return sum(_char_width(char) for char in text) * scale * font_size / 1000 / POINTS_PER_INCH
+
+
+def wrap_lines(text, box_width, font_size=FONT_SIZE, scale=1.0):
+    """Number of lines text wraps to in a text box box_width inches wide."""
+    available = (box_width - 2 * TEXT_INSET_X) * WRAP_SAFETY
+    space = text_width(" ", font_size, scale)
+    lines = 0
+    for paragraph in text.split("\n"):
+        lines += 1
+        used = 0.0
+        for word in paragraph.split():
+            width = text_width(word, font_size, scale)
+            if used and used + space + width <= available:
+                used += space + width
+                continue
+            if used:
+                lines += 1
+            # A word longer than the line is broken across lines
+            while width > available:
+                lines += 1
+                width -= available
+            used = width
+    return lines
+
+
+def text_height(text, box_width, font_size=FONT_SIZE, scale=1.0):
+    """Estimated height of a text box holding text, including its insets, in inches."""
+    line_height = font_size * LINE_SPACING / POINTS_PER_INCH
+    return wrap_lines(text, box_width, font_size, scale) * line_height + 2 * TEXT_INSET_Y
+
+
+def signer_text(signer):
+    return f"- {signer}"
+
+
+def measure_wish(wish, signer):
+    """Heights of a wish's text box and its signer's box, in inches."""
+    return (text_height(wish, WISH_WIDTH),
+            text_height(signer_text(signer), SIGNER_WIDTH, scale=BOLD_ITALIC_SCALE))
+
+
+def pack_wishes(wishes, area_top=AREA_TOP, area_bottom=AREA_BOTTOM):
+    """Split (wish, signer) pairs into slides of Placements that fit between area_top and area_bottom.
+
+    Wishes keep their order and each slide takes as many as fit. A wish too
+    tall for an empty slide still gets a slide of its own.
+    """
+    slides = []
+    current, top = [], area_top
+    for wish, signer in wishes:
+        wish_height, signer_height = measure_wish(wish, signer)
+        block_top = top + WISH_GAP if current else top
+        block_bottom = block_top + wish_height + SIGNER_GAP + signer_height
+        if current and block_bottom > area_bottom:
+            slides.append(current)
+            current, block_top = [], area_top
+            block_bottom = block_top + wish_height + SIGNER_GAP + signer_height
+        signer_top = block_top + wish_height + SIGNER_GAP
+        current.append(Placement(wish, signer, block_top, wish_height, signer_top, signer_height))
+        top = block_bottom
+    if current:
+        slides.append(current)
+    return slides
@@ -0,0 +1,83 @@
+"""Add styled text boxes to slides by cloning a pre-built shape.
+
+Styling a text box through python-pptx costs one lxml lookup and mutation
+per property (font name, size, bold, italic, colour, alignment) for every
+box. TextBoxFactory builds the complete ``p:sp`` element for a style once;
+each add() deep-copies it and only fills in the shape id, position and text.
+The result is the same XML python-pptx writes for add_textbox followed by
+the per-paragraph font setters.
+"""
+import copy
+import re
+
+from pptx.oxml.shapes.autoshape import CT_Shape
+from pptx.text.text import TextFrame
+from pptx.util import Pt
+
+_LINE_BREAK = re.compile("[\n\v]")
+
+
+class TextStyle:
+    """Paragraph style of a single-paragraph, word-wrapped text box."""
+
+    def __init__(self, font_name, size, bold=False, italic=False, color=None, alignment=None):
+        self.font_name = font_name
+        self.size = size
+        self.bold = bold
+        self.italic = italic
+        self.color = color  # RGBColor or None for the theme colour
+        self.alignment = alignment  # PP_ALIGN member or None to inherit
+
+
+class TextBoxFactory:
+    """Builds the text box XML for one TextStyle once and clones it per box."""
+
+    def __init__(self, style):
+        self.style = style
+        self._template = self._build_template(style)
+
+    @staticmethod
+    def _build_template(style):
+        sp = CT_Shape.new_textbox_sp(0, "TextBox", 0, 0, 0, 0)
+        text_frame = TextFrame(sp.txBody, None)
+        text_frame.word_wrap = True
+        paragraph = text_frame.paragraphs[0]
+        paragraph.font.name = style.font_name
+        if style.color is not None:
+            paragraph.font.color.rgb = style.color
+        paragraph.font.size = Pt(style.size)
+        paragraph.font.bold = style.bold
+        paragraph.font.italic = style.italic
+        if style.alignment is not None:
+            paragraph.alignment = style.alignment
+        paragraph._p.add_r("")
+        return sp
+
+    def add(self, shapes, shape_id, text, left, top, width, height):
+        """Append a box holding text to shapes (a slide's SlideShapes); returns the p:sp element.
+
+        shape_id must be unused on the slide; next_shape_id gives the first
+        free one. Positions are in EMU, e.g. Inches(2).
+        """
+        sp = copy.deepcopy(self._template)
+        c_nv_pr = sp.nvSpPr.cNvPr
+        c_nv_pr.id = shape_id
+        c_nv_pr.name = f"TextBox {shape_id - 1}"
+        xfrm = sp.spPr.xfrm
+        xfrm.off.x, xfrm.off.y = left, top
+        xfrm.ext.cx, xfrm.ext.cy = width, height
+
+        p = sp.txBody.p_lst[0]
+        if _LINE_BREAK.search(text):
+            # Line breaks become a:br elements between runs, as in _Paragraph.text
+            p.remove(p.r_lst[0])
+            p.append_text(text)
+        else:
+            p.r_lst[0].text = text
+        shapes._spTree.append(sp)
+        return sp
+
+
+def next_shape_id(shapes):
+    """First shape id not yet used on the slide that owns shapes."""
+    return shapes._next_shape_id
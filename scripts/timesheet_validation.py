@@ -1,16 +1,562 @@
 import pandas as pd
+import numpy as np
+from pandas.api.types import is_bool_dtype, is_datetime64_any_dtype, is_numeric_dtype, is_string_dtype
 import os
 from dateutil.parser import parse
 from datetime import datetime
+from functools import lru_cache
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+from openpyxl import load_workbook
+from openpyxl.cell.cell import TYPE_ERROR, TYPE_NUMERIC
 import calendar
 import zipfile
 import shutil
+import sqlite3
+import hashlib
+import io
+import time
+import re
+import pickle
+import posixpath
+import itertools
+import xml.etree.ElementTree as ET
+import xlsxwriter
+
+try:
+    from scripts.instrumentation import instrumented, stage
+    from scripts.validation_rules import STANDARD_RULES
+    from scripts.zip_stream import ZipStream, open_member
+except ImportError:  # run directly as scripts/timesheet_validation.py
+    from instrumentation import instrumented, stage
+    from validation_rules import STANDARD_RULES
+    from zip_stream import ZipStream, open_member
+
+try:
+    # Parses lists of cell values like read_excel does; not part of the
+    # documented pandas API, so streaming reads are off without it
+    from pandas.io.parsers import TextParser
+except ImportError:
+    TextParser = None
+
+# Strings read_excel treats as missing by default (the na_values list in the read_csv docs)
+NA_STRINGS = frozenset({
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND", "1.#QNAN",
+    "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null",
+})
+
+# Status messages shown for validated rows when exported
+STATUS_VALID = "Valid"
+STATUS_HALF_DAY = "Half-day detected"
+STATUS_LEAVE_ERROR = "Leave/Holiday should be 0 or empty"
+STATUS_MISSING_HOURS = "Missing hours for a working day"
+STATUS_INVALID_FORMAT = "Invalid Hours Format"
+STATUS_NON_STANDARD = "Full working day should be {full_day} hrs, found {hours} hrs"
+
+# Categories of the validated Status column and the message each is exported as
+STATUS_MESSAGES = {
+    "valid": STATUS_VALID,
+    "half_day": STATUS_HALF_DAY,
+    "non_standard": STATUS_NON_STANDARD,
+    "leave_error": STATUS_LEAVE_ERROR,
+    "missing_hours": STATUS_MISSING_HOURS,
+    "invalid_format": STATUS_INVALID_FORMAT,
+}
+STATUS_DTYPE = pd.CategoricalDtype(list(STATUS_MESSAGES))
+
+# Flag text shown for validated rows when exported
+FLAG_WEEKEND = "⚠ Weekend filled; "
+FLAG_HALF_DAY = "⚠ Half-Day Alert"
+FLAG_BLANK_DESCRIPTION = "⚠ Blank Description; "
+
+# Bits of the validated Flag column
+FLAG_WEEKEND_BIT = 1
+FLAG_HALF_DAY_BIT = 2
+FLAG_BLANK_DESCRIPTION_BIT = 4
+
+# Bump when validation rules or output layout change, so cached results are rebuilt
+RULES_VERSION = "2"
+
+# Formats tried, in order, when detecting a text Date column's layout.
+# Ambiguous numeric dates are month-first, the same as dateutil's default.
+DATE_FORMATS = [
+    "%Y-%m-%d",
+    "%Y-%m-%d %H:%M:%S",
+    "%m/%d/%Y",
+    "%m-%d-%Y",
+    "%d %b %Y",
+    "%d %B %Y",
+    "%B %d, %Y",
+    "%b %d, %Y",
+]
+
+
+@lru_cache(maxsize=4096)
+def parse_free_text_date(text):
+    '''Resolve a date string no known format matched, as YYYY-MM-DD or None.'''
+    try:
+        return parse(text).strftime("%Y-%m-%d")
+    except (ValueError, OverflowError):
+        return None
+
+
+class DateParser:
+    '''Parse a timesheet Date column once into datetime64 values.'''
+
+    def __init__(self, formats=None, sample_size=50):
+        self.formats = formats or DATE_FORMATS
+        self.sample_size = sample_size
+
+    def detect_format(self, text):
+        '''Return the candidate format matching most of a sample, or None.'''
+        sample = text.dropna().head(self.sample_size)
+        if sample.empty:
+            return None
+
+        best_format, best_count = None, 0
+        for fmt in self.formats:
+            count = pd.to_datetime(sample, format=fmt, errors="coerce").notna().sum()
+            if count > best_count:
+                best_format, best_count = fmt, count
+                if count == len(sample):
+                    break
+        return best_format
+
+    def parse(self, dates):
+        '''Parse a Date column into a datetime64 Series, NaT where unparseable.
+
+        Values matching the detected column format are converted in one
+        vectorized call; anything left over goes through dateutil once per
+        distinct string, memoized across calls.
+        '''
+        if is_datetime64_any_dtype(dates):
+            return dates
+
+        values = dates.astype(object)
+        text = values.where(values.notna(), None).map(str, na_action="ignore")
+
+        fmt = self.detect_format(text)
+        if fmt is None:
+            parsed = pd.Series(pd.NaT, index=dates.index, dtype="datetime64[ns]")
+        else:
+            parsed = pd.to_datetime(text, format=fmt, errors="coerce").astype("datetime64[ns]")
+            parsed = parsed.dt.normalize()
+
+        leftover = text.notna() & parsed.isna()
+        if leftover.any():
+            resolved = text[leftover].map(parse_free_text_date)
+            parsed[leftover] = pd.to_datetime(resolved, format="%Y-%m-%d", errors="coerce")
+
+        return parsed
+
+
+def _flag_text(bits):
+    # The half-day alert replaces the weekend flag, blank description is appended
+    if bits & FLAG_HALF_DAY_BIT:
+        text = FLAG_HALF_DAY
+    elif bits & FLAG_WEEKEND_BIT:
+        text = FLAG_WEEKEND
+    else:
+        text = ""
+    if bits & FLAG_BLANK_DESCRIPTION_BIT:
+        text += FLAG_BLANK_DESCRIPTION
+    return text
+
+
+# Export text for every Flag value, indexed by the bits
+FLAG_TEXT = np.array([_flag_text(bits) for bits in range(8)], dtype=object)
+
+
+def _format_hours(value):
+    # 6.0 reads as "6", 6.5 stays "6.5"
+    return int(value) if float(value).is_integer() else value
+
+
+def format_validated_sheet(df, rules=None):
+    '''Copy of a validated sheet with Status and Flag as the human-readable text.
+
+    TimeValidator.validate keeps Status as a category and Flag as bits so
+    large batches stay small in memory; the messages are only built here, when
+    a sheet is written to Excel or shown as HTML. ``rules`` is the RuleSet the
+    sheet was validated with, for the standard day in non-standard hours
+    messages. Frames without a categorical Status (such as summaries) are
+    returned unchanged.
+    '''
+    rules = rules or STANDARD_RULES
+    if "Status" not in df.columns or not isinstance(df["Status"].dtype, pd.CategoricalDtype):
+        return df
+    df = df.copy()
+    status = df["Status"]
+    messages = np.array([STATUS_MESSAGES[code] for code in status.cat.categories], dtype=object)
+    text = messages[status.cat.codes.to_numpy()]
+    non_standard = (status == "non_standard").to_numpy()
+    if non_standard.any():
+        hours = df["Hours"].to_numpy(dtype=object)[non_standard]
+        full_day = _format_hours(rules.full_day_hours)
+        text[non_standard] = [STATUS_NON_STANDARD.format(full_day=full_day, hours=_format_hours(v)) for v in hours]
+    df["Status"] = text
+    df["Flag"] = FLAG_TEXT[df["Flag"].to_numpy()]
+    return df
+
+
+class SheetIssues:
+    '''Per-sheet counts of each review issue, computed once during validation.'''
+
+    # (key, review message) in the order they appear in a Review column
+    ISSUES = [
+        ("half_day", "Contains half-days"),
+        ("non_standard", "Has non-standard hours"),
+        ("leave_error", "Incorrectly logged leave/holiday"),
+        ("missing_hours", "Missing hours entries"),
+        ("invalid_format", "Invalid hour format"),
+        ("blank_description", "Has blank descriptions"),
+        ("weekend_filled", "Contains weekend entries"),
+    ]
+    # Issues that come from the Status column; the rest come from Flag
+    STATUS_ISSUES = [key for key, _ in ISSUES[:5]]
+
+    def __init__(self, counts=None):
+        counts = counts or {}
+        self.counts = {key: int(counts.get(key, 0)) for key, _ in self.ISSUES}
+
+    @classmethod
+    def from_masks(cls, masks):
+        '''Count issues from TimeValidator.rule_masks output.'''
+        counts = {key: masks[key].sum() for key, _ in cls.ISSUES}
+        # The half-day alert replaces the weekend flag on the same row
+        counts["weekend_filled"] = (masks["weekend_filled"] & ~masks["half_day"]).sum()
+        return cls(counts)
+
+    @classmethod
+    def from_frame(cls, df):
+        '''Count issues from the Status and Flag columns of a validated sheet.'''
+        counts = df["Status"].value_counts().to_dict()
+        flag = df["Flag"].to_numpy()
+        counts["blank_description"] = np.count_nonzero(flag & FLAG_BLANK_DESCRIPTION_BIT)
+        # The half-day alert replaces the weekend flag on the same row
+        counts["weekend_filled"] = np.count_nonzero((flag & (FLAG_WEEKEND_BIT | FLAG_HALF_DAY_BIT)) == FLAG_WEEKEND_BIT)
+        return cls(counts)
+
+    @classmethod
+    def from_review(cls, review):
+        '''Issues listed in a Review message, one of each; a summary keeps no counts.'''
+        messages = {message.strip() for message in str(review).split(",")}
+        return cls({key: 1 for key, message in cls.ISSUES if message in messages})
+
+    def __add__(self, other):
+        return SheetIssues({key: self.counts[key] + other.counts[key] for key in self.counts})
+
+    def __eq__(self, other):
+        return isinstance(other, SheetIssues) and self.counts == other.counts
+
+    def __repr__(self):
+        return f"SheetIssues({self.counts})"
+
+    def review(self, include_flags=True):
+        '''Review message listing the issues present, or "OK".
+
+        With ``include_flags`` False only Status issues are listed, as in the
+        summary tracking workbooks.
+        '''
+        keys = self.counts if include_flags else self.STATUS_ISSUES
+        issues = [message for key, message in self.ISSUES if key in keys and self.counts[key]]
+        return ", ".join(issues) if issues else "OK"
+
+
+STREAMING_AVAILABLE = TextParser is not None
+
+
+class StreamingWorkbookReader:
+    '''Read workbook sheets in bounded row chunks using openpyxl read-only mode.
+
+    Each sheet is read twice. The first pass keeps one example of every kind
+    of value per column (blank, int, numeric text, free text, date, ...) to
+    work out the dtype ``pd.read_excel`` would infer for the whole column.
+    The second pass yields chunks cast to those dtypes, so validating chunk by
+    chunk gives exactly the eager result while holding one chunk at a time.
+    Needs pandas' TextParser, see STREAMING_AVAILABLE.
+    '''
+
+    def __init__(self, file_path, chunk_size=5000):
+        self.file_path = file_path
+        self.chunk_size = chunk_size
+        self.workbook = load_workbook(file_path, read_only=True, data_only=True, keep_links=False)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.workbook.close()
+
+    @property
+    def sheet_names(self):
+        return self.workbook.sheetnames
+
+    def _convert_cell(self, cell):
+        '''Convert a cell value exactly like pandas' openpyxl reader.'''
+        if cell.value is None:
+            return ""
+        elif cell.data_type == TYPE_ERROR:
+            return np.nan
+        elif cell.data_type == TYPE_NUMERIC:
+            value = int(cell.value)
+            if value == cell.value:
+                return value
+            return float(cell.value)
+        return cell.value
+
+    def _iter_rows(self, sheet_name):
+        '''Yield the header and then each data row, trimmed like read_excel does.'''
+        sheet = self.workbook[sheet_name]
+        sheet.reset_dimensions()
+
+        header = None
+        # Blank rows only count if data follows them, read_excel drops trailing ones
+        pending_blank = 0
+        for row in sheet.rows:
+            values = [self._convert_cell(cell) for cell in row]
+            while values and values[-1] == "":
+                values.pop()
+
+            if header is None:
+                header = values
+                yield header
+                continue
+            if not values:
+                pending_blank += 1
+                continue
+
+            for _ in range(pending_blank):
+                yield []
+            pending_blank = 0
+            yield values
+
+    def _parse(self, header, rows, dtype=None):
+        width = len(header)
+        rows = [row[:width] + [""] * (width - len(row)) for row in rows]
+        return TextParser([header] + rows, header=0, skip_blank_lines=False, dtype=dtype).read()
+
+    def _value_kind(self, value):
+        '''Classify a cell value by how it affects dtype inference.'''
+        if isinstance(value, str):
+            if value in NA_STRINGS:
+                return "na"
+            if value in ("True", "TRUE", "true", "False", "FALSE", "false"):
+                return "bool_text"
+            try:
+                float(value)
+                return "numeric_text"
+            except ValueError:
+                return "text"
+        if isinstance(value, float) and value != value:
+            return "na"
+        return type(value).__name__
+
+    def column_dtypes(self, sheet_name):
+        '''First pass: the dtype read_excel would give each column of a sheet.'''
+        rows = self._iter_rows(sheet_name)
+        header = next(rows, None)
+        if header is None:
+            return None, {}
+
+        examples = [{} for _ in header]
+        for values in rows:
+            for i, value in enumerate(values[:len(header)]):
+                examples[i].setdefault(self._value_kind(value), value)
+            for i in range(len(values), len(header)):
+                examples[i].setdefault("na", "")
+
+        # One row per kind; shorter columns repeat an example so no blanks are invented
+        columns = [list(kinds.values()) for kinds in examples]
+        depth = max((len(values) for values in columns), default=0)
+        sample = [[values[min(j, len(values) - 1)] if values else "" for values in columns] for j in range(depth)]
+        return header, self._parse(header, sample).dtypes.to_dict()
+
+    def iter_chunks(self, sheet_name):
+        '''Second pass: yield DataFrames of at most ``chunk_size`` rows for one sheet.'''
+        header, dtypes = self.column_dtypes(sheet_name)
+        if header is None:
+            # Empty sheet, read_excel returns an empty frame for it as well
+            yield pd.DataFrame()
+            return
+
+        # Text columns must not be re-inferred per chunk, a chunk of "0"s would turn numeric
+        text_columns = {col: object for col, dtype in dtypes.items() if dtype == object or is_string_dtype(dtype)}
+
+        rows = self._iter_rows(sheet_name)
+        next(rows)
+        chunk = []
+        yielded = False
+        for values in rows:
+            chunk.append(values)
+            if len(chunk) >= self.chunk_size:
+                yield self._parse(header, chunk, text_columns).astype(dtypes)
+                yielded = True
+                chunk = []
+
+        if chunk or not yielded:
+            yield self._parse(header, chunk, text_columns).astype(dtypes)
+
+
+_XLSX_NS = {
+    "main": "http://schemas.openxmlformats.org/spreadsheetml/2006/main",
+    "rel": "http://schemas.openxmlformats.org/package/2006/relationships",
+}
+_XLSX_REL_ID = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}id"
+_SHARED_STRING_CELL = re.compile(rb'(<c\b[^>]*\bt="s"[^>]*>)<v>(\d+)</v>')
+_SHEET_VIEWS = re.compile(rb"<sheetViews>.*?</sheetViews>", re.S)
+
+
+def sheet_fingerprints(file_path, rules_key=""):
+    """Fingerprint each worksheet's raw cell content, keyed by sheet name in workbook order.
+
+    Hashes the worksheet XML straight from the xlsx archive with shared
+    string indexes replaced by the strings themselves, so editing one sheet
+    does not change the fingerprints of the others. Styles and the date
+    system are included because they decide how numbers are read as dates,
+    and ``rules_key`` (RuleSet.fingerprint) because it decides the result.
+    Returns None for files that are not xlsx workbooks.
+    """
+    if not zipfile.is_zipfile(file_path):
+        return None
+    try:
+        with zipfile.ZipFile(file_path) as archive:
+            names = set(archive.namelist())
+            workbook = ET.fromstring(archive.read("xl/workbook.xml"))
+            rels = ET.fromstring(archive.read("xl/_rels/workbook.xml.rels"))
+            targets = {rel.get("Id"): rel.get("Target") for rel in rels.findall("rel:Relationship", _XLSX_NS)}
+
+            shared_strings = []
+            if "xl/sharedStrings.xml" in names:
+                strings_root = ET.fromstring(archive.read("xl/sharedStrings.xml"))
+                shared_strings = ["".join(t.text or "" for t in si.iter(f"{{{_XLSX_NS['main']}}}t"))
+                                  for si in strings_root.findall("main:si", _XLSX_NS)]
+
+            common = hashlib.sha256(f"{RULES_VERSION}:{rules_key}".encode("utf-8"))
+            if "xl/styles.xml" in names:
+                common.update(archive.read("xl/styles.xml"))
+            workbook_pr = workbook.find("main:workbookPr", _XLSX_NS)
+            common.update(str(workbook_pr.get("date1904") if workbook_pr is not None else None).encode("utf-8"))
+
+            def resolve(match):
+                return match.group(1) + repr(shared_strings[int(match.group(2))]).encode("utf-8")
+
+            fingerprints = {}
+            for sheet in workbook.find("main:sheets", _XLSX_NS):
+                target = targets[sheet.get(_XLSX_REL_ID)]
+                part = target.lstrip("/") if target.startswith("/") else posixpath.normpath(posixpath.join("xl", target))
+                data = _SHEET_VIEWS.sub(b"", archive.read(part))
+                resolved, replaced = _SHARED_STRING_CELL.subn(resolve, data)
+                digest = common.copy()
+                digest.update(resolved)
+                if replaced != data.count(b't="s"'):
+                    # Some shared string cells were not in the expected form, hash every string to stay safe
+                    digest.update(repr(shared_strings).encode("utf-8"))
+                fingerprints[sheet.get("name")] = digest.hexdigest()
+            return fingerprints
+    except (KeyError, IndexError, ET.ParseError, zipfile.BadZipFile) as e:
+        print(f"Could not fingerprint sheets of {file_path}: {str(e)}")
+        return None
+
+
+class SheetCache:
+    """Validated sheets from earlier runs, keyed by their raw-content fingerprint.
+
+    Each entry is a pickle of the validated frame and its SheetIssues. Reads
+    refresh an entry's mtime and prune() drops the least recently used
+    entries beyond max_entries.
+    """
+
+    def __init__(self, cache_dir, max_entries=5000):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, fingerprint):
+        return os.path.join(self.cache_dir, f"{fingerprint}.pkl")
+
+    def get(self, fingerprint):
+        """Return (validated frame, SheetIssues) for a fingerprint, or None."""
+        path = self._path(fingerprint)
+        try:
+            with open(path, "rb") as f:
+                entry = pickle.load(f)
+            os.utime(path)
+            return entry
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"Ignoring unreadable sheet cache entry {path}: {str(e)}")
+            return None
+
+    def put(self, fingerprint, df, issues):
+        path = self._path(fingerprint)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, "wb") as f:
+            pickle.dump((df, issues), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, path)
+
+    def prune(self):
+        """Remove the least recently used entries above max_entries."""
+        entries = [entry for entry in os.scandir(self.cache_dir) if entry.name.endswith(".pkl")]
+        if len(entries) <= self.max_entries:
+            return
+        entries.sort(key=lambda entry: entry.stat().st_mtime)
+        for entry in entries[:len(entries) - self.max_entries]:
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                pass
+
+
+def process_pool(max_workers):
+    '''ProcessPoolExecutor whose workers are not forked from the calling process.
+
+    Validation runs inside threaded servers, and a child forked while other
+    threads hold locks (logging, sqlite, imports) can hang on them. Workers
+    come from a fork server instead, or are spawned where there is none.
+    '''
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=context)
+
+
+def validate_sheet_batch(file_path, sheet_names, chunk_size=None, rules=None):
+    '''Read and validate a batch of sheets; runs inside a worker process.'''
+    validator = TimeValidator(chunk_size=chunk_size, rules=rules)
+    if chunk_size:
+        validated_sheets, sheet_issues = validator.validate_sheets_streaming(file_path, sheet_names)
+        return [(sheet_name, df, sheet_issues[sheet_name]) for sheet_name, df in validated_sheets.items()]
+    sheets_dict = pd.read_excel(file_path, sheet_name=sheet_names)
+    return [(sheet_name, *validator.validate_with_issues(sheets_dict[sheet_name])) for sheet_name in sheet_names]
+
+
+def validate_timesheet_file(file_path, chunk_size=None, sheet_cache=None, rules=None):
+    '''Validate one workbook of a batch; runs inside a worker process.'''
+    return TimeValidator(chunk_size=chunk_size, sheet_cache=sheet_cache, rules=rules).run(file_path)
+
 
 class TimeValidator:
     '''Class for timesheet validation operations'''
 
-    def __init__(self):
+    def __init__(self, workers=None, chunk_size=None, sheet_cache=None, rules=None):
         self.results = []
+        # RuleSet with the standard day, half day, leave keywords and weekend days
+        self.rules = rules or STANDARD_RULES
+        self.date_parser = DateParser()
+        # Number of worker processes for multi-sheet workbooks; None or 1 runs serially
+        self.workers = workers
+        # Rows per chunk when streaming sheets from disk; None loads sheets eagerly
+        if chunk_size and not STREAMING_AVAILABLE:
+            print("This pandas version has no TextParser, loading sheets whole instead of streaming them")
+            chunk_size = None
+        self.chunk_size = chunk_size
+        # SheetCache of earlier validated sheets; None re-validates every sheet
+        self.sheet_cache = sheet_cache
 
     def standardize_column_names(self, df):
         '''Standardize column names across different sheets.'''
@@ -26,123 +572,144 @@ class TimeValidator:
         return df
 
     def validate(self, df):
-        '''Validate timesheet data according to business rules.'''
-        
+        '''Validate timesheet data according to business rules.
+
+        Returns Client, Date, Sheet Name, Hours, Status and Flag. Date is
+        datetime64 (NaT where unparseable), Hours nullable Float64 (NA where
+        missing or not a number), Status a STATUS_DTYPE category and Flag
+        uint8 FLAG_*_BIT bits; format_validated_sheet turns them into text.
+        '''
+        return self.validate_with_issues(df)[0]
+
+    def validate_with_issues(self, df):
+        '''Validate a sheet and also return its SheetIssues counts.'''
         df = self.standardize_column_names(df)
         
         required_columns = ["Client", "Sheet Name", "Hours"]
         for col in required_columns:
             if col not in df.columns:
                 df[col] = None
-        
-        df["Status"] = "Valid"
-        df["Flag"] = ""
-        
-        for index, row in df.iterrows():
-            client = str(row["Client"]).strip() if pd.notna(row["Client"]) else ""
-            sheet_name = str(row["Sheet Name"]).strip() if pd.notna(row["Sheet Name"]) else ""
-            hours = row["Hours"]
-
-            # --- Weekend flag logic ---
-            date_val = row.get("Date", "")
-            weekday = ""
-            try:
-                if pd.notna(date_val):
-                    weekday = pd.to_datetime(date_val).strftime("%A")
-            except Exception:
-                pass
-            if weekday in ["Saturday", "Sunday"]:
-                # If weekend and hours is not empty/zero, raise flag
-                if pd.notna(hours) and hours not in [0, "0", "", None]:
-                    df.at[index, "Flag"] = (df.at[index, "Flag"] + "⚠ Weekend filled; "
-                                            if df.at[index, "Flag"] else "⚠ Weekend filled; ")
-
-            is_leave_type = any(leave_type.lower() in client.lower() for leave_type in ["leave", "holiday", "weekend"])
-
-            if is_leave_type:
-                # For leave types, hours should be 0 or empty
-                if pd.notna(hours) and hours != 0:
-                    df.at[index, "Status"] = "Leave/Holiday should be 0 or empty"
-                else:
-                    # Leave with 0 hours or empty is valid
-                    df.at[index, "Status"] = "Valid"
-            else:
-                if pd.notna(hours):
-                    if isinstance(hours, (int, float)):
-                        if hours == 4:
-                            df.at[index, "Status"] = "Half-day detected"
-                            df.at[index, "Flag"] = "⚠ Half-Day Alert"
-                        elif hours != 8:
-                            df.at[index, "Status"] = f"Full working day should be 8 hrs, found {hours} hrs"
-                        # If hours is 8, it's already marked as Valid
-                    else:
-                        df.at[index, "Status"] = "Invalid Hours Format"
-                else:
-                    df.at[index, "Status"] = "Missing hours for a working day"
 
-        for index, row in df.iterrows():
-            description = str(row["Sheet Name"]).strip() if pd.notna(row["Sheet Name"]) else ""  # Assuming "Sheet Name" is the description column
+        # Parse dates once; weekday flags and the normalized output both use it
+        parsed_dates = self.date_parser.parse(df["Date"])
+        masks = self.rule_masks(df, parsed_dates)
+
+        # Status: leave rows are judged on their own, everything else by the hours value
+        codes = np.select(
+            [
+                masks["leave_error"],
+                masks["leave"],
+                masks["half_day"],
+                masks["non_standard"],
+                masks["invalid_format"],
+                masks["missing_hours"],
+            ],
+            [STATUS_DTYPE.categories.get_loc(code) for code in
+             ["leave_error", "valid", "half_day", "non_standard", "invalid_format", "missing_hours"]],
+            default=STATUS_DTYPE.categories.get_loc("valid"),
+        )
+
+        # Flag: the half-day alert replaces a weekend flag, blank description is added
+        flag = np.where(masks["half_day"], FLAG_HALF_DAY_BIT,
+                        np.where(masks["weekend_filled"], FLAG_WEEKEND_BIT, 0))
+        flag = flag | np.where(masks["blank_description"], FLAG_BLANK_DESCRIPTION_BIT, 0)
+
+        df["Hours"] = self._numeric_hours(df["Hours"], masks["number"])
+        df["Status"] = pd.Categorical.from_codes(codes.astype(np.int8), dtype=STATUS_DTYPE)
+        df["Flag"] = flag.astype(np.uint8)
+        df["Date"] = self._normalize_dates(df["Date"], parsed_dates)
+        
+        result_df = df[["Client", "Date", "Sheet Name", "Hours", "Status", "Flag"]]
 
-            if not description:  
-                df.at[index, "Flag"] = df.at[index, "Flag"] + "⚠ Blank Description; " if df.at[index, "Flag"] else  "⚠ Blank Description; "
+        return result_df, SheetIssues.from_masks(masks)
+
+    def rule_masks(self, df, parsed_dates=None):
+        '''Evaluate every validation rule as a boolean mask over the whole sheet.
+
+        Thresholds and keywords come from ``self.rules``. Expects
+        standardized column names. ``parsed_dates`` is the output of
+        ``DateParser.parse`` for the Date column and is parsed here if omitted.
+        Each mask is a numpy bool array aligned with the rows of ``df``;
+        "number" marks the Hours values that are actual numbers.
+        '''
+        if parsed_dates is None and "Date" in df.columns:
+            parsed_dates = self.date_parser.parse(df["Date"])
+        hours = df["Hours"]
+        has_hours = hours.notna().to_numpy()
+
+        if is_numeric_dtype(hours) and not is_bool_dtype(hours):
+            values = hours.to_numpy()
+            is_number = has_hours
+            is_zero = values == 0
+            # "0" and "" can only show up in object columns
+            is_empty_value = is_zero
+        else:
+            values = hours.astype(object).to_numpy()
+            is_number = np.fromiter((isinstance(v, (int, float)) for v in values), dtype=bool, count=len(values))
+            is_zero = (hours.astype(object) == 0).to_numpy()
+            is_empty_value = is_zero | (hours.astype(object) == "0").to_numpy() | (hours.astype(object) == "").to_numpy()
+        is_number = is_number & has_hours
 
-        for index, row in df.iterrows():
-            date_str = str(row["Date"])  
+        rules = self.rules
+        leave = rules.leave_mask(df["Client"])
 
-            try:
-                
-                parsed_date = parse(date_str)
-                
-                df.at[index, "Date"] = parsed_date.strftime("%Y-%m-%d")  
+        description = df["Sheet Name"].astype(object).where(df["Sheet Name"].notna(), "").astype(str)
+        blank_description = (description.str.strip() == "").to_numpy(dtype=bool)
 
-            except ValueError:
-                
-                df.at[index, "Date"] = None
-        
-        result_df = df[["Client", "Date", "Sheet Name", "Hours", "Status", "Flag"]]
-
-        return result_df
+        if parsed_dates is None:
+            weekend = np.zeros(len(df), dtype=bool)
+        else:
+            weekend = rules.weekend_mask(parsed_dates)
+
+        working = ~leave
+        half_day = working & is_number & (values == rules.half_day_hours)
+        return {
+            "number": is_number,
+            "leave": leave,
+            "leave_error": leave & has_hours & ~is_zero,
+            "half_day": half_day,
+            "non_standard": working & is_number & ~half_day & (values != rules.full_day_hours),
+            "invalid_format": working & has_hours & ~is_number,
+            "missing_hours": working & ~has_hours,
+            "blank_description": blank_description,
+            "weekend_filled": weekend & has_hours & ~is_empty_value,
+        }
+
+    def _numeric_hours(self, hours, is_number):
+        '''Hours as nullable Float64; text such as "8h" becomes NA, its Status says why.'''
+        if is_numeric_dtype(hours) and not is_bool_dtype(hours):
+            return hours.astype("Float64")
+        values = hours.astype(object).where(is_number, None)
+        return pd.Series(pd.array(values.tolist(), dtype="Float64"), index=hours.index)
+
+    def _normalize_dates(self, dates, parsed_dates):
+        '''Parsed dates without their time part, unparseable values become NaT.'''
+        if is_datetime64_any_dtype(dates):
+            return dates.dt.normalize()
+        return parsed_dates
+
+    def create_summary(self, validated_sheets, sheet_issues=None):
+        '''Create a summary sheet with serial numbers.
+
+        ``sheet_issues`` maps sheet names to the SheetIssues from validation;
+        sheets without one are classified from their Status/Flag columns.
+        '''
+        sheet_issues = sheet_issues or {}
+        sheet_totals = {}
+        for sheet_name, df in validated_sheets.items():
+            total_hours = df["Hours"].sum() if "Hours" in df.columns and df["Hours"].notna().any() else 0
+            sheet_totals[sheet_name] = (total_hours, sheet_issues.get(sheet_name) or SheetIssues.from_frame(df))
+        return self.summary_from_totals(sheet_totals)
 
-    def create_summary(self, validated_sheets):
-        '''Create a summary sheet with serial numbers.'''
-        
+    def summary_from_totals(self, sheet_totals):
+        '''Summary sheet from each sheet's (total hours, SheetIssues), in sheet order.'''
         summary_columns = ["S.No", "File Name", "Sheet Name", "Hours", "Review"]
         summary_data = []
         
         s_no = 1
         
-        for sheet_name, df in validated_sheets.items():
-            
-            total_hours = df["Hours"].sum() if "Hours" in df.columns and df["Hours"].notna().any() else 0
-            
-            issues = []
-            
-            if any(df["Status"] == "Half-day detected"):
-                issues.append("Contains half-days")
-            
-            non_standard_entries = df[df["Status"].str.contains("Full working day should be 8 hrs", na=False)]
-            if not non_standard_entries.empty:
-                issues.append("Has non-standard hours")
-            
-            if any(df["Status"] == "Leave/Holiday should be 0 or empty"):
-                issues.append("Incorrectly logged leave/holiday")
-
-            # Check for missing hours
-            if any(df["Status"] == "Missing hours for a working day"):
-                issues.append("Missing hours entries")
-
-            # Check for invalid formats
-            if any(df["Status"] == "Invalid Hours Format"):
-                issues.append("Invalid hour format")
-
-            if any(df["Flag"].str.contains("Blank Description", na=False)):  # Using str.contains for flexibility
-                issues.append("Has blank descriptions")
-
-            if any(df["Flag"].str.contains("Weekend filled", na=False)):
-                issues.append("Contains weekend entries")    
-
-            # Combine issues into review message
-            review_message = ", ".join(issues) if issues else "OK"
+        for sheet_name, (total_hours, issues) in sheet_totals.items():
+            review_message = issues.review()
 
             # Add to summary data
             summary_data.append({
@@ -168,22 +735,17 @@ class TimeValidator:
         '''Run validation on all sheets in an Excel file.'''
         print(f"Validating file: {file_path}")
         try:
-            # Load all sheets
-            sheets_dict = pd.read_excel(file_path, sheet_name=None)
-
-            # Dictionary to store validated data
-            validated_sheets = {}
-
-            # Process each sheet
-            for sheet_name, df in sheets_dict.items():
-                print(f"Processing sheet: {sheet_name}")
-                validated_sheets[sheet_name] = self.validate(df)
+            if self.sheet_cache is not None:
+                validated_sheets, sheet_issues = self.validate_sheets_incremental(file_path)
+            else:
+                validated_sheets, sheet_issues = self._validate_selected_sheets(file_path)
 
             # Extract file name from path
             file_name = os.path.basename(file_path)
 
             # Create summary
-            summary = self.create_summary(validated_sheets)
+            with stage("create_summary", rows=len(validated_sheets)):
+                summary = self.create_summary(validated_sheets, sheet_issues)
 
             # Update File Name in summary to use actual file name
             summary["File Name"] = file_name
@@ -193,6 +755,8 @@ class TimeValidator:
                 "file_path": file_path,
                 "validated_sheets": validated_sheets,
                 "summary": summary,
+                "issues": sheet_issues,
+                "rules": self.rules,
                 "success": True  # Add success flag
             }
 
@@ -202,12 +766,523 @@ class TimeValidator:
         except Exception as e:
             print(f"Error processing {file_path}: {str(e)}")
             return {"success": False, "error": str(e)}
+
+    def run_batch(self, file_paths, workers=None):
+        '''Run validation on several workbooks, one worker process per file when workers > 1.
+
+        Returns one run() result per file in the given order; a file that
+        fails has success False and its error, the others are unaffected.
+        Each worker validates its file's sheets serially, so the pool is
+        spread over files rather than sheets.
+        '''
+        with stage("validate_batch") as record:
+            if workers and workers > 1 and len(file_paths) > 1:
+                count = len(file_paths)
+                with process_pool(min(workers, count)) as executor:
+                    # map() yields results in file order
+                    results = list(executor.map(validate_timesheet_file, file_paths, [self.chunk_size] * count,
+                                                [self.sheet_cache] * count, [self.rules] * count))
+                self.results.extend(result for result in results if result["success"])
+            else:
+                results = [self.run(file_path) for file_path in file_paths]
+            record.rows = sum(len(df) for result in results if result["success"]
+                              for df in result["validated_sheets"].values())
+
+        for file_path, result in zip(file_paths, results):
+            result.setdefault("file_path", file_path)
+        return results
+
+    def _validate_selected_sheets(self, file_path, sheet_names=None):
+        if self.workers and self.workers > 1:
+            return self.validate_sheets_parallel(file_path, sheet_names)
+        return self.validate_sheets(file_path, sheet_names)
+
+    def validate_sheets_incremental(self, file_path):
+        '''Validate only the sheets whose raw content is not in the sheet cache.
+
+        Unchanged sheets reuse their earlier validated frame and issues, so the
+        result matches a full run. Falls back to a full run when the workbook
+        can't be fingerprinted.
+        '''
+        with stage("fingerprint_sheets"):
+            fingerprints = sheet_fingerprints(file_path, self.rules.fingerprint())
+        if fingerprints is None:
+            return self._validate_selected_sheets(file_path)
+
+        cached = {}
+        for sheet_name, fingerprint in fingerprints.items():
+            entry = self.sheet_cache.get(fingerprint)
+            if entry is not None:
+                cached[sheet_name] = entry
+        changed = [sheet_name for sheet_name in fingerprints if sheet_name not in cached]
+        print(f"Reusing {len(cached)} unchanged sheets, validating {len(changed)}")
+
+        if changed:
+            validated, issues = self._validate_selected_sheets(file_path, changed)
+            for sheet_name in changed:
+                cached[sheet_name] = (validated[sheet_name], issues[sheet_name])
+                self.sheet_cache.put(fingerprints[sheet_name], validated[sheet_name], issues[sheet_name])
+            self.sheet_cache.prune()
+
+        # Keep workbook sheet order
+        validated_sheets = {sheet_name: cached[sheet_name][0] for sheet_name in fingerprints}
+        sheet_issues = {sheet_name: cached[sheet_name][1] for sheet_name in fingerprints}
+        return validated_sheets, sheet_issues
+
+    def validate_sheets(self, file_path, sheet_names=None):
+        '''Load and validate the sheets of a workbook (all by default) one after another.
+
+        Returns the validated sheets and their SheetIssues, both keyed by sheet name.
+        '''
+        if self.chunk_size:
+            return self.validate_sheets_streaming(file_path, sheet_names)
+
+        # Load the requested sheets, or all of them
+        with stage("read_excel") as record:
+            sheets_dict = pd.read_excel(file_path, sheet_name=sheet_names)
+            record.rows = sum(len(df) for df in sheets_dict.values())
+
+        # Dictionaries to store validated data and issue counts
+        validated_sheets = {}
+        sheet_issues = {}
+
+        # Process each sheet
+        with stage("validate", rows=record.rows):
+            for sheet_name, df in sheets_dict.items():
+                print(f"Processing sheet: {sheet_name}")
+                validated_sheets[sheet_name], sheet_issues[sheet_name] = self.validate_with_issues(df)
+
+        return validated_sheets, sheet_issues
+
+    def validate_sheets_parallel(self, file_path, sheet_names=None):
+        '''Read and validate sheets in a process pool, keeping workbook sheet order.
+
+        Sheets are split into contiguous batches so each worker opens the
+        workbook once for its whole batch.
+        '''
+        if sheet_names is None:
+            with pd.ExcelFile(file_path) as workbook:
+                sheet_names = workbook.sheet_names
+
+        workers = min(self.workers, len(sheet_names))
+        if workers <= 1:
+            return self.validate_sheets(file_path, sheet_names)
+
+        batch_size = -(-len(sheet_names) // workers)
+        batches = [sheet_names[i:i + batch_size] for i in range(0, len(sheet_names), batch_size)]
+
+        validated_sheets = {}
+        sheet_issues = {}
+        with stage("validate_parallel") as record, process_pool(workers) as executor:
+            # map() yields batch results in submission order
+            for batch in executor.map(validate_sheet_batch, [file_path] * len(batches), batches,
+                                      [self.chunk_size] * len(batches), [self.rules] * len(batches)):
+                for sheet_name, df, issues in batch:
+                    print(f"Processing sheet: {sheet_name}")
+                    validated_sheets[sheet_name] = df
+                    sheet_issues[sheet_name] = issues
+            record.rows = sum(len(df) for df in validated_sheets.values())
+
+        return validated_sheets, sheet_issues
+
+    def iter_validated_chunks(self, file_path, sheet_names=None):
+        '''Stream a workbook and yield (sheet name, validated chunk, SheetIssues) tuples.
+
+        Only one chunk of raw rows is held in memory at a time.
+        '''
+        with StreamingWorkbookReader(file_path, self.chunk_size or 5000) as reader:
+            for sheet_name in sheet_names or reader.sheet_names:
+                for chunk in reader.iter_chunks(sheet_name):
+                    yield (sheet_name, *self.validate_with_issues(chunk))
+
+    def validate_sheets_streaming(self, file_path, sheet_names=None):
+        '''Validate a workbook chunk by chunk, keeping only validated rows in memory.
+
+        The raw workbook is never loaded whole, but the validated sheets are
+        joined back into full frames, so memory still grows with the row count
+        (about 140 bytes per row in the typed columns). For memory that stays
+        flat whatever the file size, OutputManager.write_validation_zip_streaming
+        writes each validated chunk out instead of keeping it.
+        '''
+        validated_sheets = {}
+        sheet_issues = {}
+        chunks_by_sheet = {}
+        with stage("read_and_validate_streaming") as record:
+            record.rows = 0
+            for sheet_name, chunk, issues in self.iter_validated_chunks(file_path, sheet_names):
+                if sheet_name not in chunks_by_sheet:
+                    print(f"Processing sheet: {sheet_name}")
+                    sheet_issues[sheet_name] = issues
+                else:
+                    sheet_issues[sheet_name] = sheet_issues[sheet_name] + issues
+                chunks_by_sheet.setdefault(sheet_name, []).append(chunk)
+                record.rows += len(chunk)
+
+        for sheet_name, chunks in chunks_by_sheet.items():
+            validated_sheets[sheet_name] = self.concat_validated_chunks(chunks)
+        return validated_sheets, sheet_issues
+
+    def concat_validated_chunks(self, chunks):
+        '''Join the validated chunks of one sheet back into a single frame.'''
+        if len(chunks) == 1:
+            return chunks[0]
+        return pd.concat(chunks, ignore_index=True)
         
+class ValidatedWorkbookWriter:
+    """Write DataFrames to an xlsx file object, such as an open ZIP member.
+
+    By default the worksheet XML is assembled in memory, so nothing touches
+    the disk except the target. constant_memory=True flushes each row to a
+    temporary file instead, trading extra disk writes for a flat memory
+    profile on very large sheets. Validated sheets are written with their
+    human-readable Status and Flag text. Status cells other than "Valid" and
+    non-empty Flag cells are highlighted with conditional formats rather
+    than per-cell styles.
+    """
+
+    def __init__(self, fileobj, highlight=True, constant_memory=False, rules=None):
+        self.workbook = xlsxwriter.Workbook(fileobj, {
+            "in_memory": not constant_memory,
+            "constant_memory": constant_memory,
+            "default_date_format": "yyyy-mm-dd",
+        })
+        self.highlight = highlight
+        # RuleSet the sheets were validated with, for their Status text
+        self.rules = rules
+        self.header_format = self.workbook.add_format({"bold": True, "border": 1, "align": "center"})
+        self.status_format = self.workbook.add_format({"bg_color": "#FFC7CE", "font_color": "#9C0006"})
+        self.flag_format = self.workbook.add_format({"bg_color": "#FFEB9C", "font_color": "#9C5700"})
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.workbook.close()
+
+    def _cell_values(self, series):
+        """Column values as Python objects xlsxwriter can write, blanks as None."""
+        # Timestamps are datetime subclasses, so xlsxwriter writes them as dates
+        return series.astype(object).where(series.notna().to_numpy(), None).tolist()
+
+    def add_sheet(self, sheet_name, df):
+        """Write one DataFrame with a header row, like to_excel(index=False)."""
+        return self.add_sheet_chunks(sheet_name, [df])
+
+    def add_sheet_chunks(self, sheet_name, chunks):
+        """Write consecutive DataFrames with the same columns as one sheet, one chunk at a time.
+
+        The header comes from the first chunk. With constant_memory only the
+        current chunk is held in memory.
+        """
+        worksheet = self.workbook.add_worksheet(sheet_name)
+        columns = None
+        last_row = 0
+        for df in chunks:
+            df = format_validated_sheet(df, self.rules)
+            if columns is None:
+                columns = [str(col) for col in df.columns]
+                worksheet.write_row(0, 0, columns, self.header_format)
+
+            # Rows are written in order so constant_memory mode also works
+            for values in zip(*(self._cell_values(df[col]) for col in df.columns)):
+                last_row += 1
+                for col_idx, value in enumerate(values):
+                    if value is not None:
+                        worksheet.write(last_row, col_idx, value)
+
+        if self.highlight and last_row:
+            if "Status" in columns:
+                col_idx = columns.index("Status")
+                worksheet.conditional_format(1, col_idx, last_row, col_idx, {
+                    "type": "cell", "criteria": "!=", "value": '"Valid"', "format": self.status_format})
+            if "Flag" in columns:
+                col_idx = columns.index("Flag")
+                worksheet.conditional_format(1, col_idx, last_row, col_idx, {
+                    "type": "no_blanks", "format": self.flag_format})
+        return worksheet
+
+
+class SummaryStore:
+    """Append-only store for summary tracking rows, backed by SQLite.
+
+    Rows are grouped by scope (one scope per summary workbook). Adding rows
+    is a single insert regardless of history size, and SQLite's locking
+    serializes concurrent uploads. Excel files are exported on demand and
+    only rewritten when rows were added since the last export.
+    """
+
+    COLUMNS = ["S.No", "File Name", "Sheet Name", "Hours", "Review", "Validation Folder", "Validation Date"]
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        with self._connect() as conn:
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS summary_rows (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    scope TEXT NOT NULL,
+                    s_no INTEGER NOT NULL,
+                    file_name TEXT,
+                    sheet_name TEXT,
+                    hours REAL,
+                    review TEXT,
+                    validation_folder TEXT,
+                    validation_date TEXT
+                );
+                CREATE INDEX IF NOT EXISTS summary_rows_scope ON summary_rows (scope, s_no);
+                CREATE TABLE IF NOT EXISTS summary_scopes (
+                    scope TEXT PRIMARY KEY,
+                    exported_row_id INTEGER NOT NULL DEFAULT 0
+                );
+            """)
+
+    @contextmanager
+    def _connect(self):
+        '''Open a connection that commits on success and is always closed.'''
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def append(self, scope, entries, legacy_excel_path=None):
+        """Append summary entries to a scope, numbering S.No after the last row.
+
+        The first time a scope is used, rows from its existing Excel file (if
+        any) are imported so history from before the store is kept.
+        """
+        with self._connect() as conn:
+            # Take the write lock up front so two uploads can't share an S.No
+            conn.execute("BEGIN IMMEDIATE")
+            is_new_scope = conn.execute(
+                "INSERT OR IGNORE INTO summary_scopes (scope) VALUES (?)", (scope,)).rowcount == 1
+            if is_new_scope and legacy_excel_path and os.path.exists(legacy_excel_path):
+                self._import_excel(conn, scope, legacy_excel_path)
+
+            last_sno = conn.execute(
+                "SELECT COALESCE(MAX(s_no), 0) FROM summary_rows WHERE scope = ?", (scope,)).fetchone()[0]
+            conn.executemany(
+                "INSERT INTO summary_rows (scope, s_no, file_name, sheet_name, hours, review, "
+                "validation_folder, validation_date) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [(scope, last_sno + i, entry["File Name"], entry["Sheet Name"], self._to_float(entry["Hours"]),
+                  entry["Review"], entry.get("Validation Folder"), entry["Validation Date"])
+                 for i, entry in enumerate(entries, start=1)],
+            )
+
+    def _import_excel(self, conn, scope, excel_path):
+        try:
+            legacy = pd.read_excel(excel_path)
+        except Exception as e:
+            print(f"Could not import existing summary {excel_path}: {str(e)}")
+            return
+        legacy = legacy.reindex(columns=self.COLUMNS).astype(object)
+        legacy = legacy.where(legacy.notna(), None)
+        rows = [(scope, int(row["S.No"]) if row["S.No"] is not None else i, row["File Name"], row["Sheet Name"],
+                 self._to_float(row["Hours"]), row["Review"], row["Validation Folder"],
+                 None if row["Validation Date"] is None else str(row["Validation Date"]))
+                for i, row in enumerate(legacy.to_dict("records"), start=1)]
+        conn.executemany(
+            "INSERT INTO summary_rows (scope, s_no, file_name, sheet_name, hours, review, "
+            "validation_folder, validation_date) VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        # The Excel file already holds these rows, no need to re-export for them
+        conn.execute("UPDATE summary_scopes SET exported_row_id = (SELECT COALESCE(MAX(id), 0) FROM summary_rows) "
+                     "WHERE scope = ?", (scope,))
+        print(f"Imported {len(rows)} existing summary rows from {excel_path}")
+
+    def _to_float(self, value):
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return None
+
+    def rows(self, scope, include_folder=False):
+        """Return a scope's rows as a DataFrame with the summary workbook's columns."""
+        with self._connect() as conn:
+            df = pd.read_sql_query(
+                "SELECT s_no, file_name, sheet_name, hours, review, validation_folder, validation_date "
+                "FROM summary_rows WHERE scope = ? ORDER BY id", conn, params=(scope,))
+        df.columns = self.COLUMNS
+        if not include_folder:
+            df = df.drop(columns=["Validation Folder"])
+        return df
+
+    def export_excel(self, scope, excel_path, include_folder=False):
+        """Write a scope to Excel, reusing the existing file if no rows were added since."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT exported_row_id, (SELECT COALESCE(MAX(id), 0) FROM summary_rows WHERE scope = ?) "
+                "FROM summary_scopes WHERE scope = ?", (scope, scope)).fetchone()
+        if row is None:
+            return None
+        exported_row_id, last_row_id = row
+        if exported_row_id >= last_row_id and os.path.exists(excel_path):
+            return excel_path
+
+        # Write to a temporary file first so readers never see a half-written export
+        temp_path = f"{excel_path}.{os.getpid()}.tmp.xlsx"
+        self.rows(scope, include_folder).to_excel(temp_path, index=False)
+        os.replace(temp_path, excel_path)
+        with self._connect() as conn:
+            conn.execute("UPDATE summary_scopes SET exported_row_id = MAX(exported_row_id, ?) WHERE scope = ?",
+                         (last_row_id, scope))
+        print(f"Summary exported to {excel_path}")
+        return excel_path
+
+class ResultCache:
+    """Content-addressed cache of finished validation ZIPs and summaries.
+
+    Entries are keyed on a hash of the uploaded file plus anything else that
+    changes the output (rule version, validation type, file name). ZIPs are
+    kept in cache_dir and the least recently used ones are evicted once the
+    total size passes max_bytes. An SQLite index holds entry metadata and
+    hit/miss counters so they are shared between workers.
+    """
+
+    def __init__(self, cache_dir, max_bytes):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+        self.db_path = os.path.join(cache_dir, "index.sqlite3")
+        with self._connect() as conn:
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS entries (
+                    key TEXT PRIMARY KEY,
+                    zip_name TEXT NOT NULL,
+                    summary TEXT,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_used REAL NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS stats (
+                    name TEXT PRIMARY KEY,
+                    value INTEGER NOT NULL DEFAULT 0
+                );
+                INSERT OR IGNORE INTO stats (name) VALUES ('hits'), ('misses'), ('evictions');
+            """)
+
+    @contextmanager
+    def _connect(self):
+        '''Open a connection that commits on success and is always closed.'''
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def make_key(file_path, *parts):
+        """Hash a file's content together with the given key parts."""
+        digest = hashlib.sha256()
+        with open(file_path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(block)
+        for part in parts:
+            digest.update(b"\0" + str(part).encode("utf-8"))
+        return digest.hexdigest()
+
+    def _zip_path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.zip")
+
+    def _count(self, conn, name, amount=1):
+        conn.execute("UPDATE stats SET value = value + ? WHERE name = ?", (amount, name))
+
+    def get(self, key):
+        """Return the cached entry for key, or None on a miss.
+
+        The entry is a dict with zip_path, zip_name (the original download
+        name) and summary (a DataFrame).
+        """
+        with self._connect() as conn:
+            row = conn.execute("SELECT zip_name, summary FROM entries WHERE key = ?", (key,)).fetchone()
+            zip_path = self._zip_path(key)
+            if row is not None and not os.path.exists(zip_path):
+                # The file was removed behind our back, forget the entry
+                conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                row = None
+            if row is None:
+                self._count(conn, "misses")
+                return None
+            conn.execute("UPDATE entries SET last_used = ? WHERE key = ?", (time.time(), key))
+            self._count(conn, "hits")
+
+        zip_name, summary = row
+        summary = pd.read_json(io.StringIO(summary), orient="split", dtype=False) if summary else pd.DataFrame()
+        return {"zip_path": zip_path, "zip_name": zip_name, "summary": summary}
+
+    def put(self, key, zip_path, summary=None, zip_name=None, move=False):
+        """Copy a finished ZIP into the cache and evict old entries; returns the cached path.
+
+        ``zip_name`` is the download name, the ZIP's own file name by default.
+        With ``move`` the ZIP is moved in instead, it must then be on the
+        same file system as the cache (see temp_path).
+        """
+        cached_path = self._zip_path(key)
+        if move:
+            os.replace(zip_path, cached_path)
+        else:
+            # Copy to a temporary name first so readers never see a partial ZIP
+            temp_path = f"{cached_path}.{os.getpid()}.tmp"
+            shutil.copyfile(zip_path, temp_path)
+            os.replace(temp_path, cached_path)
+
+        now = time.time()
+        summary_json = summary.to_json(orient="split", index=False) if summary is not None else None
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (key, zip_name, summary, size, created_at, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, zip_name or os.path.basename(zip_path), summary_json, os.path.getsize(cached_path), now, now))
+            self._evict(conn)
+        return cached_path
+
+    def temp_path(self, key):
+        """A private path in the cache directory to build a ZIP in before put(move=True)."""
+        return f"{self._zip_path(key)}.{os.getpid()}.{time.time_ns()}.tmp"
+
+    def _evict(self, conn):
+        """Drop least recently used entries until the cache fits in max_bytes."""
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        evicted = 0
+        for key, size in conn.execute("SELECT key, size FROM entries ORDER BY last_used").fetchall():
+            if total <= self.max_bytes:
+                break
+            conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            try:
+                os.remove(self._zip_path(key))
+            except FileNotFoundError:
+                pass
+            total -= size
+            evicted += 1
+        self._count(conn, "evictions", evicted)
+
+    def stats(self):
+        """Hit/miss counters and current size of the cache."""
+        with self._connect() as conn:
+            counters = dict(conn.execute("SELECT name, value FROM stats").fetchall())
+            entries, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        lookups = counters["hits"] + counters["misses"]
+        return {
+            **counters,
+            "hit_rate": counters["hits"] / lookups if lookups else 0.0,
+            "entries": entries,
+            "bytes": total,
+            "max_bytes": self.max_bytes,
+        }
+
 class OutputManager:
     """Class for handling output operations"""
 
-    def __init__(self, output_dir, archive_dir, base_validation_dir):
+    def __init__(self, output_dir, archive_dir, base_validation_dir, zip_compresslevel=None):
         self.output_dir = output_dir
+        # Deflate level for ZIP members that are not compressed already (None = zlib default)
+        self.zip_compresslevel = zip_compresslevel
         self.archive_dir = archive_dir
         self.base_validation_dir = base_validation_dir
         self.current_validation_dir = None
@@ -217,6 +1292,8 @@ class OutputManager:
             if not os.path.exists(directory):
                 os.makedirs(directory)
 
+        self.summary_store = SummaryStore(os.path.join(base_validation_dir, "summary_store.sqlite3"))
+
     def set_validation_directory(self, validation_number=None):
         """Set the current validation directory to use.
 
@@ -248,6 +1325,7 @@ class OutputManager:
             folder_name = os.path.basename(self.current_validation_dir)
             return os.path.join(self.current_validation_dir, f"{folder_name}_summary.xlsx")
 
+    @instrumented("save_validated_data")
     def save_validated_data(self, validation_result, validation_number=None, output_path=None):
         """Save validated data to a new Excel file in the specified validation directory.
 
@@ -295,10 +1373,11 @@ class OutputManager:
             validated_sheets = validation_result["validated_sheets"]
             summary_df = validation_result["summary"]
 
-            with pd.ExcelWriter(output_path) as writer:
+            with pd.ExcelWriter(output_path, date_format="YYYY-MM-DD", datetime_format="YYYY-MM-DD") as writer:
                 # Then write each validated sheet
                 for sheet, df in validated_sheets.items():
-                    df.to_excel(writer, sheet_name=sheet, index=False)
+                    exported = format_validated_sheet(df, validation_result.get("rules"))
+                    exported.to_excel(writer, sheet_name=sheet, index=False)
 
             print(f"Validation complete. File saved as {output_path}")
             print(f"A summary sheet with serial numbers has been added")
@@ -321,155 +1400,338 @@ class OutputManager:
         self.set_validation_directory(validation_number)
         summary_path = self.get_summary_file_path()
 
-        file_name = os.path.basename(validation_result["file_path"])
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        new_entries = self._summary_entries(validation_result, timestamp)
 
-        # Create or load summary tracking file
-        if os.path.exists(summary_path):
-            try:
-                summary_tracking = pd.read_excel(summary_path)
-            except:
-                # Create new if reading fails
-                summary_tracking = pd.DataFrame(columns=["S.No", "File Name", "Sheet Name", "Hours", "Review", "Validation Date"])
-        else:
-            summary_tracking = pd.DataFrame(columns=["S.No", "File Name", "Sheet Name", "Hours", "Review", "Validation Date"])
+        # Append to the summary store, the Excel file is only rebuilt when exported
+        self.summary_store.append(self._summary_scope(summary_path), new_entries, legacy_excel_path=summary_path)
+        print(f"Summary tracking updated for {summary_path}")
 
-        # Create new entries for each sheet in the validation result
-        new_entries = []
+    def add_to_master_summary(self, validation_result):
+        """Add validation results to the master summary tracking file in the base validation directory."""
+        # Always use the base validation directory for the master summary
+        master_summary_path = os.path.join(self.base_validation_dir, "master_validation_summary.xlsx")
 
-        # Get the last S.No value and increment from there
-        start_sno = 1
-        if not summary_tracking.empty and "S.No" in summary_tracking.columns:
-            try:
-                start_sno = summary_tracking["S.No"].max() + 1
-            except:
-                start_sno = 1
+        validation_folder = os.path.basename(self.current_validation_dir)
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        new_entries = self._summary_entries(validation_result, timestamp, validation_folder)
 
-        # Add entries for each validated sheet
-        sno = start_sno
-        for sheet_name, df in validation_result["validated_sheets"].items():
-            # Calculate total hours for this sheet
-            total_hours = 0
-            if "Hours" in df.columns:
-                total_hours = df["Hours"].sum()
-
-            # Determine review message
-            review_msg = ""
-            if any(df["Status"] != "Valid"):
-                issues = []
-                if any(df["Status"] == "Half-day detected"):
-                    issues.append("Contains half-days")
-                if any(df["Status"].str.contains("Full working day should be 8 hrs", na=False)):
-                    issues.append("Has non-standard hours")
-                if any(df["Status"] == "Leave/Holiday should be 0 or empty"):
-                    issues.append("Incorrectly logged leave/holiday")
-                if any(df["Status"] == "Missing hours for a working day"):
-                    issues.append("Missing hours entries")
-                if any(df["Status"] == "Invalid Hours Format"):
-                    issues.append("Invalid hour format")
-                review_msg = ", ".join(issues)
-            else:
-                review_msg = "OK"
+        # Append to the summary store, the Excel file is only rebuilt when exported
+        self.summary_store.append(self._summary_scope(master_summary_path), new_entries,
+                                  legacy_excel_path=master_summary_path)
+        print(f"Master summary tracking updated for {master_summary_path}")
+
+    def add_batch_to_summary_tracking(self, validation_results, validation_number=None):
+        """Add every successful result of a batch to summary tracking, one write per summary.
+
+        The folder's summary and, for numbered validation folders, the master
+        summary each get a single append covering all files of the batch.
+        """
+        self.set_validation_directory(validation_number)
+        summary_path = self.get_summary_file_path()
+        validation_folder = os.path.basename(self.current_validation_dir)
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+        results = [result for result in validation_results if result.get("success")]
+        entries = [entry for result in results for entry in self._summary_entries(result, timestamp)]
+        self.summary_store.append(self._summary_scope(summary_path), entries, legacy_excel_path=summary_path)
+        print(f"Summary tracking updated for {summary_path} with {len(results)} files")
+
+        if validation_number is not None:
+            master_summary_path = os.path.join(self.base_validation_dir, "master_validation_summary.xlsx")
+            entries = [entry for result in results
+                       for entry in self._summary_entries(result, timestamp, validation_folder)]
+            self.summary_store.append(self._summary_scope(master_summary_path), entries,
+                                      legacy_excel_path=master_summary_path)
+            print(f"Master summary tracking updated for {master_summary_path} with {len(results)} files")
+
+    def _summary_entries(self, validation_result, timestamp, validation_folder=None):
+        """Summary tracking rows for each sheet of a result; S.No is assigned by the summary store."""
+        file_name = os.path.basename(validation_result["file_path"])
+        entries = []
+        for sheet_name, total_hours, issues in self._sheet_totals(validation_result):
+            # Determine review message from the issue counts found during validation
+            review_msg = issues.review(include_flags=False)
 
-            new_entries.append({
-                "S.No": sno,
+            entry = {
                 "File Name": file_name,
                 "Sheet Name": sheet_name,
                 "Hours": total_hours,
                 "Review": review_msg,
                 "Validation Date": timestamp
-            })
-            sno += 1
+            }
+            if validation_folder is not None:
+                entry["Validation Folder"] = validation_folder
+            entries.append(entry)
+        return entries
 
-        # Create DataFrame from new entries
-        new_entry_df = pd.DataFrame(new_entries)
+    def _sheet_totals(self, validation_result):
+        """(sheet name, total hours, SheetIssues) of each sheet in a result.
 
-        # Append to existing summary tracking
-        summary_tracking = pd.concat([summary_tracking, new_entry_df], ignore_index=True)
+        Results of write_validation_zip_streaming keep no validated frames,
+        only these totals.
+        """
+        if "validated_sheets" not in validation_result:
+            for sheet_name, total_hours in validation_result["sheet_hours"].items():
+                yield sheet_name, total_hours, validation_result["issues"][sheet_name]
+            return
+        for sheet_name, df in validation_result["validated_sheets"].items():
+            total_hours = df["Hours"].sum() if "Hours" in df.columns else 0
+            yield sheet_name, total_hours, self._sheet_issues(validation_result, sheet_name, df)
 
-        # Save updated summary tracking
-        summary_tracking.to_excel(summary_path, index=False)
-        print(f"Summary tracking updated at {summary_path}")
+    def _sheet_issues(self, validation_result, sheet_name, df):
+        """SheetIssues for a validated sheet, classifying it only if validation didn't."""
+        issues = validation_result.get("issues", {}).get(sheet_name)
+        return issues if issues is not None else SheetIssues.from_frame(df)
 
-    def add_to_master_summary(self, validation_result):
-        """Add validation results to the master summary tracking file in the base validation directory."""
-        # Always use the base validation directory for the master summary
+    def _summary_scope(self, summary_path):
+        """Summary store scope for a summary workbook: its path relative to the base directory."""
+        return os.path.relpath(summary_path, self.base_validation_dir).replace(os.sep, "/")
+
+    def export_summary_tracking(self, validation_number=None):
+        """Export a validation folder's summary tracking to Excel, returning the file path."""
+        self.set_validation_directory(validation_number)
+        summary_path = self.get_summary_file_path()
+        return self.summary_store.export_excel(self._summary_scope(summary_path), summary_path)
+
+    def export_master_summary(self):
+        """Export the master summary tracking to Excel, returning the file path."""
         master_summary_path = os.path.join(self.base_validation_dir, "master_validation_summary.xlsx")
+        return self.summary_store.export_excel(self._summary_scope(master_summary_path), master_summary_path,
+                                               include_folder=True)
 
-        file_name = os.path.basename(validation_result["file_path"])
-        validation_folder = os.path.basename(self.current_validation_dir)
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    @instrumented("write_validation_zip")
+    def write_validation_zip(self, validation_result, validation_number=None, zip_path=None):
+        """Write the validated workbook and its summary straight into a ZIP archive.
 
-        # Create or load master summary tracking file
-        if os.path.exists(master_summary_path):
-            try:
-                master_summary = pd.read_excel(master_summary_path)
-            except:
-                # Create new if reading fails
-                master_summary = pd.DataFrame(columns=["S.No", "File Name", "Sheet Name", "Hours", "Review",
-                                                     "Validation Folder", "Validation Date"])
-        else:
-            master_summary = pd.DataFrame(columns=["S.No", "File Name", "Sheet Name", "Hours", "Review",
-                                                 "Validation Folder", "Validation Date"])
+        Both workbooks are streamed into their ZIP members, so no intermediate
+        xlsx files are written or read back. Summary tracking is updated the
+        same way as save_validated_data. Returns the ZIP path, or None on error.
+        """
+        if not validation_result.get("success", True):
+            print("Validation result contains errors, cannot save.")
+            return None
+
+        if zip_path is None:
+            zip_path = os.path.join(self.output_dir, self.validation_zip_name(validation_result))
+
+        print(f"Writing validated data to {zip_path}...")
+        try:
+            self.write_validation_members(validation_result, zip_path)
+            self.record_validation(validation_result, validation_number)
+
+            print(f"ZIP archive created at {zip_path} (includes summary)")
+            return zip_path
+        except Exception as e:
+            print(f"Error creating ZIP archive: {str(e)}")
+            return None
 
-        # Create new entries for each sheet in the validation result
-        new_entries = []
+    @instrumented("write_validation_zip_streaming")
+    def write_validation_zip_streaming(self, validator, file_path, validation_number=None, zip_path=None):
+        """Validate a workbook chunk by chunk straight into a ZIP archive; returns (validation result, ZIP path).
+
+        Each validated chunk is written to the workbook and dropped, and the
+        workbook keeps its rows in a temporary file (constant_memory), so peak
+        memory is about one chunk of validator.chunk_size rows whatever the
+        file size. The archive has the same members as write_validation_zip,
+        with the summary last as it is only known at the end. The result has
+        each sheet's "sheet_hours" and "issues" instead of "validated_sheets".
+        The path is None if validation or writing failed.
+        """
+        file_name = os.path.basename(file_path)
+        base_name, ext = os.path.splitext(file_name)
+        if zip_path is None:
+            zip_path = os.path.join(self.output_dir, self.validation_zip_name({"file_path": file_path}))
+
+        print(f"Validating {file_path} into {zip_path}...")
+        sheet_hours = {}
+        sheet_issues = {}
+
+        def tally(sheet_name, chunks):
+            for _, chunk, issues in chunks:
+                if "Hours" in chunk.columns:
+                    sheet_hours[sheet_name] += chunk["Hours"].sum()
+                sheet_issues[sheet_name] = issues if sheet_name not in sheet_issues else sheet_issues[sheet_name] + issues
+                record.rows += len(chunk)
+                yield chunk
+
+        try:
+            with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED, compresslevel=self.zip_compresslevel) as zipf:
+                with open_member(zipf, f"{base_name}_validated{ext}") as member, \
+                        ValidatedWorkbookWriter(member, constant_memory=True, rules=validator.rules) as writer, \
+                        stage("read_and_validate_streaming") as record:
+                    record.rows = 0
+                    chunks = validator.iter_validated_chunks(file_path)
+                    for sheet_name, sheet_chunks in itertools.groupby(chunks, key=lambda item: item[0]):
+                        print(f"Processing sheet: {sheet_name}")
+                        sheet_hours[sheet_name] = 0
+                        writer.add_sheet_chunks(sheet_name, tally(sheet_name, sheet_chunks))
+
+                summary = validator.summary_from_totals(
+                    {sheet_name: (sheet_hours[sheet_name], sheet_issues[sheet_name]) for sheet_name in sheet_hours})
+                summary["File Name"] = file_name
+                with open_member(zipf, "Validation_Summary.xlsx") as member:
+                    with ValidatedWorkbookWriter(member, highlight=False) as writer:
+                        writer.add_sheet("Sheet1", summary)
+        except Exception as e:
+            print(f"Error processing {file_path}: {str(e)}")
+            if os.path.exists(zip_path):
+                os.remove(zip_path)
+            return {"success": False, "error": str(e)}, None
+
+        validation_result = {
+            "file_path": file_path,
+            "sheet_hours": sheet_hours,
+            "summary": summary,
+            "issues": sheet_issues,
+            "rules": validator.rules,
+            "success": True,
+        }
+        try:
+            self.record_validation(validation_result, validation_number)
+        except Exception as e:
+            print(f"Error updating summary tracking: {str(e)}")
+            return validation_result, None
+        print(f"ZIP archive created at {zip_path} (includes summary)")
+        return validation_result, zip_path
+
+    def stream_validation_zip(self, validation_result, validation_number=None, tee_path=None, on_complete=None,
+                              executor=None):
+        """Return a ZipStream of a validation's archive, for sending as it is written.
+
+        Same members as write_validation_zip, but nothing is written to the
+        output folder: the workbooks are built while the response is sent.
+        The validation is recorded in summary tracking only once the archive
+        is complete, not for a download that fails or is cut off. ``tee_path``
+        and ``on_complete`` are passed to ZipStream, to keep a copy of the
+        finished archive, ``executor`` runs the writer (see ZipStream).
+        Returns None on error.
+        """
+        if not validation_result.get("success", True):
+            print("Validation result contains errors, cannot save.")
+            return None
 
-        # Get the last S.No value and increment from there
-        start_sno = 1
-        if not master_summary.empty and "S.No" in master_summary.columns:
+        def write_members(zipf):
+            with stage("stream_validation_zip"):
+                self._write_validation_members(validation_result, zipf)
+
+        def completed(path):
             try:
-                start_sno = master_summary["S.No"].max() + 1
-            except:
-                start_sno = 1
+                self.record_validation(validation_result, validation_number)
+            except Exception as e:
+                print(f"Error updating summary tracking: {str(e)}")
+            if on_complete is not None:
+                on_complete(path)
 
-        # Add entries for each validated sheet
-        sno = start_sno
-        for sheet_name, df in validation_result["validated_sheets"].items():
-            # Calculate total hours for this sheet
-            total_hours = 0
-            if "Hours" in df.columns:
-                total_hours = df["Hours"].sum()
-
-            # Determine review message
-            review_msg = ""
-            if any(df["Status"] != "Valid"):
-                issues = []
-                if any(df["Status"] == "Half-day detected"):
-                    issues.append("Contains half-days")
-                if any(df["Status"].str.contains("Full working day should be 8 hrs", na=False)):
-                    issues.append("Has non-standard hours")
-                if any(df["Status"] == "Leave/Holiday should be 0 or empty"):
-                    issues.append("Incorrectly logged leave/holiday")
-                if any(df["Status"] == "Missing hours for a working day"):
-                    issues.append("Missing hours entries")
-                if any(df["Status"] == "Invalid Hours Format"):
-                    issues.append("Invalid hour format")
-                review_msg = ", ".join(issues)
-            else:
-                review_msg = "OK"
+        return ZipStream(write_members, compresslevel=self.zip_compresslevel, tee_path=tee_path,
+                         on_complete=completed, executor=executor)
 
-            new_entries.append({
-                "S.No": sno,
-                "File Name": file_name,
-                "Sheet Name": sheet_name,
-                "Hours": total_hours,
-                "Review": review_msg,
-                "Validation Folder": validation_folder,
-                "Validation Date": timestamp
-            })
-            sno += 1
+    def record_validation(self, validation_result, validation_number=None):
+        """Add a validation to summary tracking, and to the master summary if it is numbered."""
+        self.set_validation_directory(validation_number)
+        self.add_to_summary_tracking(validation_result, validation_number)
+        if validation_number is not None:
+            self.add_to_master_summary(validation_result)
+
+    def record_cached_validation(self, file_path, summary, validation_number=None):
+        """Record an upload served from the result cache, from the summary cached with its ZIP; returns the result.
 
-        # Create DataFrame from new entries
-        new_entry_df = pd.DataFrame(new_entries)
+        The result has the sheet totals summary tracking needs, no validated
+        sheets. A tracking error is printed, the cached ZIP can still be sent.
+        """
+        # The last row holds the total
+        sheets = summary.iloc[:-1]
+        validation_result = {
+            "file_path": file_path,
+            "success": True,
+            "summary": summary,
+            "sheet_hours": dict(zip(sheets["Sheet Name"], sheets["Hours"])),
+            "issues": {sheet_name: SheetIssues.from_review(review)
+                       for sheet_name, review in zip(sheets["Sheet Name"], sheets["Review"])},
+        }
+        try:
+            self.record_validation(validation_result, validation_number)
+        except Exception as e:
+            print(f"Error updating summary tracking: {str(e)}")
+        return validation_result
 
-        # Append to existing master summary tracking
-        master_summary = pd.concat([master_summary, new_entry_df], ignore_index=True)
+    def validation_zip_name(self, validation_result):
+        """Timestamped download name of a validation's ZIP archive."""
+        file_name = os.path.basename(validation_result["file_path"])
+        return f"{os.path.splitext(file_name)[0]}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip"
+
+    def write_validation_members(self, validation_result, fileobj):
+        """Stream the validated workbook and summary into a ZIP at a path or file object."""
+        with zipfile.ZipFile(fileobj, "w", zipfile.ZIP_DEFLATED, compresslevel=self.zip_compresslevel) as zipf:
+            self._write_validation_members(validation_result, zipf)
 
-        # Save updated master summary tracking
-        master_summary.to_excel(master_summary_path, index=False)
-        print(f"Master summary tracking updated at {master_summary_path}")
+    def _write_validation_members(self, validation_result, zipf):
+        file_name = os.path.basename(validation_result["file_path"])
+        base_name, ext = os.path.splitext(file_name)
+        # The small summary goes first: a workbook's bytes only come out once it
+        # is closed, so this gets a streamed download going sooner
+        with open_member(zipf, "Validation_Summary.xlsx") as member:
+            with ValidatedWorkbookWriter(member, highlight=False) as writer:
+                writer.add_sheet("Sheet1", validation_result["summary"])
+        with open_member(zipf, f"{base_name}_validated{ext}") as member:
+            with ValidatedWorkbookWriter(member, rules=validation_result.get("rules")) as writer:
+                for sheet, df in validation_result["validated_sheets"].items():
+                    writer.add_sheet(sheet, df)
+
+    @instrumented("write_batch_zip")
+    def write_batch_zip(self, validation_results, zip_path, validation_number=None, report=None):
+        """Write a batch's validated workbooks and one consolidated summary into a ZIP.
+
+        Each successful file becomes a ``{name}_validated`` member, file names
+        must be unique within the batch. Batch_Summary.xlsx lists the summary
+        rows of every file with a grand total, the files that failed and the
+        ``report`` dict, one metric per row. Summary tracking is updated once
+        for the whole batch. Returns the ZIP path, or None on error.
+        """
+        self.set_validation_directory(validation_number)
+        print(f"Writing {len(validation_results)} validated files to {zip_path}...")
+        try:
+            with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED, compresslevel=self.zip_compresslevel) as zipf:
+                for result in validation_results:
+                    if not result.get("success"):
+                        continue
+                    base_name, ext = os.path.splitext(os.path.basename(result["file_path"]))
+                    with open_member(zipf, f"{base_name}_validated{ext}") as member:
+                        with ValidatedWorkbookWriter(member, rules=result.get("rules")) as writer:
+                            for sheet, df in result["validated_sheets"].items():
+                                writer.add_sheet(sheet, df)
+
+                with open_member(zipf, "Batch_Summary.xlsx") as member:
+                    with ValidatedWorkbookWriter(member, highlight=False) as writer:
+                        writer.add_sheet("Summary", self.batch_summary(validation_results))
+                        failed = [{"File Name": os.path.basename(result["file_path"]), "Error": result.get("error")}
+                                  for result in validation_results if not result.get("success")]
+                        if failed:
+                            writer.add_sheet("Failed Files", pd.DataFrame(failed))
+                        if report:
+                            writer.add_sheet("Batch Report", pd.DataFrame(
+                                {"Metric": list(report), "Value": list(report.values())}))
+
+            self.add_batch_to_summary_tracking(validation_results, validation_number)
+            print(f"ZIP archive created at {zip_path} (includes batch summary)")
+            return zip_path
+        except Exception as e:
+            print(f"Error creating batch ZIP archive: {str(e)}")
+            return None
 
+    def batch_summary(self, validation_results):
+        """One summary of every successful file in a batch, numbered through with a grand total."""
+        columns = ["S.No", "File Name", "Sheet Name", "Hours", "Review"]
+        # Each file's summary ends with its own total row, which has no S.No
+        rows = [summary[summary["S.No"] != ""] for summary in
+                (result["summary"] for result in validation_results if result.get("success"))]
+        summary_df = pd.concat(rows, ignore_index=True) if rows else pd.DataFrame(columns=columns)
+        summary_df["S.No"] = range(1, len(summary_df) + 1)
+        total_hours_row = pd.DataFrame([{'S.No': '', 'File Name': 'Total', 'Sheet Name': '',
+                                         'Hours': summary_df['Hours'].sum(), 'Review': ''}])
+        return pd.concat([summary_df[columns], total_hours_row], ignore_index=True)
+
+    @instrumented("create_zip_archive")
     def create_zip_archive(self, file_path, zip_path=None):
       """Create a ZIP archive containing the validated file and its summary."""
       if not os.path.exists(file_path):
@@ -0,0 +1,124 @@
+"""Declarative rule sets for timesheet validation.
+
+A RuleSet is plain data: the standard working day, the half day, the Client
+keywords that mark leave and holidays, and the weekdays that count as the
+weekend. Teams with other standard hours define their own rule set as a dict,
+in settings or a JSON file, instead of changing TimeValidator. Each rule set
+is compiled once into the matcher and arrays the vectorized rule masks use,
+so a custom rule set costs the same per row as the standard one.
+
+JSON layout, one object per rule set name; omitted fields keep the defaults:
+
+    {"custom": {"full_day_hours": 9, "half_day_hours": 4.5,
+                "leave_keywords": ["leave", "holiday", "pto"]}}
+"""
+import hashlib
+import json
+import os
+import re
+from dataclasses import asdict, dataclass, fields
+from functools import cached_property, lru_cache
+
+import numpy as np
+import pandas as pd
+
+
+@dataclass(frozen=True)
+class RuleSet:
+    """Thresholds and keywords of one set of timesheet validation rules."""
+
+    name: str = "standard"
+    full_day_hours: float = 8
+    half_day_hours: float = 4
+    # Case-insensitive substrings of Client that mark a leave/holiday row
+    leave_keywords: tuple = ("leave", "holiday", "weekend")
+    # Days flagged when hours are filled, Monday is 0
+    weekend_days: tuple = (5, 6)
+
+    @classmethod
+    def from_dict(cls, name, data):
+        """Build a rule set from a JSON-style dict, rejecting unknown or malformed fields."""
+        known = {field.name for field in fields(cls)} - {"name"}
+        unknown = set(data) - known
+        if unknown:
+            raise ValueError(f"Rule set {name!r} has unknown field(s): {', '.join(sorted(unknown))}")
+
+        values = dict(data)
+        for key in ("full_day_hours", "half_day_hours"):
+            if key in values and (isinstance(values[key], bool) or not isinstance(values[key], (int, float))):
+                raise ValueError(f"Rule set {name!r}: {key} must be a number")
+        if "leave_keywords" in values:
+            keywords = values["leave_keywords"]
+            if isinstance(keywords, str) or not all(isinstance(k, str) and k.strip() for k in keywords):
+                raise ValueError(f"Rule set {name!r}: leave_keywords must be a list of non-empty strings")
+            values["leave_keywords"] = tuple(k.strip() for k in keywords)
+        if "weekend_days" in values:
+            days = values["weekend_days"]
+            if isinstance(days, str) or not all(isinstance(d, int) and 0 <= d <= 6 for d in days):
+                raise ValueError(f"Rule set {name!r}: weekend_days must be weekday numbers 0 to 6")
+            values["weekend_days"] = tuple(days)
+        return cls(name=name, **values)
+
+    def fingerprint(self):
+        """Short hash of the rule definitions, for cache keys."""
+        definition = json.dumps(asdict(self), sort_keys=True)
+        return hashlib.sha256(definition.encode("utf-8")).hexdigest()[:16]
+
+    @cached_property
+    def leave_matcher(self):
+        """One compiled, case-insensitive regex matching any leave keyword."""
+        # Longest first so overlapping keywords resolve the same way every time
+        keywords = sorted(set(self.leave_keywords), key=len, reverse=True)
+        if not keywords:
+            return None
+        return re.compile("|".join(re.escape(keyword) for keyword in keywords), re.IGNORECASE)
+
+    def leave_mask(self, client):
+        """Bool array marking the rows whose Client contains a leave keyword.
+
+        The regex runs once per distinct Client value rather than per row;
+        timesheets repeat a handful of clients over thousands of rows.
+        """
+        codes, uniques = pd.factorize(client)
+        if self.leave_matcher is None or not len(uniques):
+            return np.zeros(len(codes), dtype=bool)
+        search = self.leave_matcher.search
+        # The extra False at the end is picked by the -1 code of missing values
+        hits = np.fromiter((search(str(value)) is not None for value in uniques), dtype=bool, count=len(uniques))
+        return np.append(hits, False)[codes]
+
+    def weekend_mask(self, parsed_dates):
+        """Bool array marking the rows dated on a weekend day; NaT counts as a weekday."""
+        return np.isin(parsed_dates.dt.dayofweek.to_numpy(dtype=float, na_value=np.nan), self.weekend_days)
+
+
+STANDARD_RULES = RuleSet()
+
+
+def load_rule_sets(source=None):
+    """Rule sets by name from a dict or the path of a JSON file; "standard" is always defined.
+
+    An entry named "standard" overrides the built-in defaults. Each
+    definition is built once per process: a dict is looked up by its
+    content, a file by its path and modification time, so an edited file is
+    read again.
+    """
+    if isinstance(source, str):
+        rule_sets = _load_rule_set_file(source, os.path.getmtime(source))
+    else:
+        rule_sets = _build_rule_sets(json.dumps(source or {}, sort_keys=True))
+    return dict(rule_sets)
+
+
+@lru_cache(maxsize=32)
+def _load_rule_set_file(path, mtime):
+    with open(path, encoding="utf-8") as f:
+        return _build_rule_sets(json.dumps(json.load(f), sort_keys=True))
+
+
+@lru_cache(maxsize=32)
+def _build_rule_sets(definition):
+    rule_sets = {"standard": STANDARD_RULES}
+    for name, data in json.loads(definition).items():
+        rule_sets[name] = RuleSet.from_dict(name, data or {})
+    return rule_sets
@@ -0,0 +1,205 @@
+"""Stream ZIP archives to a reader while they are being written.
+
+zipfile can write to a stream that is not seekable: each member's CRC and
+sizes then follow its data in a data descriptor instead of being patched
+into its local header. ZipStream runs a function that writes the members
+into such a stream on a worker thread and hands the archive out in chunks as
+it grows, so the first bytes can be sent before the last member is built
+and nothing has to be written to disk. A bounded queue between writer and
+reader keeps a slow reader from buffering the whole archive in memory.
+
+Members that are compressed containers already (xlsx, pptx, ...) are stored
+as they are; deflating them again costs CPU and saves next to nothing.
+Everything else is deflated at the archive's compression level.
+"""
+import contextvars
+import io
+import logging
+import os
+import queue
+import threading
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+STORED_EXTENSIONS = frozenset({".xlsx", ".xlsm", ".pptx", ".docx", ".zip", ".gz", ".png", ".jpg", ".jpeg"})
+
+_END = object()
+
+
+@contextmanager
+def open_member(zipf, name):
+    """Open a new member of zipf for writing, stored if its extension is already compressed.
+
+    The archive's file is flushed once the member is complete, so a
+    ZipStream hands it on rather than holding it back for the next member.
+    """
+    if os.path.splitext(name)[1].lower() in STORED_EXTENSIONS:
+        name = zipfile.ZipInfo(name, date_time=time.localtime(time.time())[:6])
+        name.compress_type = zipfile.ZIP_STORED
+        name.external_attr = 0o600 << 16
+    with zipf.open(name, "w", force_zip64=True) as member:
+        yield member
+    zipf.fp.flush()
+
+
+class ZipStreamCancelled(Exception):
+    """Raised in the writer thread once the reader has closed the stream."""
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only, unseekable file that passes its data on to a ZipStream in chunks."""
+
+    def __init__(self, stream):
+        super().__init__()
+        self._stream = stream
+        self._buffer = bytearray()
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._buffer += data
+        if len(self._buffer) >= self._stream.chunk_bytes:
+            self.send()
+        return len(data)
+
+    def send(self):
+        if self._buffer:
+            self._stream._send(bytes(self._buffer))
+            self._buffer.clear()
+
+    def flush(self):
+        self.send()
+
+    def close(self):
+        # Whatever is left after an error or cancellation is dropped
+        self._buffer.clear()
+        super().close()
+
+
+class ZipStream:
+    """A ZIP archive written by write_members(zipf) on a thread and read back in chunks.
+
+    The writer is submitted to ``executor`` on the first read_chunk(), or to
+    a thread of its own without one, and runs in a copy of the reader's
+    context, so context variables such as the current stage records carry
+    over. It holds its worker until the archive is read or the stream closed. With ``tee_path`` every
+    chunk is also written to that file. Once the archive is complete
+    ``on_complete(tee_path)`` is called on the writer thread, before the
+    reader sees the end, for example to keep the copy in a cache. If writing
+    fails or the reader closes the stream early, on_complete is not called
+    and the tee file is removed.
+    """
+
+    def __init__(self, write_members, compresslevel=None, chunk_bytes=256 * 1024, max_chunks=8,
+                 tee_path=None, on_complete=None, executor=None):
+        self.write_members = write_members
+        self.compresslevel = compresslevel
+        self.chunk_bytes = chunk_bytes
+        self.tee_path = tee_path
+        self.on_complete = on_complete
+        self.executor = executor
+        self._queue = queue.Queue(maxsize=max_chunks)
+        self._cancelled = threading.Event()
+        self._future = None
+        self._tee = None
+        self._done = False
+
+    def _put(self, item):
+        # Poll so a writer blocked on a full queue notices when the reader goes away
+        while True:
+            if self._cancelled.is_set():
+                raise ZipStreamCancelled()
+            try:
+                self._queue.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+
+    def _send(self, chunk):
+        if self._tee is not None:
+            self._tee.write(chunk)
+        self._put(chunk)
+
+    def _write(self):
+        if self._cancelled.is_set():
+            # Closed while waiting for a free worker
+            return
+        sink = _ChunkSink(self)
+        completed = False
+        try:
+            if self.tee_path:
+                self._tee = open(self.tee_path, "wb")
+            with zipfile.ZipFile(sink, "w", zipfile.ZIP_DEFLATED, compresslevel=self.compresslevel) as zipf:
+                self.write_members(zipf)
+            sink.send()
+            if self._tee is not None:
+                self._tee.close()
+            completed = True
+        except ZipStreamCancelled:
+            pass
+        except BaseException as e:
+            logger.exception("Error writing ZIP stream")
+            self._try_put(e)
+        finally:
+            if self._tee is not None and not completed:
+                self._tee.close()
+                try:
+                    os.remove(self.tee_path)
+                except FileNotFoundError:
+                    pass
+
+        if completed:
+            if self.on_complete is not None:
+                try:
+                    self.on_complete(self.tee_path)
+                except Exception:
+                    logger.exception("Error after writing ZIP stream")
+            self._try_put(_END)
+
+    def _try_put(self, item):
+        try:
+            self._put(item)
+        except ZipStreamCancelled:
+            pass
+
+    def start(self):
+        if self._future is None:
+            context = contextvars.copy_context()
+            if self.executor is not None:
+                self._future = self.executor.submit(context.run, self._write)
+            else:
+                executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="zip-stream")
+                self._future = executor.submit(context.run, self._write)
+                executor.shutdown(wait=False)
+        return self
+
+    def read_chunk(self):
+        """Next chunk of the archive, b"" once it is complete; re-raises the writer's error."""
+        if self._done:
+            return b""
+        self.start()
+        item = self._queue.get()
+        if item is _END:
+            self._done = True
+            return b""
+        if isinstance(item, BaseException):
+            self._done = True
+            raise item
+        return item
+
+    def __iter__(self):
+        while True:
+            chunk = self.read_chunk()
+            if not chunk:
+                return
+            yield chunk
+
+    def close(self):
+        """Stop reading; the writer gives up at its next chunk, or doesn't start if still waiting."""
+        self._done = True
+        self._cancelled.set()